@@ -0,0 +1,77 @@
+"""
+Paginação por keyset com cursores opacos
+
+O cursor codifica os valores da chave de ordenação do último item da página
+(ex.: (created_at, id)); a próxima página busca a partir deles com um seek
+no índice, em vez de OFFSET.
+"""
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+# Header com o cursor da próxima página em endpoints que retornam uma lista
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """Serializa a chave do último item em um token opaco (base64 url-safe)"""
+    payload = [
+        {"t": value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_value(value: Any, expected: type) -> Any:
+    """Converte um valor do cursor para o tipo esperado (ValueError se não bater)"""
+    if expected is datetime:
+        if not isinstance(value, dict) or not isinstance(value.get("t"), str):
+            raise ValueError(value)
+        return datetime.fromisoformat(value["t"])
+    # bool é subclasse de int, mas nunca é uma chave válida
+    if isinstance(value, bool) or not isinstance(value, expected):
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> Tuple[Any, ...]:
+    """
+    Recupera a chave codificada por encode_cursor
+    
+    Args:
+        cursor: Token recebido do cliente
+        types: Tipo de cada valor da chave (ex.: (datetime, int))
+    
+    Raises:
+        HTTPException 400 se o cursor for inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError(cursor)
+        return tuple(_decode_value(value, expected) for value, expected in zip(payload, types))
+    except (ValueError, TypeError, KeyError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+
+def split_page(rows: Sequence[Any], limit: int, key) -> Tuple[List[Any], Optional[str]]:
+    """
+    Separa a página (consultada com limit + 1) e calcula o cursor seguinte
+    
+    Args:
+        rows: Resultado da consulta, com até limit + 1 itens
+        limit: Tamanho da página
+        key: Função que extrai a tupla da chave de ordenação de um item
+    """
+    page = list(rows[:limit])
+    next_cursor = encode_cursor(*key(page[-1])) if len(rows) > limit and page else None
+    return page, next_cursor
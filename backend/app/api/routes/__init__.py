@@ -1,2 +1,2 @@
 # API Routes
-from app.api.routes import auth, upload, generation, export
+from app.api.routes import auth, upload, generation, export, search
@@ -3,25 +3,33 @@ Rotas de autenticação
 """
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import verify_password, get_password_hash, create_access_token, decode_token
 from app.core.config import settings
 from app.models import User
 from app.schemas import UserCreate, UserResponse, UserLogin, Token
+from app.services.principal_cache import principal_cache, Principal
 
 router = APIRouter(prefix="/auth", tags=["Autenticação"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency para obter usuário atual do token"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    Dependency para obter usuário atual do token
+    
+    Usa o cache de principals; o banco só é consultado quando a entrada
+    não existe ou expirou.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Credenciais inválidas",
@@ -32,61 +40,76 @@ def get_current_user(
     if payload is None:
         raise credentials_exception
     
-    user_id = payload.get("sub")
-    if user_id is None:
+    subject = payload.get("sub")
+    if subject is None:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
+    try:
+        user_id = int(subject)
+    except (TypeError, ValueError):
         raise credentials_exception
     
-    if not user.is_active:
+    principal = principal_cache.get(user_id)
+    if principal is None and principal_cache.shared:
+        principal = await run_in_threadpool(principal_cache.get_shared, user_id)
+    
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        
+        principal = Principal.from_user(user)
+        if principal_cache.shared:
+            await run_in_threadpool(principal_cache.set, principal)
+        else:
+            principal_cache.set(principal)
+    
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Usuário inativo"
         )
     
-    return user
+    return principal
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Registra um novo usuário
     """
     # Verifica se email já existe
-    existing = db.query(User).filter(User.email == user_data.email).first()
+    existing = await db.scalar(select(User).where(User.email == user_data.email))
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email já cadastrado"
         )
     
-    # Cria usuário
+    # Cria usuário (bcrypt fora do event loop)
     user = User(
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await run_in_threadpool(get_password_hash, user_data.password),
         full_name=user_data.full_name
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     return user
 
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login com email e senha, retorna token JWT
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = await db.scalar(select(User).where(User.email == form_data.username))
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await run_in_threadpool(verify_password, form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
@@ -107,8 +130,19 @@ def login(
 
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Retorna dados do usuário autenticado
     """
-    return current_user
+    user = await db.get(User, current_user.id)
+    if user is None:
+        principal_cache.invalidate(current_user.id)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Credenciais inválidas",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -6,16 +6,33 @@ from datetime import datetime
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.models import User, GenerationSession, Question, QuestionType
+from app.core.database import get_async_db
+from app.models import GenerationSession, Question, QuestionType, DifficultyLevel
 from app.api.routes.auth import get_current_user
+from app.services.principal_cache import Principal
 from app.schemas import ExportOptions
 
 router = APIRouter(prefix="/export", tags=["Exportação"])
 
 
+def enum_rank(column, members):
+    """Posição de cada membro na lista dada (comparações tipadas pela coluna)"""
+    return case(*[(column == member, rank) for rank, member in enumerate(members)])
+
+
+# Ordenações de exportação, aplicadas no SQL (id desempata)
+EXPORT_ORDER = {
+    'difficulty': enum_rank(Question.difficulty, [DifficultyLevel.FACIL, DifficultyLevel.MEDIO, DifficultyLevel.DIFICIL]),
+    'topic': func.coalesce(Question.topic, ''),
+    # Ordem alfabética do valor (o ENUM nativo do Postgres ordenaria pela declaração)
+    'type': enum_rank(Question.question_type, sorted(QuestionType, key=lambda qt: qt.value)),
+    'id': Question.id
+}
+
+
 def generate_pdf_content(
     questions: List[Question],
     include_answers: bool = True,
@@ -227,18 +244,21 @@ def generate_txt_content(
 async def export_session(
     session_id: int,
     options: ExportOptions,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Exporta questões de uma sessão
     
     Formatos suportados: pdf, csv, txt
+    
+    Filtros (aprovadas, ids escolhidos) e ordenação rodam no banco: uma
+    consulta para a sessão e uma para as questões.
     """
-    session = db.query(GenerationSession).filter(
+    session = await db.scalar(select(GenerationSession).where(
         GenerationSession.id == session_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
@@ -246,14 +266,16 @@ async def export_session(
             detail="Sessão não encontrada"
         )
     
-    # Filtra questões
-    questions = session.questions
-    
+    # Apenas aprovadas (e, se informadas, só as escolhidas)
+    query = select(Question).where(
+        Question.session_id == session.id,
+        Question.is_approved.is_(True)
+    )
     if options.questions_ids:
-        questions = [q for q in questions if q.id in options.questions_ids]
+        query = query.where(Question.id.in_(options.questions_ids))
     
-    # Filtra apenas aprovadas
-    questions = [q for q in questions if q.is_approved]
+    order = EXPORT_ORDER.get(options.order_by, EXPORT_ORDER['id'])
+    questions = (await db.scalars(query.order_by(order, Question.id))).all()
     
     if not questions:
         raise HTTPException(
@@ -261,15 +283,6 @@ async def export_session(
             detail="Nenhuma questão aprovada para exportar"
         )
     
-    # Ordena
-    order_map = {
-        'difficulty': lambda q: ['facil', 'medio', 'dificil'].index(q.difficulty.value),
-        'topic': lambda q: q.topic or '',
-        'type': lambda q: q.question_type.value,
-        'id': lambda q: q.id
-    }
-    questions = sorted(questions, key=order_map.get(options.order_by, order_map['id']))
-    
     # Gera conteúdo
     filename = f"questoes_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M')}"
     title = f"Avaliação - {session.source_filename}"
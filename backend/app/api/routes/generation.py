@@ -5,72 +5,100 @@ import os
 import hashlib
 from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query, Response
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, contains_eager
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.models import User, GenerationSession, Question, DifficultyLevel, QuestionType
+from app.models import GenerationSession, Question, DifficultyLevel, QuestionType
 from app.api.routes.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.api.pagination import NEXT_CURSOR_HEADER, decode_cursor, split_page
 from app.services.ai import question_service, GenerationParameters
-from app.services.ai.base import QuestionType as AIQuestionType, DifficultyLevel as AIDifficultyLevel
+from app.services.question_bulk import bulk_update_questions, bulk_delete_questions, QuestionsNotFoundError
+from app.services.ai.base import (
+    QuestionBatch, QuestionType as AIQuestionType, DifficultyLevel as AIDifficultyLevel
+)
 from app.schemas import (
     GenerationParams, QuestionResponse, QuestionUpdate,
+    BulkQuestionAction, QuestionBulkOperation,
     GenerationSessionResponse, GenerationSessionList, APIResponse
 )
 
 router = APIRouter(prefix="/generation", tags=["Geração"])
 
 
+async def paginate_session_questions(
+    db: AsyncSession,
+    session_id: int,
+    cursor: Optional[str],
+    limit: int
+):
+    """
+    Página de questões de uma sessão, em ordem de id
+    
+    Busca a partir do último id da página anterior (seek no índice de
+    session_id/id), sem OFFSET.
+    
+    Returns:
+        (questões da página, cursor da próxima página ou None)
+    """
+    query = select(Question).where(Question.session_id == session_id)
+    if cursor:
+        (after_id,) = decode_cursor(cursor, (int,))
+        query = query.where(Question.id > after_id)
+    
+    rows = (await db.scalars(query.order_by(Question.id).limit(limit + 1))).all()
+    return split_page(rows, limit, lambda q: (q.id,))
+
+
 def save_questions_to_db(
     db: Session,
     session: GenerationSession,
-    questions_data: List[dict]
-) -> List[Question]:
-    """Salva questões geradas no banco de dados"""
-    questions = []
-    
-    for q_data in questions_data:
-        question = Question(
-            session_id=session.id,
-            question_type=QuestionType(q_data['question_type']),
-            content=q_data['content'],
-            option_a=q_data.get('options', {}).get('A'),
-            option_b=q_data.get('options', {}).get('B'),
-            option_c=q_data.get('options', {}).get('C'),
-            option_d=q_data.get('options', {}).get('D'),
-            correct_answer=q_data['correct_answer'],
-            justification=q_data.get('justification', ''),
-            difficulty=DifficultyLevel(q_data['difficulty']),
-            topic=q_data.get('topic', ''),
-            quality_score=q_data.get('difficulty_analysis', {}).get('score'),
-            source_excerpt=q_data.get('source_excerpt', '')[:1000]
-        )
-        db.add(question)
-        questions.append(question)
+    batch: QuestionBatch
+) -> List[Row]:
+    """
+    Salva questões geradas (lote colunar) com um único INSERT ... RETURNING
     
-    db.commit()
-    for q in questions:
-        db.refresh(q)
+    As linhas retornadas já trazem ids e defaults gerados, então não há
+    refresh por questão. O commit fica a cargo de quem chama.
     
-    return questions
+    Recebe a sessão síncrona; nas rotas, use AsyncSession.run_sync.
+    """
+    rows = []
+    for row in batch.rows(session_id=session.id):
+        row['question_type'] = QuestionType(row['question_type'].value)
+        row['difficulty'] = DifficultyLevel(row['difficulty'].value)
+        row['source_excerpt'] = row['source_excerpt'][:1000]
+        rows.append(row)
+    
+    if not rows:
+        return []
+    
+    # Sem sort_by_parameter_order: no SQLite ele força um INSERT por linha.
+    # Os ids são gerados na ordem dos VALUES, então ordenar por id recupera a ordem do lote.
+    result = db.execute(insert(Question).returning(*Question.__table__.c), rows).all()
+    return sorted(result, key=lambda row: row.id)
 
 
 @router.post("/{session_id}/generate", response_model=dict)
 async def generate_questions(
     session_id: int,
     params: GenerationParams,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gera questões para uma sessão existente
     """
     # Busca sessão
-    session = db.query(GenerationSession).filter(
+    session = await db.scalar(select(GenerationSession).where(
         GenerationSession.id == session_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
@@ -99,7 +127,7 @@ async def generate_questions(
         "question_types": [qt.value for qt in params.question_types],
         "difficulty_distribution": params.difficulty_distribution
     }
-    db.commit()
+    await db.commit()
     
     try:
         # Converte parâmetros
@@ -120,14 +148,13 @@ async def generate_questions(
             session.ai_provider
         )
         
-        # Salva questões no banco
-        questions = save_questions_to_db(db, session, result['questions'])
+        # Salva questões e atualiza a sessão na mesma transação
+        questions = await db.run_sync(save_questions_to_db, session, result['questions'])
         
-        # Atualiza sessão
         session.status = "completed"
         session.completed_at = datetime.utcnow()
         session.processing_time_seconds = result['metadata']['processing_time_seconds']
-        db.commit()
+        await db.commit()
         
         return {
             "status": "success",
@@ -155,11 +182,12 @@ async def generate_questions(
                 ]
             }
         }
-        
+    
     except Exception as e:
+        await db.rollback()
         session.status = "failed"
         session.error_message = str(e)
-        db.commit()
+        await db.commit()
         
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -169,27 +197,62 @@ async def generate_questions(
 
 @router.get("/sessions", response_model=dict)
 async def list_sessions(
-    limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(settings.sessions_page_size, ge=1, le=settings.sessions_page_size_max),
+    cursor: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Lista sessões de geração do usuário
+    
+    As contagens de questões vêm de um subquery agrupado, na mesma consulta:
+    nenhuma questão é carregada, independentemente de `limit`.
+    
+    Paginação por keyset em (created_at, id), do mais recente para o mais
+    antigo: passe o `next_cursor` da resposta como `cursor` para a próxima
+    página.
     """
-    sessions = db.query(GenerationSession).filter(
+    question_counts = (
+        select(Question.session_id, func.count(Question.id).label("question_count"))
+        .join(GenerationSession, GenerationSession.id == Question.session_id)
+        .where(GenerationSession.user_id == current_user.id)
+        .group_by(Question.session_id)
+        .subquery()
+    )
+    
+    query = select(
+        GenerationSession.id,
+        GenerationSession.source_filename,
+        GenerationSession.status,
+        GenerationSession.created_at,
+        GenerationSession.completed_at,
+        func.coalesce(question_counts.c.question_count, 0).label("question_count")
+    ).outerjoin(
+        question_counts, question_counts.c.session_id == GenerationSession.id
+    ).where(
         GenerationSession.user_id == current_user.id
-    ).order_by(
-        GenerationSession.created_at.desc()
-    ).limit(limit).all()
+    )
+    if cursor:
+        created_at, session_id = decode_cursor(cursor, (datetime, int))
+        query = query.where(
+            tuple_(GenerationSession.created_at, GenerationSession.id) < tuple_(created_at, session_id)
+        )
+    
+    rows = (await db.execute(query.order_by(
+        GenerationSession.created_at.desc(),
+        GenerationSession.id.desc()
+    ).limit(limit + 1))).all()
+    sessions, next_cursor = split_page(rows, limit, lambda s: (s.created_at, s.id))
     
     return {
         "status": "success",
+        "next_cursor": next_cursor,
         "data": [
             {
                 "id": s.id,
                 "source_filename": s.source_filename,
                 "status": s.status,
-                "question_count": len(s.questions),
+                "question_count": s.question_count,
                 "created_at": s.created_at.isoformat(),
                 "completed_at": s.completed_at.isoformat() if s.completed_at else None
             }
@@ -201,16 +264,21 @@ async def list_sessions(
 @router.get("/sessions/{session_id}", response_model=dict)
 async def get_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    questions_cursor: Optional[str] = None,
+    questions_limit: int = Query(settings.questions_page_size, ge=1, le=settings.questions_page_size_max),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retorna detalhes de uma sessão com suas questões
+    Retorna detalhes de uma sessão com uma página de suas questões
+    
+    As questões seguem em ordem de id; `questions_next_cursor` indica a
+    próxima página (parâmetro `questions_cursor`).
     """
-    session = db.query(GenerationSession).filter(
+    session = await db.scalar(select(GenerationSession).where(
         GenerationSession.id == session_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(
@@ -218,12 +286,15 @@ async def get_session(
             detail="Sessão não encontrada"
         )
     
+    questions, next_cursor = await paginate_session_questions(db, session.id, questions_cursor, questions_limit)
+    
     return {
         "status": "success",
         "data": {
             "id": session.id,
             "source_filename": session.source_filename,
             "word_count": session.word_count,
+            "topics": session.topics,
             "status": session.status,
             "ai_provider": session.ai_provider,
             "parameters": session.parameters,
@@ -248,8 +319,9 @@ async def get_session(
                     "is_approved": q.is_approved,
                     "is_edited": q.is_edited
                 }
-                for q in session.questions
-            ]
+                for q in questions
+            ],
+            "questions_next_cursor": next_cursor
         }
     }
 
@@ -257,23 +329,34 @@ async def get_session(
 @router.get("/{session_id}/questions", response_model=List[dict])
 async def get_session_questions(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.questions_page_size, ge=1, le=settings.questions_page_size_max),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Retorna apenas as questões de uma sessão
+    Retorna uma página das questões de uma sessão, em ordem de id
+    
+    O corpo continua sendo a lista; o cursor da próxima página vem no
+    header X-Next-Cursor (ausente na última página).
     """
-    session = db.query(GenerationSession).filter(
+    # Checagem de dono: só o id, sem carregar a sessão inteira
+    owned_session_id = await db.scalar(select(GenerationSession.id).where(
         GenerationSession.id == session_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
-    if not session:
+    if owned_session_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Sessão não encontrada"
         )
     
+    questions, next_cursor = await paginate_session_questions(db, owned_session_id, cursor, limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    
     return [
         {
             "id": q.id,
@@ -287,7 +370,7 @@ async def get_session_questions(
             "is_approved": q.is_approved,
             "is_edited": q.is_edited
         }
-        for q in session.questions
+        for q in questions
     ]
 
 
@@ -295,16 +378,16 @@ async def get_session_questions(
 async def update_question(
     question_id: int,
     update_data: QuestionUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Atualiza uma questão existente
     """
-    question = db.query(Question).join(GenerationSession).filter(
+    question = await db.scalar(select(Question).join(GenerationSession).where(
         Question.id == question_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not question:
         raise HTTPException(
@@ -321,8 +404,7 @@ async def update_question(
     question.is_edited = True
     question.updated_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(question)
+    await db.commit()
     
     return {
         "status": "success",
@@ -339,16 +421,16 @@ async def update_question(
 @router.delete("/questions/{question_id}", response_model=dict)
 async def delete_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Remove uma questão
     """
-    question = db.query(Question).join(GenerationSession).filter(
+    question = await db.scalar(select(Question).join(GenerationSession).where(
         Question.id == question_id,
         GenerationSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not question:
         raise HTTPException(
@@ -356,8 +438,8 @@ async def delete_question(
             detail="Questão não encontrada"
         )
     
-    db.delete(question)
-    db.commit()
+    await db.delete(question)
+    await db.commit()
     
     return {
         "status": "success",
@@ -365,19 +447,66 @@ async def delete_question(
     }
 
 
+@router.post("/questions/bulk", response_model=dict)
+async def bulk_question_operation(
+    operation: QuestionBulkOperation,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Aplica a mesma operação a várias questões: aprovar, rejeitar, remover,
+    definir dificuldade ou tópico
+    
+    É tudo ou nada: se alguma questão não for encontrada, nenhuma é alterada.
+    """
+    try:
+        if operation.action == BulkQuestionAction.DELETE:
+            question_ids = await bulk_delete_questions(db, current_user.id, operation.question_ids)
+        else:
+            field, value = {
+                BulkQuestionAction.APPROVE: ("is_approved", True),
+                BulkQuestionAction.REJECT: ("is_approved", False),
+                BulkQuestionAction.SET_DIFFICULTY: (
+                    "difficulty", DifficultyLevel(operation.difficulty.value) if operation.difficulty else None
+                ),
+                BulkQuestionAction.SET_TOPIC: ("topic", operation.topic),
+            }[operation.action]
+            question_ids = await bulk_update_questions(db, current_user.id, operation.question_ids, field, value)
+    except QuestionsNotFoundError as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    await db.commit()
+    
+    return {
+        "status": "success",
+        "message": f"{len(question_ids)} questões processadas com sucesso",
+        "data": {
+            "action": operation.action.value,
+            "question_ids": question_ids
+        }
+    }
+
+
 @router.post("/questions/{question_id}/regenerate", response_model=dict)
 async def regenerate_question(
     question_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Regenera uma questão específica mantendo tipo, dificuldade e tópico
     """
-    question = db.query(Question).join(GenerationSession).filter(
-        Question.id == question_id,
-        GenerationSession.user_id == current_user.id
-    ).first()
+    # A sessão vem do mesmo JOIN usado na checagem de dono (sem carga lazy)
+    question = await db.scalar(
+        select(Question).join(Question.session).where(
+            Question.id == question_id,
+            GenerationSession.user_id == current_user.id
+        ).options(contains_eager(Question.session))
+    )
     
     if not question:
         raise HTTPException(
@@ -404,21 +533,20 @@ async def regenerate_question(
             )
         
         # Atualiza questão existente
-        question.content = new_question_data['content']
-        question.correct_answer = new_question_data['correct_answer']
-        question.justification = new_question_data.get('justification', '')
+        question.content = new_question_data.content
+        question.correct_answer = new_question_data.correct_answer
+        question.justification = new_question_data.justification or ''
         
-        if new_question_data.get('options'):
-            question.option_a = new_question_data['options'].get('A')
-            question.option_b = new_question_data['options'].get('B')
-            question.option_c = new_question_data['options'].get('C')
-            question.option_d = new_question_data['options'].get('D')
+        if new_question_data.options:
+            question.option_a = new_question_data.options.get('A')
+            question.option_b = new_question_data.options.get('B')
+            question.option_c = new_question_data.options.get('C')
+            question.option_d = new_question_data.options.get('D')
         
         question.is_edited = False
         question.updated_at = datetime.utcnow()
         
-        db.commit()
-        db.refresh(question)
+        await db.commit()
         
         return {
             "status": "success",
@@ -430,7 +558,7 @@ async def regenerate_question(
                 "justification": question.justification
             }
         }
-        
+    
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,75 @@
+"""
+Rotas de busca no banco de questões
+"""
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.config import settings
+from app.models import QuestionType as ModelQuestionType, DifficultyLevel as ModelDifficultyLevel
+from app.api.routes.auth import get_current_user
+from app.services.principal_cache import Principal
+from app.services.question_search import build_search_query, SearchQueryError
+from app.schemas import DifficultyLevel, QuestionType
+
+router = APIRouter(prefix="/search", tags=["Busca"])
+
+
+@router.get("/questions", response_model=dict)
+async def search_questions(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar"),
+    difficulty: Optional[DifficultyLevel] = None,
+    question_type: Optional[QuestionType] = None,
+    limit: int = Query(settings.search_page_size, ge=1, le=settings.search_page_size_max),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Busca questões em todas as sessões do usuário
+    
+    Procura no enunciado, tópico, alternativas e justificativa; os
+    resultados vêm ordenados por relevância.
+    """
+    try:
+        query = build_search_query(
+            db.bind.dialect.name,
+            current_user.id,
+            q,
+            difficulty=ModelDifficultyLevel(difficulty.value) if difficulty else None,
+            question_type=ModelQuestionType(question_type.value) if question_type else None,
+            limit=limit
+        )
+    except SearchQueryError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    rows = (await db.execute(query)).all()
+    
+    return {
+        "status": "success",
+        "data": [
+            {
+                "id": question.id,
+                "session_id": question.session_id,
+                "source_filename": source_filename,
+                "type": question.question_type.value,
+                "content": question.content,
+                "options": {
+                    "A": question.option_a,
+                    "B": question.option_b,
+                    "C": question.option_c,
+                    "D": question.option_d
+                } if question.question_type == ModelQuestionType.MULTIPLA_ESCOLHA else None,
+                "correct_answer": question.correct_answer,
+                "justification": question.justification,
+                "difficulty": question.difficulty.value,
+                "topic": question.topic,
+                "is_approved": question.is_approved,
+                "rank": rank
+            }
+            for question, source_filename, rank in rows
+        ]
+    }
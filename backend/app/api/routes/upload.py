@@ -2,22 +2,41 @@
 Rotas de upload e processamento de arquivos
 """
 import os
+import json
+import asyncio
+import uuid
 import shutil
 import hashlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Header, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+import structlog
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.models import User, GenerationSession
+from app.models import GenerationSession
 from app.api.routes.auth import get_current_user
-from app.services.ai import question_service
-from app.schemas import ContentAnalysis, APIResponse
+from app.services.principal_cache import Principal
+from app.services.ai import question_service, NoTextLayerError
+from app.services.upload_storage import (
+    resumable_store, consume_stream, UploadNotFoundError, UploadOffsetMismatch,
+    UploadSizeExceeded, UploadIncomplete, UploadLengthMismatch
+)
+from app.schemas import ContentAnalysis, APIResponse, ResumableUploadCreate
 
 router = APIRouter(prefix="/upload", tags=["Upload"])
 
+logger = structlog.get_logger()
+
+# Pool único para a extração dos lotes: o paralelismo é limitado por processo, não por requisição
+batch_executor = ThreadPoolExecutor(max_workers=settings.upload_batch_workers, thread_name_prefix="upload-batch")
+
 
 def ensure_upload_dir():
     """Garante que o diretório de upload existe"""
@@ -29,21 +48,16 @@ def get_file_extension(filename: str) -> str:
     return filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
 
 
-def validate_file(file: UploadFile) -> None:
-    """Valida arquivo antes do upload"""
+def validate_upload(filename: str, size: int, extra_extensions: Tuple[str, ...] = ()) -> None:
+    """Valida nome e tamanho de um upload, antes de processar o conteúdo"""
     # Valida extensão
-    extension = get_file_extension(file.filename)
-    if extension not in settings.allowed_extensions_list:
+    extension = get_file_extension(filename)
+    if extension not in settings.allowed_extensions_list and extension not in extra_extensions:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Formato não suportado. Formatos aceitos: {settings.allowed_extensions}"
         )
     
-    # Valida tamanho (precisa ler o arquivo)
-    file.file.seek(0, 2)  # Vai para o fim
-    size = file.file.tell()
-    file.file.seek(0)  # Volta para o início
-    
     if size > settings.max_file_size_bytes:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
@@ -51,62 +65,208 @@ def validate_file(file: UploadFile) -> None:
         )
 
 
+def validate_file(file: UploadFile, extra_extensions: Tuple[str, ...] = ()) -> int:
+    """Valida arquivo antes do upload e retorna seu tamanho em bytes"""
+    size = file.size
+    if size is None:
+        # Tamanho não informado pelo parser: mede pelo stream
+        file.file.seek(0, 2)  # Vai para o fim
+        size = file.file.tell()
+        file.file.seek(0)  # Volta para o início
+    
+    validate_upload(file.filename, size, extra_extensions)
+    return size
+
+
+def session_from_result(user_id: int, filename: str, result: dict) -> GenerationSession:
+    """Cria (sem persistir) a sessão de geração de um arquivo processado"""
+    return GenerationSession(
+        user_id=user_id,
+        source_filename=filename,
+        source_file_hash=result['content_hash'],
+        content_preview=result['preview'],
+        word_count=result['validation']['word_count'],
+        status="pending"
+    )
+
+
+def build_upload_data(session_id: int, filename: str, result: dict) -> dict:
+    """
+    Monta os dados de resposta de um arquivo processado
+    
+    Os tópicos são analisados em background; consulte GET /upload/{session_id}/topics.
+    """
+    return {
+        "session_id": session_id,
+        "filename": filename,
+        "content_hash": result['content_hash'],
+        "analysis": result['validation'],
+        "topics": None,
+        "topics_status": "pending",
+        "preview": result['preview']
+    }
+
+
+async def analyze_topics_in_background(bind: AsyncEngine, session_id: int, text: str) -> None:
+    """Analisa os tópicos após a resposta do upload e guarda o resultado na sessão"""
+    try:
+        # Análise é CPU-bound: roda no pool de threads, fora do event loop
+        topics = await run_in_threadpool(question_service.analyze_topics, text)
+    except Exception as e:
+        logger.warning("topic_analysis_failed", session_id=session_id, error=str(e))
+        topics = []
+    
+    async with AsyncSession(bind=bind) as db:
+        await db.execute(
+            update(GenerationSession)
+            .where(GenerationSession.id == session_id)
+            .values(topics=topics)
+        )
+        await db.commit()
+    
+    logger.info("topic_analysis_completed", session_id=session_id, topics=len(topics))
+
+
+def spool_to_upload_dir(source, extension: str) -> str:
+    """Copia um stream para um arquivo temporário de nome único no diretório de upload"""
+    temp_path = os.path.join(settings.upload_dir, f"{uuid.uuid4().hex}.{extension}")
+    with open(temp_path, "wb") as buffer:
+        shutil.copyfileobj(source, buffer)
+    return temp_path
+
+
+def expand_batch_files(files: List[UploadFile]) -> List[Tuple[str, str]]:
+    """
+    Valida os arquivos do lote e os grava no diretório de upload,
+    expandindo arquivos .zip em seus documentos suportados.
+    
+    Returns:
+        Lista de (nome_original, caminho_temporario)
+    """
+    spooled: List[Tuple[str, str]] = []
+    total_size = 0
+    
+    def reserve(name: str, size: int) -> None:
+        """Confere os limites do lote antes de gravar mais um arquivo em disco"""
+        nonlocal total_size
+        if len(spooled) >= settings.upload_batch_max_files:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo de {settings.upload_batch_max_files} arquivos por lote"
+            )
+        if size > settings.max_file_size_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Arquivo muito grande: {name}. Máximo: {settings.max_file_size_mb}MB"
+            )
+        total_size += size
+        if total_size > settings.upload_batch_max_total_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Lote muito grande. Máximo: {settings.upload_batch_max_total_mb}MB descompactados"
+            )
+    
+    try:
+        for file in files:
+            size = validate_file(file, extra_extensions=('zip',))
+            extension = get_file_extension(file.filename)
+            
+            if extension != 'zip':
+                reserve(file.filename, size)
+                spooled.append((file.filename, spool_to_upload_dir(file.file, extension)))
+                continue
+            
+            try:
+                archive = zipfile.ZipFile(file.file)
+            except zipfile.BadZipFile:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Arquivo zip inválido: {file.filename}"
+                )
+            
+            with archive:
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    member_ext = get_file_extension(name)
+                    if member.is_dir() or name.startswith('.') or '__MACOSX' in member.filename:
+                        continue
+                    if member_ext not in settings.allowed_extensions_list:
+                        continue
+                    # Tamanho descompactado declarado no zip; a leitura do membro nunca passa dele
+                    reserve(name, member.file_size)
+                    with archive.open(member) as source:
+                        spooled.append((name, spool_to_upload_dir(source, member_ext)))
+        
+        if not spooled:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nenhum arquivo suportado no lote"
+            )
+    except Exception:
+        for _, temp_path in spooled:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+    
+    return spooled
+
+
+def process_batch_item(temp_path: str) -> dict:
+    """Extrai e valida um arquivo do lote (executado no pool de workers)"""
+    try:
+        return question_service.process_file(temp_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
 @router.post("/file", response_model=dict)
 async def upload_file(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Faz upload de um arquivo e extrai seu conteúdo
     
     Retorna análise do conteúdo e ID da sessão para geração
     """
-    ensure_upload_dir()
-    validate_file(file)
-    
-    # Gera nome único para o arquivo
-    file_hash = hashlib.md5(f"{current_user.id}_{file.filename}".encode()).hexdigest()[:12]
-    extension = get_file_extension(file.filename)
-    temp_filename = f"{file_hash}.{extension}"
-    temp_path = os.path.join(settings.upload_dir, temp_filename)
+    size = validate_file(file)
+    temp_path = None
     
     try:
-        # Salva arquivo temporariamente
-        with open(temp_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Processa arquivo
-        result = question_service.process_file(temp_path)
+        if size <= settings.in_memory_upload_max_bytes:
+            # Arquivo pequeno: extrai dos bytes lidos, sem cópia para o diretório de upload
+            await file.seek(0)
+            result = question_service.process_file(await file.read(), file.filename)
+        else:
+            # Salva arquivo temporariamente
+            ensure_upload_dir()
+            temp_path = spool_to_upload_dir(file.file, get_file_extension(file.filename))
+            
+            # Processa arquivo
+            result = question_service.process_file(temp_path)
         
         # Cria sessão de geração
-        session = GenerationSession(
-            user_id=current_user.id,
-            source_filename=file.filename,
-            source_file_hash=result['content_hash'],
-            content_preview=result['preview'],
-            word_count=result['validation']['word_count'],
-            status="pending"
-        )
+        session = session_from_result(current_user.id, file.filename, result)
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
         
-        # Analisa tópicos
-        topics = question_service.analyze_topics(result['text'])
+        # Analisa tópicos depois de responder
+        background_tasks.add_task(analyze_topics_in_background, db.bind, session.id, result['text'])
         
         return {
             "status": "success",
-            "data": {
-                "session_id": session.id,
-                "filename": file.filename,
-                "content_hash": result['content_hash'],
-                "analysis": result['validation'],
-                "topics": topics,
-                "preview": result['preview']
-            }
+            "data": build_upload_data(session.id, file.filename, result)
         }
-        
+    
+    except NoTextLayerError as e:
+        # PDF digitalizado: rejeita cedo, sem análise de layout página a página
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.to_dict()
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -114,58 +274,435 @@ async def upload_file(
         )
     finally:
         # Remove arquivo temporário
-        if os.path.exists(temp_path):
+        if temp_path and os.path.exists(temp_path):
             os.remove(temp_path)
 
 
+@router.post("/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Faz upload de vários arquivos (ou de arquivos .zip) de uma vez
+    
+    Os arquivos são extraídos e analisados em paralelo. A resposta é um
+    stream NDJSON com um evento por arquivo concluído e um evento final
+    com as sessões criadas (todas na mesma transação).
+    """
+    ensure_upload_dir()
+    # Descompactar e gravar em disco é bloqueante: roda fora do event loop
+    batch = await run_in_threadpool(expand_batch_files, files)
+    user_id = current_user.id
+    background_tasks = BackgroundTasks()
+    
+    async def progress_events():
+        results = []
+        total = len(batch)
+        
+        yield json.dumps({"event": "started", "total": total}) + "\n"
+        
+        futures = {
+            asyncio.wrap_future(batch_executor.submit(process_batch_item, temp_path)): (index, filename)
+            for index, (filename, temp_path) in enumerate(batch)
+        }
+        
+        pending = set(futures)
+        done = 0
+        while pending:
+            # Aguarda os workers sem bloquear o event loop
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            
+            for future in finished:
+                done += 1
+                index, filename = futures[future]
+                event = {"event": "file", "index": index, "filename": filename, "completed": done, "total": total}
+                
+                try:
+                    result = future.result()
+                except NoTextLayerError as e:
+                    event.update(status="needs_ocr", error=e.to_dict())
+                except Exception as e:
+                    logger.warning("batch_item_failed", filename=filename, error=str(e))
+                    event.update(status="error", error=f"Erro ao processar arquivo: {str(e)}")
+                else:
+                    results.append((index, filename, result))
+                    event.update(status="processed", word_count=result['validation']['word_count'])
+                
+                yield json.dumps(event) + "\n"
+        
+        # Cria todas as sessões em uma única transação, na ordem de envio
+        results.sort(key=lambda item: item[0])
+        sessions = [session_from_result(user_id, filename, result) for _, filename, result in results]
+        
+        try:
+            db.add_all(sessions)
+            await db.flush()
+            session_ids = [session.id for session in sessions]
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error("batch_sessions_failed", error=str(e))
+            yield json.dumps({"event": "failed", "error": "Erro ao criar sessões do lote"}) + "\n"
+            return
+        
+        # Tópicos de cada sessão são analisados depois do fim do stream
+        for session_id, (_, _, result) in zip(session_ids, results):
+            background_tasks.add_task(analyze_topics_in_background, db.bind, session_id, result['text'])
+        
+        yield json.dumps({
+            "event": "completed",
+            "processed": len(results),
+            "failed": total - len(results),
+            "sessions": [
+                build_upload_data(session_id, filename, result)
+                for session_id, (_, filename, result) in zip(session_ids, results)
+            ]
+        }) + "\n"
+    
+    return StreamingResponse(
+        progress_events(),
+        media_type="application/x-ndjson",
+        background=background_tasks
+    )
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """Interpreta 'bytes início-fim/total' e retorna (início, fim, total)"""
+    try:
+        unit, _, spec = (header or '').partition(' ')
+        byte_range, _, total = spec.partition('/')
+        start, _, end = byte_range.partition('-')
+        start, end, total = int(start), int(end), int(total)
+        if unit != 'bytes' or start < 0 or end < start or end >= total:
+            raise ValueError(header)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cabeçalho Content-Range inválido. Formato: bytes início-fim/total"
+        )
+    return start, end, total
+
+
+def get_resumable_upload_or_404(upload_id: str, user_id: int):
+    """Carrega um upload retomável do usuário ou responde 404"""
+    try:
+        return resumable_store.get(upload_id, user_id)
+    except UploadNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Upload não encontrado"
+        )
+
+
+@router.post("/resumable", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_resumable_upload(
+    data: ResumableUploadCreate,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Inicia um upload retomável
+    
+    Nome e tamanho são validados antes de qualquer byte do arquivo ser enviado.
+    As partes são enviadas com PUT /upload/resumable/{upload_id}.
+    """
+    validate_upload(data.filename, data.size)
+    upload = resumable_store.create(current_user.id, data.filename, data.size, data.checksum)
+    
+    return {
+        "status": "success",
+        "data": {
+            "upload_id": upload.upload_id,
+            "filename": upload.filename,
+            "size": upload.size,
+            "offset": 0
+        }
+    }
+
+
+@router.get("/resumable/{upload_id}", response_model=dict)
+async def get_resumable_upload_status(
+    upload_id: str,
+    response: Response,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Retorna quantos bytes do upload já foram recebidos
+    
+    O cliente retoma o envio a partir de `offset` após uma falha de conexão.
+    """
+    upload = get_resumable_upload_or_404(upload_id, current_user.id)
+    offset = resumable_store.offset(upload)
+    response.headers["Upload-Offset"] = str(offset)
+    
+    return {
+        "status": "success",
+        "data": {
+            "upload_id": upload.upload_id,
+            "filename": upload.filename,
+            "size": upload.size,
+            "offset": offset,
+            "complete": offset == upload.size
+        }
+    }
+
+
+@router.put("/resumable/{upload_id}", response_model=dict)
+async def upload_resumable_chunk(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    content_range: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Recebe uma parte do arquivo (cabeçalho Content-Range: bytes início-fim/total)
+    
+    O corpo deve ter exatamente fim - início + 1 bytes e é gravado direto no
+    arquivo de destino, sem buffer em memória.
+    """
+    upload = get_resumable_upload_or_404(upload_id, current_user.id)
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+    
+    if total != upload.size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tamanho total diverge do declarado ({upload.size} bytes)"
+        )
+    
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length != str(length):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corpo da parte deve ter {length} bytes, conforme o Content-Range"
+        )
+    
+    try:
+        offset = await resumable_store.append(upload, start, length, request.stream())
+    except UploadLengthMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Corpo da parte deve ter {e.expected} bytes, conforme o Content-Range"
+        )
+    except UploadOffsetMismatch as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": "Parte fora de ordem", "offset": e.expected},
+            headers={"Upload-Offset": str(e.expected)}
+        )
+    except UploadSizeExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Parte ultrapassa o tamanho declarado do arquivo"
+        )
+    
+    response.headers["Upload-Offset"] = str(offset)
+    
+    return {
+        "status": "success",
+        "data": {
+            "upload_id": upload.upload_id,
+            "offset": offset,
+            "complete": offset == upload.size
+        }
+    }
+
+
+@router.post("/resumable/{upload_id}/complete", response_model=dict)
+async def complete_resumable_upload(
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Finaliza um upload retomável e processa o arquivo montado
+    
+    Retorna a mesma análise de /upload/file, mais o sha256 do arquivo.
+    """
+    upload = get_resumable_upload_or_404(upload_id, current_user.id)
+    
+    try:
+        file_path, file_hash = await resumable_store.finalize(upload)
+    except UploadIncomplete as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incompleto: {str(e)}"
+        )
+    
+    try:
+        if upload.checksum and upload.checksum != file_hash:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Checksum do arquivo não confere com o declarado"
+            )
+        
+        # Extrai direto do arquivo montado, sem cópia adicional (fora do event loop)
+        result = await run_in_threadpool(question_service.process_file, file_path)
+        
+        session = session_from_result(current_user.id, upload.filename, result)
+        db.add(session)
+        await db.commit()
+        
+        background_tasks.add_task(analyze_topics_in_background, db.bind, session.id, result['text'])
+        
+        data = build_upload_data(session.id, upload.filename, result)
+        data["file_hash"] = file_hash
+        
+        return {"status": "success", "data": data}
+    
+    except HTTPException:
+        raise
+    except NoTextLayerError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=e.to_dict()
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao processar arquivo: {str(e)}"
+        )
+    finally:
+        resumable_store.discard(upload.upload_id)
+
+
+async def read_text_body(request: Request) -> Tuple[str, Optional[str]]:
+    """
+    Lê o texto do corpo da requisição (text/plain ou JSON {"content": ...})
+    
+    O corpo é consumido em streaming com o mesmo limite de tamanho e hash
+    incremental dos uploads de arquivo.
+    
+    Returns:
+        (texto, sha256 hex do texto quando já calculado no streaming)
+    """
+    media_type, _, params = request.headers.get("content-type", "").partition(";")
+    media_type = media_type.strip().lower()
+    if media_type not in ("text/plain", "application/json"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Envie o texto como text/plain ou JSON {\"content\": \"...\"}"
+        )
+    
+    declared_size = request.headers.get("content-length", "")
+    if declared_size.isdigit():
+        validate_upload("texto.txt", int(declared_size))
+    
+    body = bytearray()
+    digest = hashlib.sha256()
+    try:
+        await consume_stream(request.stream(), settings.max_file_size_bytes, digest, body.extend)
+    except UploadSizeExceeded:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Texto muito grande. Máximo: {settings.max_file_size_mb}MB"
+        )
+    
+    if media_type == "application/json":
+        try:
+            content = json.loads(body).get("content")
+        except (ValueError, AttributeError):
+            content = None
+        if not isinstance(content, str):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="JSON deve conter o campo 'content' com o texto"
+            )
+        # O hash do corpo inclui a serialização JSON; recalcula sobre o texto
+        return content, None
+    
+    charset = "utf-8"
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "charset" and value:
+            charset = value.strip('"').lower()
+    
+    try:
+        content = body.decode(charset)
+    except UnicodeDecodeError:
+        # Bytes inválidos viram U+FFFD: o hash do corpo não é mais o do texto
+        return body.decode(charset, errors="replace"), None
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Charset não suportado: {charset}"
+        )
+    
+    return content, digest.hexdigest() if charset in ("utf-8", "utf8") else None
+
+
 @router.post("/text", response_model=dict)
 async def upload_text(
-    content: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Recebe texto diretamente (copy/paste)
     
+    O texto vai no corpo da requisição, como text/plain ou JSON {"content": "..."}.
     Retorna análise do conteúdo e ID da sessão para geração
     """
+    content, content_hash = await read_text_body(request)
+    
     if not content or not content.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Conteúdo não pode estar vazio"
         )
     
-    # Valida conteúdo
-    from app.services.ai import ContentValidator
-    validator = ContentValidator(min_words=settings.min_content_words)
-    validation = validator.validate(content)
-    
-    # Gera hash do conteúdo
-    content_hash = hashlib.sha256(content.encode()).hexdigest()[:16]
+    # Valida conteúdo e gera hash/preview pelo mesmo caminho dos arquivos
+    result = question_service.process_text(content, content_hash)
     
     # Cria sessão
-    session = GenerationSession(
-        user_id=current_user.id,
-        source_filename="texto_colado",
-        source_file_hash=content_hash,
-        content_preview=content[:500] + '...' if len(content) > 500 else content,
-        word_count=validation['word_count'],
-        status="pending"
-    )
+    session = session_from_result(current_user.id, "texto_colado", result)
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
     
-    # Analisa tópicos
-    topics = question_service.analyze_topics(content)
+    # Analisa tópicos depois de responder
+    background_tasks.add_task(analyze_topics_in_background, db.bind, session.id, content)
     
     return {
         "status": "success",
-        "data": {
-            "session_id": session.id,
-            "content_hash": content_hash,
-            "analysis": validation,
-            "topics": topics,
-            "preview": content[:500] + '...' if len(content) > 500 else content
+        "data": build_upload_data(session.id, "texto_colado", result)
+    }
+
+
+@router.get("/{session_id}/topics", response_model=dict)
+async def get_session_topics(
+    session_id: int,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retorna os tópicos analisados de uma sessão
+    
+    Responde 202 enquanto a análise em background ainda não terminou.
+    """
+    session = await db.scalar(select(GenerationSession).where(
+        GenerationSession.id == session_id,
+        GenerationSession.user_id == current_user.id
+    ))
+    
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sessão não encontrada"
+        )
+    
+    if session.topics is None:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return {
+            "status": "pending",
+            "data": {"session_id": session.id, "topics": None}
         }
+    
+    return {
+        "status": "success",
+        "data": {"session_id": session.id, "topics": session.topics}
     }
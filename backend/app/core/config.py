@@ -28,6 +28,11 @@ class Settings(BaseSettings):
     # Redis (opcional)
     redis_url: str = "redis://localhost:6379/0"
     
+    # Cache do usuário autenticado (0 desliga); shared = camada extra no Redis (vários workers)
+    principal_cache_ttl_seconds: int = 30
+    principal_cache_max_entries: int = 10000
+    principal_cache_shared: bool = False
+    
     # AI Providers
     openai_api_key: Optional[str] = None
     google_api_key: Optional[str] = None
@@ -38,11 +43,35 @@ class Settings(BaseSettings):
     max_file_size_mb: int = 20
     allowed_extensions: str = "pdf,txt,docx"
     upload_dir: str = "/tmp/uploads"
+    in_memory_upload_max_bytes: int = 2 * 1024 * 1024  # Abaixo disso, extrai dos bytes lidos, sem cópia para upload_dir
+    upload_batch_max_files: int = 30
+    upload_batch_max_total_mb: int = 100  # Soma dos arquivos do lote, já descompactados
+    upload_batch_workers: int = 4  # Workers compartilhados por todos os lotes do processo
+    resumable_upload_ttl_hours: int = 24
     
     # Generation
     max_questions_per_request: int = 20
     min_content_words: int = 500
     generation_timeout_seconds: int = 120
+    document_analysis_cache_size: int = 16  # Documentos com tokens/parágrafos em cache
+    
+    # Vocabulários do classificador de dificuldade (um termo por linha; None = arquivos padrão)
+    technical_terms_path: Optional[str] = None
+    complex_connectors_path: Optional[str] = None
+    syllable_lexicon_path: Optional[str] = None  # Léxico pré-computado "palavra<TAB>sílabas", ordenado
+    syllable_cache_size: int = 50000
+    difficulty_model_path: Optional[str] = None  # Pesos .npz do modelo treinado (None = heurística)
+    
+    # Esquema: na inicialização só confere a revisão (migrações: python -m app.core.migrations)
+    schema_check_strict: bool = False  # True = não sobe com o banco desatualizado
+    
+    # Paginação (keyset): tamanho padrão e máximo de página
+    sessions_page_size: int = 10
+    sessions_page_size_max: int = 100
+    questions_page_size: int = 100
+    questions_page_size_max: int = 500
+    search_page_size: int = 20
+    search_page_size_max: int = 100
     
     # JWT
     jwt_secret_key: str = "jwt-secret-change-me"
@@ -67,6 +96,10 @@ class Settings(BaseSettings):
     @property
     def max_file_size_bytes(self) -> int:
         return self.max_file_size_mb * 1024 * 1024
+    
+    @property
+    def upload_batch_max_total_bytes(self) -> int:
+        return self.upload_batch_max_total_mb * 1024 * 1024
 
 
 @lru_cache()
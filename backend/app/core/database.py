@@ -2,10 +2,36 @@
 Configuração do banco de dados com SQLAlchemy
 """
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+# Drivers assíncronos por banco (a URL configurada continua a mesma do driver síncrono)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """Troca o driver da URL pelo equivalente assíncrono (asyncpg, aiosqlite)"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def pool_options(url: str) -> dict:
+    """Tamanho do pool; o aiosqlite usa NullPool e não aceita essas opções"""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {"pool_size": 10, "max_overflow": 20}
+
+
+# Engine síncrona: migrações, tarefas em background e scripts
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
@@ -15,6 +41,19 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona: rotas da API (não bloqueia o event loop durante as consultas)
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    pool_pre_ping=True,
+    **pool_options(settings.database_url)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 
@@ -25,3 +64,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency para injeção de sessão assíncrona do banco"""
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,168 @@
+"""
+Migrações do esquema do banco (Alembic)
+
+O esquema é aplicado por um comando à parte, antes de subir a API; a
+inicialização da aplicação só confere se o banco está na última revisão.
+
+Uso (a partir de backend/):
+    python -m app.core.migrations          # aplica as migrações pendentes
+    python -m app.core.migrations --check  # só verifica (código de saída 1 se desatualizado)
+"""
+import os
+import sys
+from functools import lru_cache
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Connection, Engine
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+MIGRATIONS_DIR = os.path.join(BACKEND_DIR, "migrations")
+
+# Revisões que um banco criado por create_all (antes das migrações) já contém
+BASELINE_REVISION = "0001_initial_schema"
+TOPICS_REVISION = "0002_session_topics"
+INDEXES_REVISION = "0003_hot_path_indexes"
+SEARCH_REVISION = "0004_question_search"
+
+
+class SchemaOutdatedError(RuntimeError):
+    """Banco fora da última revisão das migrações"""
+    
+    def __init__(self, current: Optional[str], head: str):
+        self.current = current
+        self.head = head
+        super().__init__(
+            f"Esquema do banco na revisão {current or 'nenhuma'}, esperado {head}. "
+            f"Execute: python -m app.core.migrations"
+        )
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Configuração do Alembic com caminhos absolutos (independe do diretório atual)"""
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+@lru_cache(maxsize=1)
+def head_revision() -> str:
+    """Última revisão do diretório de migrações (lida dos arquivos, sem banco)"""
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    """Revisão gravada em alembic_version (None se o banco nunca foi migrado)"""
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+def legacy_revision(connection: Connection) -> Optional[str]:
+    """
+    Revisão equivalente de um banco criado por create_all, sem alembic_version
+    
+    Returns:
+        None se o banco estiver vazio (as migrações criam tudo)
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table("users"):
+        return None
+    
+    columns = {column["name"] for column in inspector.get_columns("generation_sessions")}
+    if "topics" not in columns:
+        return BASELINE_REVISION
+    
+    indexes = {index["name"] for index in inspector.get_indexes("questions")}
+    if "ix_questions_session_id_id" not in indexes:
+        return TOPICS_REVISION
+    
+    question_columns = {column["name"] for column in inspector.get_columns("questions")}
+    if not inspector.has_table("questions_fts") and "search_vector" not in question_columns:
+        return INDEXES_REVISION
+    return SEARCH_REVISION
+
+
+def upgrade_database(url: Optional[str] = None) -> str:
+    """
+    Aplica as migrações pendentes e retorna a revisão final
+    
+    Bancos criados antes das migrações (por create_all) são marcados com a
+    revisão equivalente ao que já contêm, sem recriar tabelas.
+    """
+    engine = create_engine(url or settings.database_url)
+    config = alembic_config()
+    try:
+        with engine.begin() as connection:
+            config.attributes["connection"] = connection
+            if current_revision(connection) is None:
+                legacy = legacy_revision(connection)
+                if legacy:
+                    logger.info("database_schema_stamped", revision=legacy)
+                    command.stamp(config, legacy)
+            
+            command.upgrade(config, "head")
+            revision = current_revision(connection)
+    finally:
+        engine.dispose()
+    
+    logger.info("database_schema_upgraded", revision=revision)
+    return revision
+
+
+def check_schema_revision(engine: Engine, strict: bool = False) -> bool:
+    """
+    Confere se o banco está na última revisão (uma consulta a alembic_version)
+    
+    Args:
+        engine: Engine do banco
+        strict: Levanta SchemaOutdatedError em vez de só registrar um aviso
+    
+    Returns:
+        True se o esquema estiver atualizado
+    """
+    with engine.connect() as connection:
+        current = current_revision(connection)
+    
+    head = head_revision()
+    if current == head:
+        logger.info("database_schema_current", revision=current)
+        return True
+    
+    if strict:
+        raise SchemaOutdatedError(current, head)
+    logger.warning("database_schema_outdated", current=current, head=head)
+    return False
+
+
+def main() -> None:
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Aplica as migrações do esquema do banco")
+    parser.add_argument("--check", action="store_true", help="Só verifica se o banco está na última revisão")
+    args = parser.parse_args()
+    
+    if args.check:
+        engine = create_engine(settings.database_url)
+        try:
+            ok = check_schema_revision(engine)
+        finally:
+            engine.dispose()
+        sys.exit(0 if ok else 1)
+    
+    revision = upgrade_database()
+    print(f"Esquema na revisão {revision}")
+
+
+if __name__ == "__main__":
+    main()
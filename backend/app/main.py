@@ -8,8 +8,9 @@ from contextlib import asynccontextmanager
 import structlog
 
 from app.core.config import settings
-from app.core.database import engine, Base
-from app.api.routes import auth, upload, generation, export
+from app.core.database import engine, async_engine
+from app.core.migrations import check_schema_revision
+from app.api.routes import auth, upload, generation, export, search
 
 # Configura logging estruturado
 structlog.configure(
@@ -48,14 +49,14 @@ async def lifespan(app: FastAPI):
         safe_url = db_url
     logger.info("database_connecting", url=safe_url)
     
-    # Cria tabelas do banco de dados
-    Base.metadata.create_all(bind=engine)
-    logger.info("database_tables_created")
+    # Só confere a revisão do esquema; as migrações rodam à parte
+    check_schema_revision(engine, strict=settings.schema_check_strict)
     
     yield
     
     # Shutdown
     logger.info("application_shutting_down")
+    await async_engine.dispose()
 
 
 # Cria aplicação FastAPI
@@ -100,6 +101,7 @@ app.include_router(auth.router, prefix="/api/v1")
 app.include_router(upload.router, prefix="/api/v1")
 app.include_router(generation.router, prefix="/api/v1")
 app.include_router(export.router, prefix="/api/v1")
+app.include_router(search.router, prefix="/api/v1")
 
 
 @app.get("/")
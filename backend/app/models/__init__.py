@@ -1 +1,2 @@
 from app.models.models import User, GenerationSession, Question, QuestionEdit, DifficultyLevel, QuestionType
+from app.models import search  # registra o índice de busca textual de questions
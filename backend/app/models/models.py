@@ -2,7 +2,7 @@
 Modelos SQLAlchemy do sistema
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float, Boolean, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Float, Boolean, JSON, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import enum
@@ -48,6 +48,7 @@ class GenerationSession(Base):
     source_file_hash = Column(String(64))
     content_preview = Column(Text)  # Primeiros 500 caracteres
     word_count = Column(Integer)
+    topics = Column(JSON)  # Análise de tópicos feita em background (None = pendente)
     
     # Parâmetros de geração
     ai_provider = Column(String(50))
@@ -64,6 +65,11 @@ class GenerationSession(Base):
     # Relacionamentos
     user = relationship("User", back_populates="sessions")
     questions = relationship("Question", back_populates="session", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Listagem por usuário, mais recentes primeiro (paginação por created_at, id)
+        Index("ix_generation_sessions_user_created", user_id, created_at.desc(), id.desc()),
+    )
 
 
 class Question(Base):
@@ -105,6 +111,12 @@ class Question(Base):
     
     # Relacionamentos
     session = relationship("GenerationSession", back_populates="questions")
+    edits = relationship("QuestionEdit", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Questões de uma sessão em ordem de id (paginação e contagens)
+        Index("ix_questions_session_id_id", session_id, id),
+    )
 
 
 class QuestionEdit(Base):
@@ -119,3 +131,8 @@ class QuestionEdit(Base):
     new_value = Column(Text)
     
     edited_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # Histórico de uma questão em ordem cronológica
+        Index("ix_question_edits_question_edited", question_id, edited_at),
+    )
@@ -0,0 +1,95 @@
+"""
+Índice de busca textual das questões
+
+- PostgreSQL: coluna gerada `search_vector` (tsvector, configuração
+  portuguese) com índice GIN; o banco a mantém a cada INSERT/UPDATE.
+- SQLite (desenvolvimento e testes): tabela virtual FTS5 `questions_fts`
+  com conteúdo externo, sincronizada por triggers.
+
+Cobre enunciado, tópico, alternativas e justificativa. Os objetos são
+criados junto com a tabela questions (create_all) e pela migração
+0004_question_search.
+"""
+from sqlalchemy import DDL, event
+
+from app.models.models import Question
+
+SEARCH_VECTOR_COLUMN = "search_vector"
+SEARCH_VECTOR_INDEX = "ix_questions_search_vector"
+FTS_TABLE = "questions_fts"
+
+# Colunas indexadas no FTS5, na ordem dos pesos do bm25
+FTS_COLUMNS = ("content", "topic", "option_a", "option_b", "option_c", "option_d", "justification")
+
+POSTGRES_DDL = (
+    f"""
+    ALTER TABLE questions ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR_COLUMN} tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('portuguese'::regconfig, coalesce(content, '')), 'A') ||
+        setweight(to_tsvector('portuguese'::regconfig, coalesce(topic, '')), 'B') ||
+        setweight(to_tsvector('portuguese'::regconfig,
+            coalesce(option_a, '') || ' ' || coalesce(option_b, '') || ' ' ||
+            coalesce(option_c, '') || ' ' || coalesce(option_d, '')), 'C') ||
+        setweight(to_tsvector('portuguese'::regconfig, coalesce(justification, '')), 'D')
+    ) STORED
+    """,
+    f"CREATE INDEX IF NOT EXISTS {SEARCH_VECTOR_INDEX} ON questions USING GIN ({SEARCH_VECTOR_COLUMN})",
+)
+
+_columns = ", ".join(FTS_COLUMNS)
+_new_values = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+_old_values = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+
+SQLITE_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        {_columns}, content='questions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON questions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON questions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_columns} ON questions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {FTS_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END
+    """,
+)
+
+
+def include_name(name, type_, parent_names) -> bool:
+    """
+    Filtro do autogenerate do Alembic: ignora os objetos de busca
+    
+    Eles não são mapeados nos modelos (coluna gerada, tabelas FTS5 e suas
+    tabelas-sombra), então não devem aparecer como diferenças.
+    """
+    if type_ == "table":
+        return not name.startswith(FTS_TABLE)
+    if type_ == "column":
+        return name != SEARCH_VECTOR_COLUMN
+    if type_ == "index":
+        return name != SEARCH_VECTOR_INDEX
+    return True
+
+
+for _statement in POSTGRES_DDL:
+    event.listen(Question.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+
+for _statement in SQLITE_DDL:
+    event.listen(Question.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+
+event.listen(
+    Question.__table__,
+    "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite")
+)
@@ -1,8 +1,9 @@
 from app.schemas.schemas import (
     UserBase, UserCreate, UserLogin, UserResponse, Token, TokenData,
     QuestionBase, QuestionCreate, QuestionUpdate, QuestionResponse,
+    BulkQuestionAction, QuestionBulkOperation,
     GenerationParams, GenerationSessionResponse, GenerationSessionList,
-    ContentAnalysis, TopicSegment,
+    ContentAnalysis, TopicSegment, ResumableUploadCreate,
     APIResponse, ErrorResponse, ExportOptions,
     DifficultyLevel, QuestionType
 )
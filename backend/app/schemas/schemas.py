@@ -1,7 +1,7 @@
 """
 Schemas Pydantic para validação de dados
 """
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -88,6 +88,30 @@ class QuestionUpdate(BaseModel):
     is_approved: Optional[bool] = None
 
 
+class BulkQuestionAction(str, Enum):
+    APPROVE = "approve"
+    REJECT = "reject"
+    DELETE = "delete"
+    SET_DIFFICULTY = "set_difficulty"
+    SET_TOPIC = "set_topic"
+
+
+class QuestionBulkOperation(BaseModel):
+    """Mesma operação aplicada a várias questões de uma vez"""
+    question_ids: List[int] = Field(..., min_length=1, max_length=500)
+    action: BulkQuestionAction
+    difficulty: Optional[DifficultyLevel] = None  # Obrigatório em set_difficulty
+    topic: Optional[str] = Field(default=None, max_length=255)  # Obrigatório em set_topic
+    
+    @model_validator(mode="after")
+    def check_action_value(self) -> "QuestionBulkOperation":
+        if self.action == BulkQuestionAction.SET_DIFFICULTY and self.difficulty is None:
+            raise ValueError("Informe difficulty para set_difficulty")
+        if self.action == BulkQuestionAction.SET_TOPIC and not self.topic:
+            raise ValueError("Informe topic para set_topic")
+        return self
+
+
 class QuestionResponse(QuestionBase):
     id: int
     session_id: int
@@ -164,6 +188,15 @@ class TopicSegment(BaseModel):
     relevance_score: float
 
 
+# ===== RESUMABLE UPLOAD =====
+
+class ResumableUploadCreate(BaseModel):
+    """Início de um upload retomável"""
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    checksum: Optional[str] = Field(default=None, pattern="^[0-9a-fA-F]{64}$")  # sha256
+
+
 # ===== API RESPONSES =====
 
 class APIResponse(BaseModel):
@@ -1,7 +1,8 @@
 # AI Services Module
-from app.services.ai.text_extractor import TextExtractor, ContentValidator
+from app.services.ai.text_extractor import TextExtractor, ContentValidator, NoTextLayerError
 from app.services.ai.topic_segmenter import TopicSegmenter, TopicSegment
-from app.services.ai.difficulty_classifier import DifficultyClassifier, DifficultyAnalysis
+from app.services.ai.difficulty_classifier import DifficultyClassifier, DifficultyAnalysis, ContextProfile
+from app.services.ai.difficulty_model import DifficultyModel
 from app.services.ai.base import (
     AIProvider, AIProviderFactory, GeneratedQuestion, 
     GenerationParameters, QuestionType, DifficultyLevel
@@ -9,9 +10,9 @@ from app.services.ai.base import (
 from app.services.ai.question_service import QuestionGenerationService, question_service
 
 __all__ = [
-    'TextExtractor', 'ContentValidator',
+    'TextExtractor', 'ContentValidator', 'NoTextLayerError',
     'TopicSegmenter', 'TopicSegment',
-    'DifficultyClassifier', 'DifficultyAnalysis',
+    'DifficultyClassifier', 'DifficultyAnalysis', 'ContextProfile', 'DifficultyModel',
     'AIProvider', 'AIProviderFactory', 'GeneratedQuestion',
     'GenerationParameters', 'QuestionType', 'DifficultyLevel',
     'QuestionGenerationService', 'question_service'
@@ -2,8 +2,8 @@
 Interface abstrata e Factory para provedores de IA
 """
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Any, Iterator, Optional, Sequence
+from dataclasses import dataclass, field
 from enum import Enum
 import structlog
 
@@ -22,7 +22,7 @@ class DifficultyLevel(str, Enum):
     DIFICIL = "dificil"
 
 
-@dataclass
+@dataclass(slots=True)
 class GeneratedQuestion:
     """Questão gerada pela IA"""
     question_type: QuestionType
@@ -35,6 +35,102 @@ class GeneratedQuestion:
     source_excerpt: str = ""
 
 
+@dataclass(slots=True)
+class QuestionBatch:
+    """
+    Lote de questões em formato colunar (listas paralelas, uma por campo)
+    
+    Flui do provedor ao classificador e ao INSERT sem conversões para dict:
+    as colunas já têm os nomes e tipos das colunas da tabela de questões.
+    """
+    question_type: List[QuestionType] = field(default_factory=list)
+    content: List[str] = field(default_factory=list)
+    option_a: List[Optional[str]] = field(default_factory=list)
+    option_b: List[Optional[str]] = field(default_factory=list)
+    option_c: List[Optional[str]] = field(default_factory=list)
+    option_d: List[Optional[str]] = field(default_factory=list)
+    correct_answer: List[str] = field(default_factory=list)
+    justification: List[str] = field(default_factory=list)
+    difficulty: List[DifficultyLevel] = field(default_factory=list)
+    topic: List[str] = field(default_factory=list)
+    source_excerpt: List[str] = field(default_factory=list)
+    quality_score: List[Optional[float]] = field(default_factory=list)
+    # Análise completa do classificador, quando houver (DifficultyAnalysis)
+    analyses: List[Any] = field(default_factory=list)
+    
+    # Colunas gravadas na tabela de questões
+    COLUMNS = (
+        'question_type', 'content', 'option_a', 'option_b', 'option_c', 'option_d',
+        'correct_answer', 'justification', 'difficulty', 'topic', 'source_excerpt',
+        'quality_score'
+    )
+    
+    @classmethod
+    def from_questions(cls, questions: Sequence[GeneratedQuestion]) -> "QuestionBatch":
+        """Transpõe as questões do provedor para colunas"""
+        batch = cls()
+        for q in questions:
+            options = q.options or {}
+            batch.question_type.append(q.question_type)
+            batch.content.append(q.content)
+            batch.option_a.append(options.get('A'))
+            batch.option_b.append(options.get('B'))
+            batch.option_c.append(options.get('C'))
+            batch.option_d.append(options.get('D'))
+            batch.correct_answer.append(q.correct_answer)
+            batch.justification.append(q.justification or '')
+            batch.difficulty.append(q.difficulty)
+            batch.topic.append(q.topic or '')
+            batch.source_excerpt.append(q.source_excerpt or '')
+            batch.quality_score.append(None)
+        return batch
+    
+    def __len__(self) -> int:
+        return len(self.content)
+    
+    def classification_texts(self) -> List[str]:
+        """Textos usados na classificação de dificuldade (enunciado + justificativa)"""
+        return [content + " " + justification for content, justification in zip(self.content, self.justification)]
+    
+    def set_analyses(self, analyses: Sequence[Any]) -> None:
+        """Anexa o resultado de DifficultyClassifier.classify_many (mesma ordem)"""
+        self.analyses = list(analyses)
+        self.quality_score = [analysis.score for analysis in self.analyses]
+    
+    def rows(self, **constants: Any) -> Iterator[Dict[str, Any]]:
+        """
+        Uma linha por questão, no formato aceito por insert(...).values()/executemany
+        
+        Args:
+            constants: colunas com o mesmo valor em todas as linhas (ex.: session_id)
+        """
+        columns = [getattr(self, name) for name in self.COLUMNS]
+        for values in zip(*columns):
+            row = dict(zip(self.COLUMNS, values))
+            row.update(constants)
+            yield row
+    
+    def question(self, index: int) -> GeneratedQuestion:
+        """Reconstrói uma questão individual do lote"""
+        options = {
+            letter: value
+            for letter, value in zip('ABCD', (
+                self.option_a[index], self.option_b[index], self.option_c[index], self.option_d[index]
+            ))
+            if value is not None
+        }
+        return GeneratedQuestion(
+            question_type=self.question_type[index],
+            content=self.content[index],
+            options=options or None,
+            correct_answer=self.correct_answer[index],
+            justification=self.justification[index],
+            difficulty=self.difficulty[index],
+            topic=self.topic[index],
+            source_excerpt=self.source_excerpt[index]
+        )
+
+
 @dataclass
 class GenerationParameters:
     """Parâmetros para geração de questões"""
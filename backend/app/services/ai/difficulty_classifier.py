@@ -3,14 +3,29 @@ Classificador de dificuldade de questões
 """
 import re
 import math
-from typing import Dict, List
-from dataclasses import dataclass
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from dataclasses import dataclass, field
+import numpy as np
 import structlog
 
+from app.core.config import settings
+from app.services.ai.document_analysis import DocumentAnalysis, analyze_document, content_hash
+from app.services.ai.difficulty_model import DifficultyModel, load_difficulty_model
+from app.services.ai.syllables import count_syllables
+from app.services.ai.term_matcher import (
+    DEFAULT_CONNECTORS_PATH,
+    DEFAULT_TECHNICAL_TERMS_PATH,
+    get_term_matcher,
+    load_vocabulary,
+)
+from app.services.ai.topic_segmenter import TopicSegmenter
+
 logger = structlog.get_logger()
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DifficultyAnalysis:
     """Resultado da análise de dificuldade"""
     level: str  # facil, medio, dificil
@@ -21,53 +36,172 @@ class DifficultyAnalysis:
     explanation: str
 
 
+@dataclass(slots=True)
+class ContextProfile:
+    """
+    Estatísticas do texto-fonte, calculadas uma vez e reutilizadas por todas as questões
+    
+    Servem de linha de base: a questão é avaliada pelo quanto vai além da
+    complexidade do próprio material.
+    """
+    word_count: int
+    technical_density: float  # ocorrências de termos técnicos por palavra
+    avg_sentence_length: float  # palavras por sentença
+    term_frequencies: Dict[str, int] = field(default_factory=dict)  # palavras de conteúdo
+    
+    def rarity(self, words: Iterable[str]) -> float:
+        """
+        Raridade média, no contexto, das palavras da questão que aparecem nele
+        
+        Palavras citadas uma única vez valem 1.0; termos centrais, repetidos
+        muitas vezes, valem perto de 0. Palavras ausentes do contexto são ignoradas.
+        """
+        total = 0.0
+        found = 0
+        for word in words:
+            frequency = self.term_frequencies.get(word)
+            if frequency:
+                total += 1 / frequency
+                found += 1
+        return total / found if found else 0.0
+
+
 class DifficultyClassifier:
     """
     Classificador de dificuldade usando análise híbrida:
     - Análise lexical (Flesch Reading Ease adaptado para português)
     - Complexidade conceitual
     - Nível vocabular
+    
+    Se houver um modelo treinado (DIFFICULTY_MODEL_PATH), ele decide o nível a
+    partir dos três scores e de n-gramas da questão; senão, valem os pesos e
+    limiares fixos abaixo. O modelo é treinado sem o documento de origem, então
+    com ele o contexto é ignorado e os scores são os mesmos do treino.
     """
     
-    # Palavras técnicas/acadêmicas comuns (aumentam dificuldade)
-    TECHNICAL_TERMS = {
-        'algoritmo', 'paradigma', 'metodologia', 'epistemológico', 'heurística',
-        'ontologia', 'axioma', 'teorema', 'hipótese', 'correlação', 'causalidade',
-        'inferência', 'dedução', 'indução', 'abstração', 'concretização',
-        'framework', 'arquitetura', 'implementação', 'instância', 'herança',
-        'polimorfismo', 'encapsulamento', 'recursividade', 'complexidade'
-    }
+    # Vocabulários padrão (um termo por linha em app/services/ai/data)
+    # Termos técnicos/acadêmicos aumentam a dificuldade; conectivos indicam raciocínio complexo
+    TECHNICAL_TERMS = frozenset(load_vocabulary(DEFAULT_TECHNICAL_TERMS_PATH))
+    COMPLEX_CONNECTORS = frozenset(load_vocabulary(DEFAULT_CONNECTORS_PATH))
+    
+    # Padrões estruturais, compilados uma única vez
+    ENUMERATION_PATTERN = re.compile(r'(?:primeiro|segundo|terceiro|a\)|b\)|c\)|I\)|II\)|III\))', re.IGNORECASE)
+    COMPARISON_PATTERN = re.compile(r'(?:enquanto|diferente|semelhante|comparado|relação)')
+    
+    # Peso do alcance além do contexto no score conceitual (só quando há contexto)
+    CONTEXT_REACH_WEIGHT = 0.25
     
-    # Conectivos que indicam raciocínio complexo
-    COMPLEX_CONNECTORS = {
-        'portanto', 'consequentemente', 'ademais', 'outrossim', 'destarte',
-        'não obstante', 'todavia', 'entretanto', 'conquanto', 'porquanto',
-        'mormente', 'precipuamente', 'sobretudo', 'malgrado', 'consoante'
-    }
+    # Posição de cada nível na escala 0-1, para o score esperado do modelo treinado
+    LEVEL_POSITIONS = {'facil': 0.0, 'medio': 0.5, 'dificil': 1.0}
     
-    def __init__(self):
+    # Perfis de contexto guardados (só o perfil, por hash do texto; nunca o documento)
+    CONTEXT_PROFILE_CACHE_SIZE = 32
+    
+    def __init__(self, model: Optional[DifficultyModel] = None, use_model: bool = True):
         self.weights = {
             'lexical': 0.30,
             'concept': 0.50,
             'vocabulary': 0.20
         }
+        # Vocabulários podem ser trocados por arquivos próprios via configuração
+        self.term_matcher = get_term_matcher(
+            str(settings.technical_terms_path or DEFAULT_TECHNICAL_TERMS_PATH),
+            str(settings.complex_connectors_path or DEFAULT_CONNECTORS_PATH)
+        )
+        # Perfis de contexto por hash do texto: uma sessão reaproveita o mesmo perfil entre chamadas
+        self._profiles: "OrderedDict[str, ContextProfile]" = OrderedDict()
+        self._profiles_lock = threading.Lock()
+        self._model = model
+        self.use_model = use_model
+    
+    @property
+    def model(self) -> Optional[DifficultyModel]:
+        """Modelo treinado, carregado do disco só na primeira classificação"""
+        if not self.use_model:
+            return None
+        if self._model is None and settings.difficulty_model_path:
+            return load_difficulty_model(settings.difficulty_model_path)
+        return self._model
+    
+    def context_profile(self, context: Union[str, DocumentAnalysis]) -> ContextProfile:
+        """
+        Perfil do contexto, em cache LRU pelo hash do conteúdo
+        
+        O cache guarda só o ContextProfile; o texto e a DocumentAnalysis
+        ficam a cargo do cache de documentos (document_analysis_cache_size).
+        """
+        if isinstance(context, DocumentAnalysis):
+            digest = context.content_hash
+        else:
+            digest = content_hash(context)
+        
+        with self._profiles_lock:
+            profile = self._profiles.get(digest)
+            if profile is not None:
+                self._profiles.move_to_end(digest)
+                return profile
+        
+        analysis = context if isinstance(context, DocumentAnalysis) else analyze_document(context, digest)
+        profile = self.build_context_profile(analysis)
+        with self._profiles_lock:
+            self._profiles[digest] = profile
+            while len(self._profiles) > self.CONTEXT_PROFILE_CACHE_SIZE:
+                self._profiles.popitem(last=False)
+        return profile
+    
+    def build_context_profile(self, context: Union[str, DocumentAnalysis]) -> ContextProfile:
+        """Extrai as estatísticas de linha de base do contexto (texto ou análise já feita)"""
+        analysis = context if isinstance(context, DocumentAnalysis) else DocumentAnalysis(context)
+        words = analysis.words
+        sentences = analysis.sentence_count
+        technical, _ = self._count_terms(analysis.lower_text)
+        stopwords = TopicSegmenter.PORTUGUESE_STOPWORDS
+        
+        return ContextProfile(
+            word_count=len(words),
+            technical_density=technical / len(words) if words else 0.0,
+            avg_sentence_length=len(words) / sentences if sentences else 0.0,
+            term_frequencies=dict(Counter(w for w in words if w not in stopwords))
+        )
+    
+    def _resolve_profile(
+        self,
+        context: Union[str, DocumentAnalysis, ContextProfile, None]
+    ) -> Optional[ContextProfile]:
+        """Aceita o texto do contexto, sua análise ou um perfil já calculado"""
+        if isinstance(context, ContextProfile):
+            profile = context
+        elif isinstance(context, DocumentAnalysis):
+            profile = self.context_profile(context)
+        elif context and context.strip():
+            profile = self.context_profile(context)
+        else:
+            return None
+        return profile if profile.word_count else None
     
-    def classify(self, question_text: str, context: str = "") -> DifficultyAnalysis:
+    def classify(
+        self,
+        question_text: str,
+        context: Union[str, ContextProfile] = ""
+    ) -> DifficultyAnalysis:
         """
         Classifica a dificuldade de uma questão
         
         Args:
             question_text: Texto completo da questão
-            context: Contexto original (opcional, para análise conceitual)
-            
+            context: Contexto original ou seu ContextProfile (opcional, para análise conceitual)
+        
         Returns:
             DifficultyAnalysis com classificação e scores
         """
+        if self.model is not None:
+            return self.classify_many([question_text], context)[0]
+        
         # 1. Análise lexical (Flesch adaptado)
         lexical_score = self._calculate_lexical_score(question_text)
         
         # 2. Complexidade conceitual
-        concept_score = self._calculate_concept_score(question_text, context)
+        concept_score = self._calculate_concept_score(question_text, self._resolve_profile(context))
         
         # 3. Nível vocabular
         vocabulary_score = self._calculate_vocabulary_score(question_text)
@@ -92,6 +226,136 @@ class DifficultyClassifier:
             explanation=explanation
         )
     
+    def classify_many(
+        self,
+        texts: Sequence[str],
+        context: Union[str, ContextProfile] = ""
+    ) -> List[DifficultyAnalysis]:
+        """
+        Classifica um lote de questões de uma vez
+        
+        Cada texto é tokenizado uma única vez; as features são reunidas em
+        arrays NumPy e os scores calculados de forma vetorizada. O resultado é
+        idêntico a chamar classify() para cada texto.
+        
+        Args:
+            texts: Textos completos das questões
+            context: Contexto original ou seu ContextProfile (opcional, para análise conceitual)
+        """
+        n = len(texts)
+        if n == 0:
+            return []
+        
+        # O modelo treinado vê as features sem contexto, como em train_from_texts
+        model = self.model
+        profile = None if model is not None else self._resolve_profile(context)
+        
+        word_counts = np.zeros(n)
+        sentence_counts = np.zeros(n)
+        syllable_totals = np.zeros(n)
+        letter_totals = np.zeros(n)
+        unique_counts = np.zeros(n)
+        long_counts = np.zeros(n)
+        technical_counts = np.zeros(n)
+        connector_counts = np.zeros(n)
+        has_enumerate = np.zeros(n, dtype=bool)
+        has_comparison = np.zeros(n, dtype=bool)
+        is_long_text = np.zeros(n, dtype=bool)
+        rarity = np.zeros(n)
+        word_lists = []
+        
+        for i, text in enumerate(texts):
+            words = self._get_words(text)
+            word_lists.append(words)
+            text_lower = text.lower()
+            
+            syllables = 0
+            letters = 0
+            long_words = 0
+            for word in words:
+                syllables += count_syllables(word)
+                letters += len(word)
+                if len(word) > 10:
+                    long_words += 1
+            technical, connectors = self._count_terms(text_lower)
+            
+            word_counts[i] = len(words)
+            sentence_counts[i] = self._count_sentences(text)
+            syllable_totals[i] = syllables
+            letter_totals[i] = letters
+            unique_counts[i] = len(set(words))
+            long_counts[i] = long_words
+            technical_counts[i] = technical
+            connector_counts[i] = connectors
+            has_enumerate[i] = bool(self.ENUMERATION_PATTERN.search(text))
+            has_comparison[i] = bool(self.COMPARISON_PATTERN.search(text_lower))
+            is_long_text[i] = len(text) > 300
+            if profile is not None:
+                rarity[i] = profile.rarity(words)
+        
+        has_words = word_counts > 0
+        safe_words = np.where(has_words, word_counts, 1)
+        
+        # 1. Lexical (Flesch adaptado), mesma fórmula de _calculate_lexical_score
+        lexical_valid = has_words & (sentence_counts > 0)
+        avg_sentence_length = word_counts / np.where(sentence_counts > 0, sentence_counts, 1)
+        avg_syllables_per_word = syllable_totals / safe_words
+        flesch = 206.835 - (1.015 * avg_sentence_length) - (84.6 * avg_syllables_per_word)
+        lexical = np.where(lexical_valid, 1 - (np.clip(flesch, 0, 100) / 100), 0.5)
+        
+        # 2. Conceitual, mesma fórmula de _calculate_concept_score
+        technical_ratio = technical_counts / safe_words
+        connector_score = np.minimum(1.0, connector_counts / 3)
+        structure_score = np.zeros(n)
+        structure_score += np.where(has_enumerate, 0.3, 0.0)
+        structure_score += np.where(has_comparison, 0.3, 0.0)
+        structure_score += np.where(is_long_text, 0.2, 0.0)
+        concept = (technical_ratio * 2 + connector_score + structure_score) / 3
+        concept = np.minimum(1.0, concept)
+        if profile is not None:
+            technical_gap = np.minimum(1.0, np.maximum(0.0, technical_ratio - profile.technical_density) * 4)
+            if profile.avg_sentence_length:
+                length_gap = np.minimum(1.0, np.maximum(0.0, avg_sentence_length / profile.avg_sentence_length - 1))
+            else:
+                length_gap = np.zeros(n)
+            reach = (technical_gap + length_gap + rarity) / 3
+            concept = concept * (1 - self.CONTEXT_REACH_WEIGHT) + reach * self.CONTEXT_REACH_WEIGHT
+        concept = np.where(has_words, concept, 0.5)
+        
+        # 3. Vocabular, mesma fórmula de _calculate_vocabulary_score
+        length_score = np.minimum(1.0, (letter_totals / safe_words - 4) / 6)
+        diversity_score = unique_counts / safe_words
+        long_ratio = long_counts / safe_words
+        vocabulary = np.clip((length_score + diversity_score + long_ratio * 2) / 3, 0.0, 1.0)
+        vocabulary = np.where(has_words, vocabulary, 0.5)
+        
+        final = (
+            lexical * self.weights['lexical'] +
+            concept * self.weights['concept'] +
+            vocabulary * self.weights['vocabulary']
+        )
+        
+        if model is not None:
+            probs = model.predict_proba(np.column_stack([lexical, concept, vocabulary]), word_lists)
+            levels = model.classes[probs.argmax(axis=1)]
+            final = probs @ np.array([self.LEVEL_POSITIONS.get(c, 0.5) for c in model.classes])
+        else:
+            levels = [self._score_to_level(score) for score in final]
+        
+        results = []
+        for i in range(n):
+            level = str(levels[i])
+            results.append(DifficultyAnalysis(
+                level=level,
+                score=float(final[i]),
+                lexical_score=float(lexical[i]),
+                concept_score=float(concept[i]),
+                vocabulary_score=float(vocabulary[i]),
+                explanation=self._generate_explanation(level, lexical[i], concept[i], vocabulary[i])
+            ))
+        
+        return results
+    
     def _calculate_lexical_score(self, text: str) -> float:
         """
         Calcula score lexical baseado em Flesch Reading Ease adaptado para português
@@ -120,12 +384,15 @@ class DifficultyClassifier:
         
         return normalized
     
-    def _calculate_concept_score(self, text: str, context: str = "") -> float:
+    def _calculate_concept_score(self, text: str, profile: Optional[ContextProfile] = None) -> float:
         """
         Calcula complexidade conceitual baseada em:
         - Quantidade de conceitos técnicos
         - Conectivos de raciocínio complexo
         - Estrutura argumentativa
+        - Alcance além do contexto (se houver perfil): densidade técnica e
+          tamanho de sentença acima da linha de base, e raridade no texto-fonte
+          das palavras que a questão cobra
         """
         text_lower = text.lower()
         words = self._get_words(text)
@@ -134,17 +401,15 @@ class DifficultyClassifier:
         if word_count == 0:
             return 0.5
         
-        # Conta termos técnicos
-        technical_count = sum(1 for word in words if word.lower() in self.TECHNICAL_TERMS)
+        # Termos técnicos (ocorrências) e conectivos complexos (distintos) em uma varredura
+        technical_count, connector_count = self._count_terms(text_lower)
         technical_ratio = technical_count / word_count
         
-        # Conta conectivos complexos
-        connector_count = sum(1 for conn in self.COMPLEX_CONNECTORS if conn in text_lower)
         connector_score = min(1.0, connector_count / 3)  # Normaliza para máximo 3
         
         # Analisa estrutura (presença de múltiplas partes)
-        has_enumerate = bool(re.search(r'(?:primeiro|segundo|terceiro|a\)|b\)|c\)|I\)|II\)|III\))', text, re.IGNORECASE))
-        has_comparison = bool(re.search(r'(?:enquanto|diferente|semelhante|comparado|relação)', text_lower))
+        has_enumerate = bool(self.ENUMERATION_PATTERN.search(text))
+        has_comparison = bool(self.COMPARISON_PATTERN.search(text_lower))
         
         structure_score = 0.0
         if has_enumerate:
@@ -155,9 +420,35 @@ class DifficultyClassifier:
             structure_score += 0.2
         
         # Combina scores
-        concept_score = (technical_ratio * 2 + connector_score + structure_score) / 3
+        concept_score = min(1.0, (technical_ratio * 2 + connector_score + structure_score) / 3)
+        
+        if profile is not None:
+            sentences = self._count_sentences(text)
+            avg_sentence_length = word_count / (sentences if sentences > 0 else 1)
+            technical_gap = min(1.0, max(0.0, technical_ratio - profile.technical_density) * 4)
+            length_gap = 0.0
+            if profile.avg_sentence_length:
+                length_gap = min(1.0, max(0.0, avg_sentence_length / profile.avg_sentence_length - 1))
+            reach = (technical_gap + length_gap + profile.rarity(words)) / 3
+            concept_score = concept_score * (1 - self.CONTEXT_REACH_WEIGHT) + reach * self.CONTEXT_REACH_WEIGHT
+        
+        return concept_score
+    
+    def _count_terms(self, text_lower: str) -> Tuple[int, int]:
+        """
+        Conta termos técnicos e conectivos complexos com uma única varredura
         
-        return min(1.0, concept_score)
+        Returns:
+            (ocorrências de termos técnicos, quantidade de conectivos distintos)
+        """
+        technical = 0
+        connectors = set()
+        for term, category in self.term_matcher.finditer(text_lower):
+            if category == 'technical':
+                technical += 1
+            else:
+                connectors.add(term)
+        return technical, len(connectors)
     
     def _calculate_vocabulary_score(self, text: str) -> float:
         """
@@ -238,20 +529,5 @@ class DifficultyClassifier:
         return re.findall(r'\b[a-záàâãéèêíïóôõöúçñ]+\b', text.lower())
     
     def _count_syllables(self, word: str) -> int:
-        """
-        Conta sílabas em português (aproximação)
-        Regra simplificada: conta vogais, subtrai ditongos
-        """
-        word = word.lower()
-        vowels = 'aáàâãeéèêiíïoóôõuúü'
-        
-        count = 0
-        prev_is_vowel = False
-        
-        for char in word:
-            is_vowel = char in vowels
-            if is_vowel and not prev_is_vowel:
-                count += 1
-            prev_is_vowel = is_vowel
-        
-        return max(1, count)
+        """Conta sílabas em português (regras de ditongo/hiato, com cache e léxico opcional)"""
+        return count_syllables(word)
@@ -0,0 +1,245 @@
+"""
+Modelo aprendido de dificuldade (regressão logística multinomial)
+
+Features: os três scores do DifficultyClassifier (lexical, conceitual e
+vocabular), padronizados, mais unigramas e bigramas com hashing em um espaço
+de dimensão fixa. O treino usa scikit-learn com questões revisadas por
+professores; os pesos são salvos em um .npz compacto e a inferência é só
+NumPy (um produto escalar vetorizado para o lote inteiro).
+
+Treino (a partir de backend/):
+    python -m app.services.ai.difficulty_model --out modelo_dificuldade.npz
+"""
+import zlib
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+import structlog
+
+logger = structlog.get_logger()
+
+DENSE_FEATURES = ('lexical', 'concept', 'vocabulary')
+DEFAULT_HASH_DIM = 2 ** 12
+
+
+def hash_ngrams(
+    word_lists: Sequence[Sequence[str]],
+    hash_dim: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converte listas de palavras em contagens esparsas de uni/bigramas com hashing
+    
+    Usa CRC32 (estável entre processos, ao contrário de hash()). Cada linha é
+    normalizada pela norma L2.
+    
+    Returns:
+        (linhas, colunas, valores) no formato COO
+    """
+    rows, cols, vals = [], [], []
+    for row, words in enumerate(word_lists):
+        grams = list(words) + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        if not grams:
+            continue
+        indices = np.fromiter(
+            (zlib.crc32(gram.encode('utf-8')) % hash_dim for gram in grams),
+            dtype=np.int64,
+            count=len(grams)
+        )
+        unique, counts = np.unique(indices, return_counts=True)
+        rows.append(np.full(len(unique), row, dtype=np.int64))
+        cols.append(unique)
+        vals.append(counts / np.sqrt(np.dot(counts, counts)))
+    
+    if not rows:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, np.zeros(0)
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+
+class DifficultyModel:
+    """Pesos de uma regressão logística multinomial sobre features densas + n-gramas"""
+    
+    def __init__(
+        self,
+        classes: np.ndarray,
+        dense_coef: np.ndarray,
+        hashed_coef: np.ndarray,
+        intercept: np.ndarray,
+        mean: np.ndarray,
+        scale: np.ndarray
+    ):
+        self.classes = classes
+        self.dense_coef = dense_coef  # (classes, 3)
+        self.hashed_coef = hashed_coef  # (classes, hash_dim)
+        self.intercept = intercept
+        self.mean = mean
+        self.scale = scale
+    
+    @property
+    def hash_dim(self) -> int:
+        return self.hashed_coef.shape[1]
+    
+    def predict_proba(self, dense: np.ndarray, word_lists: Sequence[Sequence[str]]) -> np.ndarray:
+        """
+        Probabilidades por classe para um lote
+        
+        Args:
+            dense: matriz (n, 3) com os scores lexical, conceitual e vocabular
+            word_lists: palavras de cada questão (para os n-gramas)
+        """
+        logits = ((dense - self.mean) / self.scale) @ self.dense_coef.T + self.intercept
+        rows, cols, vals = hash_ngrams(word_lists, self.hash_dim)
+        if len(rows):
+            np.add.at(logits, rows, self.hashed_coef[:, cols].T * vals[:, None])
+        
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        return probs
+    
+    def save(self, path: str) -> None:
+        """Serializa em .npz comprimido (float32)"""
+        np.savez_compressed(
+            path,
+            classes=self.classes.astype(str),
+            dense_coef=self.dense_coef.astype(np.float32),
+            hashed_coef=self.hashed_coef.astype(np.float32),
+            intercept=self.intercept.astype(np.float32),
+            mean=self.mean.astype(np.float32),
+            scale=self.scale.astype(np.float32)
+        )
+    
+    @classmethod
+    def load(cls, path: str) -> "DifficultyModel":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{
+                key: data[key] if key == 'classes' else data[key].astype(np.float64)
+                for key in ('classes', 'dense_coef', 'hashed_coef', 'intercept', 'mean', 'scale')
+            })
+
+
+def train_difficulty_model(
+    dense: np.ndarray,
+    word_lists: Sequence[Sequence[str]],
+    labels: Sequence[str],
+    hash_dim: int = DEFAULT_HASH_DIM,
+    regularization: float = 1.0
+) -> DifficultyModel:
+    """
+    Treina o modelo com scikit-learn (dependência só do treino)
+    
+    Args:
+        dense: matriz (n, 3) com os scores do classificador
+        word_lists: palavras de cada questão
+        labels: dificuldade atribuída pelo professor (facil, medio, dificil)
+        regularization: C da regressão logística (menor = mais regularizado)
+    """
+    from scipy import sparse
+    from sklearn.linear_model import LogisticRegression
+    
+    labels = np.asarray(labels)
+    if len(np.unique(labels)) < 2:
+        raise ValueError("São necessárias questões de pelo menos dois níveis de dificuldade")
+    
+    mean = dense.mean(axis=0)
+    scale = dense.std(axis=0)
+    scale[scale == 0] = 1.0
+    
+    rows, cols, vals = hash_ngrams(word_lists, hash_dim)
+    hashed = sparse.csr_matrix((vals, (rows, cols)), shape=(len(labels), hash_dim))
+    features = sparse.hstack([sparse.csr_matrix((dense - mean) / scale), hashed], format='csr')
+    
+    clf = LogisticRegression(C=regularization, max_iter=1000)
+    clf.fit(features, labels)
+    
+    coef = clf.coef_
+    intercept = clf.intercept_
+    if len(clf.classes_) == 2:
+        # Caso binário: sklearn guarda só a classe positiva; expande para softmax
+        coef = np.vstack([-coef / 2, coef / 2])
+        intercept = np.array([-intercept[0] / 2, intercept[0] / 2])
+    
+    n_dense = len(DENSE_FEATURES)
+    return DifficultyModel(
+        classes=clf.classes_.astype(str),
+        dense_coef=coef[:, :n_dense],
+        hashed_coef=coef[:, n_dense:],
+        intercept=intercept,
+        mean=mean,
+        scale=scale
+    )
+
+
+@lru_cache(maxsize=4)
+def load_difficulty_model(path: str) -> Optional[DifficultyModel]:
+    """Carrega os pesos na primeira utilização; None se o arquivo não puder ser lido"""
+    try:
+        model = DifficultyModel.load(path)
+    except (OSError, KeyError, ValueError) as e:
+        logger.warning("difficulty_model_unavailable", path=path, error=str(e))
+        return None
+    logger.info("difficulty_model_loaded", path=path, classes=list(model.classes), hash_dim=model.hash_dim)
+    return model
+
+
+def load_training_examples(db) -> Tuple[List[str], List[str]]:
+    """
+    Questões revisadas por professores: editadas e não rejeitadas
+    
+    Toda alteração pela API (inclusive só aprovar) marca is_edited, e a
+    dificuldade gravada passa a ser a escolhida pelo professor.
+    
+    Returns:
+        (textos no formato classificado na geração, rótulos de dificuldade)
+    """
+    from app.models import Question
+    
+    questions = db.query(Question.content, Question.justification, Question.difficulty).filter(
+        Question.is_edited.is_(True),
+        Question.is_approved.is_(True)
+    ).all()
+    
+    texts = [content + " " + (justification or "") for content, justification, _ in questions]
+    labels = [difficulty.value for _, _, difficulty in questions]
+    return texts, labels
+
+
+def train_from_texts(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    hash_dim: int = DEFAULT_HASH_DIM,
+    regularization: float = 1.0
+) -> DifficultyModel:
+    """Extrai as features com o classificador heurístico e treina o modelo"""
+    from app.services.ai.difficulty_classifier import DifficultyClassifier
+    
+    classifier = DifficultyClassifier(use_model=False)
+    analyses = classifier.classify_many(texts)
+    dense = np.array([[a.lexical_score, a.concept_score, a.vocabulary_score] for a in analyses])
+    word_lists = [classifier._get_words(text) for text in texts]
+    return train_difficulty_model(dense, word_lists, labels, hash_dim, regularization)
+
+
+def main() -> None:
+    import argparse
+    from app.core.database import SessionLocal
+    
+    parser = argparse.ArgumentParser(description="Treina o modelo de dificuldade com questões revisadas")
+    parser.add_argument("--out", required=True, help="Arquivo .npz de saída")
+    parser.add_argument("--hash-dim", type=int, default=DEFAULT_HASH_DIM)
+    parser.add_argument("-C", "--regularization", type=float, default=1.0)
+    args = parser.parse_args()
+    
+    db = SessionLocal()
+    try:
+        texts, labels = load_training_examples(db)
+    finally:
+        db.close()
+    
+    model = train_from_texts(texts, labels, args.hash_dim, args.regularization)
+    model.save(args.out)
+    print(f"{len(texts)} questões, classes {list(model.classes)} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Análise compartilhada de um documento (tokens, sentenças e parágrafos)
+
+O texto é varrido uma única vez e as fronteiras ficam guardadas como arrays
+de offsets. Validação, segmentação de tópicos e classificação de dificuldade
+consomem a mesma análise, que fica em cache pelo hash do conteúdo.
+"""
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from typing import List, Optional
+import numpy as np
+
+from app.core.config import settings
+
+# Mesmas regras usadas antes em cada etapa
+TOKEN_PATTERN = re.compile(r'\S+')  # equivale a str.split()
+WORD_PATTERN = re.compile(r'\b[a-záàâãéèêíïóôõöúçñ]+\b')  # palavras (texto em minúsculas)
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+PARAGRAPH_SPLIT_PATTERN = re.compile(r'\n\s*\n')
+
+
+def content_hash(text: str) -> str:
+    """sha256 hex do texto (UTF-8)"""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _spans_between(text: str, separator: re.Pattern) -> np.ndarray:
+    """Trechos não vazios entre separadores, sem espaços nas pontas, como (início, fim)"""
+    spans = []
+    start = 0
+    for end, next_start in [(m.start(), m.end()) for m in separator.finditer(text)] + [(len(text), len(text))]:
+        piece = text[start:end]
+        stripped = piece.lstrip()
+        if stripped.strip():
+            piece_start = start + len(piece) - len(stripped)
+            spans.append((piece_start, piece_start + len(stripped.rstrip())))
+        start = next_start
+    return np.array(spans, dtype=np.int64).reshape(-1, 2)
+
+
+class DocumentAnalysis:
+    """
+    Fronteiras de tokens, sentenças e parágrafos de um texto imutável
+    
+    Tokens são os de str.split(); parágrafos são separados por linha em
+    branco; sentenças por . ! ?. Palavras normalizadas (minúsculas, só
+    letras) são extraídas sob demanda.
+    """
+    
+    def __init__(self, text: str, digest: Optional[str] = None):
+        self.text = text
+        self.content_hash = digest or content_hash(text)
+        
+        starts, ends = [], []
+        for match in TOKEN_PATTERN.finditer(text):
+            starts.append(match.start())
+            ends.append(match.end())
+        self.token_starts = np.array(starts, dtype=np.int64)
+        self.token_ends = np.array(ends, dtype=np.int64)
+        
+        self.paragraph_spans = _spans_between(text, PARAGRAPH_SPLIT_PATTERN)
+    
+    @property
+    def word_count(self) -> int:
+        """Quantidade de tokens (igual a len(text.split()))"""
+        return len(self.token_starts)
+    
+    def tokens(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Tokens de índice start a stop"""
+        return [
+            self.text[s:e]
+            for s, e in zip(self.token_starts[start:stop].tolist(), self.token_ends[start:stop].tolist())
+        ]
+    
+    def count_tokens(self, start: int, end: int) -> int:
+        """Tokens que começam no intervalo de offsets [start, end)"""
+        return int(np.searchsorted(self.token_starts, end) - np.searchsorted(self.token_starts, start))
+    
+    @cached_property
+    def paragraph_word_counts(self) -> np.ndarray:
+        spans = self.paragraph_spans
+        return np.searchsorted(self.token_starts, spans[:, 1]) - np.searchsorted(self.token_starts, spans[:, 0])
+    
+    @cached_property
+    def sentence_spans(self) -> np.ndarray:
+        return _spans_between(self.text, SENTENCE_SPLIT_PATTERN)
+    
+    @property
+    def sentence_count(self) -> int:
+        return len(self.sentence_spans)
+    
+    @cached_property
+    def lower_text(self) -> str:
+        return self.text.lower()
+    
+    @cached_property
+    def words(self) -> List[str]:
+        """Palavras em minúsculas, só letras (mesma regra do classificador de dificuldade)"""
+        return WORD_PATTERN.findall(self.lower_text)
+    
+    def paragraph(self, index: int) -> str:
+        start, end = self.paragraph_spans[index]
+        return self.text[start:end]
+
+
+class DocumentAnalysisCache:
+    """Cache LRU de análises por hash do conteúdo"""
+    
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, DocumentAnalysis]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, text: str, digest: Optional[str] = None) -> DocumentAnalysis:
+        """
+        Retorna a análise do texto, calculando-a só na primeira vez
+        
+        Args:
+            text: Conteúdo
+            digest: sha256 hex do conteúdo, se já conhecido (evita re-hashear)
+        """
+        digest = digest or content_hash(text)
+        with self._lock:
+            analysis = self._entries.get(digest)
+            if analysis is not None:
+                self._entries.move_to_end(digest)
+                return analysis
+        
+        analysis = DocumentAnalysis(text, digest)
+        with self._lock:
+            self._entries[digest] = analysis
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return analysis
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Instância singleton do cache
+document_cache = DocumentAnalysisCache(settings.document_analysis_cache_size)
+
+
+def analyze_document(text: str, digest: Optional[str] = None) -> DocumentAnalysis:
+    """Atalho para o cache compartilhado"""
+    return document_cache.get(text, digest)
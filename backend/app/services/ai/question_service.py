@@ -3,18 +3,17 @@ Serviço principal de geração de questões
 Orquestra todo o pipeline de geração
 """
 import time
-import hashlib
 from typing import List, Optional, Dict, Any
-from dataclasses import asdict
 import structlog
 
 from app.core.config import settings
 from app.services.ai.text_extractor import TextExtractor, ContentValidator
+from app.services.ai.document_analysis import analyze_document
 from app.services.ai.topic_segmenter import TopicSegmenter
 from app.services.ai.difficulty_classifier import DifficultyClassifier
 from app.services.ai.base import (
     AIProviderFactory, GenerationParameters, GeneratedQuestion,
-    QuestionType, DifficultyLevel
+    QuestionBatch, QuestionType, DifficultyLevel
 )
 # Importa providers para registrá-los na factory
 from app.services.ai import providers
@@ -39,23 +38,40 @@ class QuestionGenerationService:
         self.topic_segmenter = TopicSegmenter()
         self.difficulty_classifier = DifficultyClassifier()
     
-    def process_file(self, file_path: str) -> Dict[str, Any]:
+    def process_file(self, source, filename: Optional[str] = None) -> Dict[str, Any]:
         """
         Processa arquivo e extrai conteúdo
         
+        Args:
+            source: Caminho do arquivo ou buffer/stream em memória
+            filename: Nome original (necessário para buffers e streams)
+        
         Returns:
             Dict com texto extraído e análise de conteúdo
         """
-        logger.info("file_processing_started", file=file_path)
+        logger.info("file_processing_started", file=filename or str(source))
         
         # Extrai texto
-        text = self.text_extractor.extract(file_path)
+        text = self.text_extractor.extract(source, filename)
+        
+        return self.process_text(text)
+    
+    def process_text(self, text: str, content_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Valida um texto já extraído (ou colado) e monta a análise de conteúdo
+        
+        Args:
+            text: Conteúdo textual
+            content_hash: sha256 hex do texto, se já calculado incrementalmente
+        """
+        # Tokens, sentenças e parágrafos são calculados uma vez e reaproveitados
+        # pela segmentação de tópicos e pela geração (cache por hash do conteúdo)
+        analysis = analyze_document(text, content_hash)
         
         # Valida conteúdo
-        validation = self.content_validator.validate(text)
+        validation = self.content_validator.validate(analysis)
         
-        # Gera hash do conteúdo
-        content_hash = hashlib.sha256(text.encode()).hexdigest()[:16]
+        content_hash = analysis.content_hash[:16]
         
         return {
             'text': text,
@@ -71,14 +87,14 @@ class QuestionGenerationService:
         Returns:
             Lista de tópicos identificados com keywords
         """
-        segments = self.topic_segmenter.segment(text)
+        segments = self.topic_segmenter.segment(analyze_document(text))
         
         return [
             {
                 'topic': seg.topic,
                 'keywords': seg.keywords,
                 'relevance_score': seg.relevance_score,
-                'word_count': len(seg.content.split())
+                'word_count': seg.word_count
             }
             for seg in segments
         ]
@@ -98,7 +114,7 @@ class QuestionGenerationService:
             provider_name: Nome do provedor de IA (opcional, usa configuração padrão)
             
         Returns:
-            Dict com questões geradas e metadados
+            Dict com questões geradas (QuestionBatch colunar) e metadados
         """
         start_time = time.time()
         
@@ -113,12 +129,13 @@ class QuestionGenerationService:
         )
         
         # Segmenta conteúdo em tópicos
-        segments = self.topic_segmenter.segment(text)
+        analysis = analyze_document(text)
+        segments = self.topic_segmenter.segment(analysis)
         
         # Prepara contexto otimizado
         context_parts = []
         for seg in segments[:3]:  # Usa top 3 tópicos mais relevantes
-            context_parts.append(f"### {seg.topic}\n{seg.content[:2000]}")
+            context_parts.append(f"### {seg.topic}\n{seg.excerpt(2000)}")
         
         optimized_context = "\n\n".join(context_parts)
         
@@ -158,44 +175,41 @@ class QuestionGenerationService:
         # Gera questões
         generated = provider.generate_questions(optimized_context, parameters)
         
-        # Classifica dificuldade de cada questão (se não foi definida pela IA)
-        questions_with_difficulty = []
-        for question in generated:
-            # Reclassifica dificuldade se necessário
-            analysis = self.difficulty_classifier.classify(
-                question.content + " " + (question.justification or ""),
-                optimized_context
-            )
-            
-            # Converte para dict
-            q_dict = asdict(question)
-            q_dict['difficulty_analysis'] = asdict(analysis)
-            
+        # Questões seguem em colunas até o INSERT, sem conversão para dicts
+        batch = QuestionBatch.from_questions(generated)
+        
+        # Classifica dificuldade de todas as questões em lote, com o perfil do
+        # documento calculado uma vez (e reaproveitado em regenerações da sessão)
+        context_profile = self.difficulty_classifier.context_profile(analysis)
+        batch.set_analyses(self.difficulty_classifier.classify_many(
+            batch.classification_texts(),
+            context_profile
+        ))
+        
+        for requested, analysis_result in zip(batch.difficulty, batch.analyses):
             # Usa a dificuldade classificada se muito diferente da original
-            if question.difficulty.value != analysis.level:
+            if requested.value != analysis_result.level:
                 logger.debug(
                     "difficulty_reclassified",
-                    original=question.difficulty.value,
-                    new=analysis.level
+                    original=requested.value,
+                    new=analysis_result.level
                 )
-            
-            questions_with_difficulty.append(q_dict)
         
         processing_time = time.time() - start_time
         
         logger.info(
             "question_generation_completed",
-            generated=len(questions_with_difficulty),
+            generated=len(batch),
             processing_time=processing_time
         )
         
         return {
-            'questions': questions_with_difficulty,
+            'questions': batch,
             'metadata': {
                 'provider': provider_name,
                 'processing_time_seconds': round(processing_time, 2),
                 'topics_used': [seg.topic for seg in segments[:3]],
-                'total_generated': len(questions_with_difficulty),
+                'total_generated': len(batch),
                 'parameters': {
                     'num_questions': parameters.num_questions,
                     'question_types': [qt.value for qt in parameters.question_types],
@@ -211,7 +225,7 @@ class QuestionGenerationService:
         difficulty: DifficultyLevel,
         topic: str,
         provider_name: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[GeneratedQuestion]:
         """
         Regenera uma única questão com parâmetros específicos
         """
@@ -224,8 +238,8 @@ class QuestionGenerationService:
         
         result = self.generate_questions(text, params, provider_name)
         
-        if result['questions']:
-            return result['questions'][0]
+        if len(result['questions']):
+            return result['questions'].question(0)
         return None
 
 
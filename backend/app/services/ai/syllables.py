@@ -0,0 +1,180 @@
+"""
+Contagem de sílabas em português
+
+A contagem por regras trata ditongos, tritongos e hiatos; palavras já vistas
+ficam em um cache LRU limitado. Opcionalmente, um léxico pré-computado
+(arquivo ordenado "palavra<TAB>sílabas" por linha) é consultado antes das
+regras. O arquivo só é aberto na primeira consulta e é mapeado em memória,
+com busca binária direto nos bytes, sem carregar o léxico inteiro.
+"""
+import mmap
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+VOWELS = frozenset('aáàâãeéèêiíïoóôõöuúü')
+# Vogais que podem ser semivogais (formam ditongo decrescente após outra vogal)
+SEMIVOWELS = frozenset('iu')
+# Consoantes que, fechando a sílaba após i/u, provocam hiato (ra-iz, sa-ir, ru-im, Ra-ul)
+CLOSING_CONSONANTS = frozenset('lmnrz')
+
+
+def count_syllables_by_rules(word: str) -> int:
+    """
+    Conta sílabas de uma palavra aplicando regras de ditongo e hiato
+    
+    - Ditongo decrescente: vogal + i/u átono (pai, céu, muito), a + o átono
+      (ao, aos) e nasais (mão, mãe, põe)
+    - Hiato: duas vogais plenas (po-e-ta), i/u acentuado (sa-í-da), i/u seguido
+      de "nh" ou de l/m/n/r/z que fecha a sílaba (ra-i-nha, a-in-da, sa-ir, a-or-ta),
+      e a/u + i antes de "ç" (tra-i-ção, cons-ti-tu-i-ção)
+    - Vogal após i/u pleno inicia nova sílaba (his-tó-ri-a, su-a)
+    - u após q/g antes de vogal é semivogal (quan-do, a-guen-tar, U-ru-guai)
+    - Uma semivogal não forma ditongo com a vogal seguinte (sa-iu, i-dei-a)
+    """
+    word = word.lower()
+    count = 0
+    prev = ''          # vogal anterior dentro do mesmo grupo vocálico
+    prev_glide = False  # a vogal anterior já foi absorvida como semivogal
+    length = len(word)
+    
+    for i, char in enumerate(word):
+        if char not in VOWELS:
+            prev = ''
+            prev_glide = False
+            continue
+        
+        if not prev:
+            # u de "qu"/"gu" diante de vogal não é núcleo de sílaba
+            if (
+                char in 'uü' and i > 0 and word[i - 1] in 'qg'
+                and i + 1 < length and word[i + 1] in VOWELS
+            ):
+                continue
+            count += 1
+            prev = char
+            prev_glide = False
+            continue
+        
+        falling = False
+        if not prev_glide and prev != char:
+            after = word[i + 1:i + 3]
+            closes = (
+                after[:1] in CLOSING_CONSONANTS
+                and (len(after) < 2 or after[1] not in VOWELS)
+            )
+            if char in SEMIVOWELS:
+                # -uição/-aição: o i é tônico (in-tu-i-ção), ao contrário de fei-ção
+                stressed_i = char == 'i' and prev in 'au' and after[:1] == 'ç'
+                falling = not (after == 'nh' or closes or stressed_i)
+            elif prev == 'a' and char == 'o':
+                falling = not closes
+            elif prev in 'ãõ' and char in 'eo':
+                falling = True
+        
+        if falling:
+            prev_glide = True
+        else:
+            count += 1
+            prev_glide = False
+        prev = char
+    
+    return max(1, count)
+
+
+class SyllableLexicon:
+    """
+    Léxico de sílabas pré-computado, mapeado em memória sob demanda
+    
+    O arquivo tem uma entrada "palavra<TAB>sílabas" por linha, ordenado pelos
+    bytes UTF-8 da palavra (ver write_lexicon).
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+        self._failed = False
+    
+    def _mapped(self) -> Optional[mmap.mmap]:
+        if self._map is None and not self._failed:
+            with self._lock:
+                if self._map is None and not self._failed:
+                    try:
+                        with open(self.path, 'rb') as f:
+                            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                        logger.info("syllable_lexicon_mapped", path=self.path, bytes=len(self._map))
+                    except (OSError, ValueError) as e:
+                        # Arquivo ausente ou vazio: segue apenas com as regras
+                        self._failed = True
+                        logger.warning("syllable_lexicon_unavailable", path=self.path, error=str(e))
+        return self._map
+    
+    def get(self, word: str) -> Optional[int]:
+        """Busca binária da palavra no arquivo; None se ausente"""
+        data = self._mapped()
+        if data is None:
+            return None
+        
+        key = word.lower().encode('utf-8')
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b'\n', 0, mid) + 1
+            end = data.find(b'\n', start)
+            if end == -1:
+                end = len(data)
+            entry, _, value = data[start:end].partition(b'\t')
+            if entry == key:
+                try:
+                    return int(value)
+                except ValueError:
+                    return None
+            if entry < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+def write_lexicon(path: str, entries: Dict[str, int]) -> None:
+    """Grava um léxico no formato esperado por SyllableLexicon"""
+    lines = sorted(
+        (word.lower().encode('utf-8'), count) for word, count in entries.items() if word
+    )
+    with open(path, 'wb') as f:
+        for word, count in lines:
+            f.write(word + b'\t' + str(count).encode() + b'\n')
+
+
+def build_lexicon(path: str, words: Iterable[str]) -> int:
+    """Pré-computa as sílabas de uma lista de palavras; retorna o total de entradas"""
+    entries = {word.lower(): count_syllables_by_rules(word) for word in words if word}
+    write_lexicon(path, entries)
+    return len(entries)
+
+
+_lexicon: Optional[SyllableLexicon] = (
+    SyllableLexicon(settings.syllable_lexicon_path) if settings.syllable_lexicon_path else None
+)
+
+
+@lru_cache(maxsize=settings.syllable_cache_size)
+def count_syllables(word: str) -> int:
+    """Conta sílabas consultando o léxico (se configurado) e, na falta, as regras"""
+    if _lexicon is not None:
+        count = _lexicon.get(word)
+        if count is not None:
+            return count
+    return count_syllables_by_rules(word)
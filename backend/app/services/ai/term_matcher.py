@@ -0,0 +1,98 @@
+"""
+Casamento de múltiplos termos em uma única varredura do texto
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# Vocabulários padrão distribuídos com o serviço
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_TECHNICAL_TERMS_PATH = DATA_DIR / "technical_terms.txt"
+DEFAULT_CONNECTORS_PATH = DATA_DIR / "complex_connectors.txt"
+
+
+def normalize_term(term: str) -> str:
+    """Minúsculas e espaços colapsados, como os termos são comparados"""
+    return ' '.join(term.lower().split())
+
+
+def load_vocabulary(path) -> List[str]:
+    """Lê um vocabulário (um termo por linha, # para comentários)"""
+    terms = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            term = normalize_term(line.split('#', 1)[0])
+            if term:
+                terms.append(term)
+    return terms
+
+
+class TermMatcher:
+    """
+    Encontra todos os termos de vários vocabulários em uma passada
+    
+    Os termos são inseridos em uma trie de caracteres, que é convertida em
+    uma única expressão regular com prefixos fatorados. O custo da busca
+    depende do tamanho do texto e da profundidade da trie, não da
+    quantidade de termos. Os casamentos respeitam fronteiras de palavra e
+    aceitam qualquer espaço em branco entre as palavras de um termo.
+    """
+    
+    def __init__(self, vocabularies: Dict[str, Iterable[str]]):
+        self.categories: Dict[str, str] = {}
+        for category, terms in vocabularies.items():
+            for term in terms:
+                key = normalize_term(term)
+                if key:
+                    self.categories.setdefault(key, category)
+        
+        self._pattern: Optional[re.Pattern] = None
+        if self.categories:
+            trie: dict = {}
+            for term in self.categories:
+                node = trie
+                for char in term:
+                    node = node.setdefault(char, {})
+                node[''] = True
+            self._pattern = re.compile(r'(?<!\w)' + self._trie_to_regex(trie) + r'(?!\w)')
+        
+        logger.debug("term_matcher_built", terms=len(self.categories))
+    
+    @classmethod
+    def _trie_to_regex(cls, node: dict) -> str:
+        """Converte um nó da trie em regex; ramos terminais viram grupos opcionais"""
+        terminal = '' in node
+        branches = []
+        for char in sorted(key for key in node if key):
+            atom = r'\s+' if char == ' ' else re.escape(char)
+            branches.append(atom + cls._trie_to_regex(node[char]))
+        
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # Quantificador guloso: prefere o termo mais longo e recua se a fronteira falhar
+        return f'(?:{body})?' if terminal else body
+    
+    def finditer(self, text_lower: str) -> Iterator[Tuple[str, str]]:
+        """Itera (termo, categoria) dos casamentos em texto já em minúsculas"""
+        if self._pattern is None:
+            return
+        for match in self._pattern.finditer(text_lower):
+            term = ' '.join(match.group().split())
+            yield term, self.categories[term]
+    
+    def __len__(self) -> int:
+        return len(self.categories)
+
+
+@lru_cache(maxsize=8)
+def get_term_matcher(technical_terms_path: str, connectors_path: str) -> TermMatcher:
+    """Constrói (uma vez por combinação de arquivos) o matcher de termos técnicos e conectivos"""
+    return TermMatcher({
+        'technical': load_vocabulary(technical_terms_path),
+        'connector': load_vocabulary(connectors_path),
+    })
@@ -1,14 +1,128 @@
 """
 Extrator de texto de documentos PDF, DOCX e TXT
 """
+import io
 import re
-import chardet
+import zipfile
+from chardet.universaldetector import UniversalDetector
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Union
+from xml.etree import ElementTree
 import structlog
 
+from app.services.ai.document_analysis import DocumentAnalysis, analyze_document
+
 logger = structlog.get_logger()
 
+# Namespace WordprocessingML usado em word/document.xml
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+# Markup Compatibility: mc:Fallback repete o conteúdo de mc:Choice (ex.: caixas de texto em VML)
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+# Operadores que efetivamente desenham texto (Tj, TJ, ' e ") em content streams.
+# Blocos BT/ET vazios não contam: alguns geradores os emitem em toda página.
+PDF_TEXT_SHOW_OPS = re.compile(rb"\bT[jJ]\b|[)>\]]\s*['\"]")
+
+# Amostra máxima usada na detecção de encoding de TXT
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# Origens aceitas pelo extrator: caminho, buffer em memória ou stream binário
+Source = Union[str, Path, bytes, bytearray, memoryview, BinaryIO]
+
+
+class BufferReader(io.RawIOBase):
+    """Stream somente leitura sobre um buffer (ex.: memoryview), sem copiá-lo"""
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, target) -> int:
+        n = max(0, min(len(target), len(self._view) - self._pos))
+        target[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+class DocxBlock(NamedTuple):
+    """Bloco de texto de um DOCX, na ordem do documento"""
+    kind: str  # paragraph | heading | table_row
+    text: str
+    level: int = 0  # Nível do título (1-9), 0 para texto comum
+
+
+@dataclass
+class _DocxParagraph:
+    """Parágrafo aberto durante a leitura (caixas de texto aninham w:p dentro de w:p)"""
+    cell_depth: int  # Células abertas quando o parágrafo começou
+    runs: List[str] = field(default_factory=list)
+    level: int = 0
+    after_block: bool = False  # O último trecho foi uma caixa de texto
+    
+    def add_run(self, text: str) -> None:
+        if self.after_block and not text.startswith('\n'):
+            self.runs.append('\n')
+        self.after_block = False
+        self.runs.append(text)
+    
+    def add_block(self, text: str) -> None:
+        """Texto de caixa de texto ou tabela interna, em linha própria"""
+        if self.runs and not self.runs[-1].endswith('\n'):
+            self.runs.append('\n')
+        self.runs.append(text)
+        self.after_block = True
+
+
+@dataclass
+class PdfTextLayerScan:
+    """Resultado da varredura rápida da camada de texto de um PDF"""
+    total_pages: int
+    text_pages: List[int] = field(default_factory=list)
+    image_only_pages: List[int] = field(default_factory=list)
+    
+    @property
+    def needs_ocr(self) -> bool:
+        return not self.text_pages
+
+
+class NoTextLayerError(ValueError):
+    """PDF sem camada de texto (digitalizado/apenas imagens): requer OCR"""
+    
+    def __init__(self, scan: PdfTextLayerScan):
+        self.scan = scan
+        super().__init__(
+            "O PDF não possui camada de texto (documento digitalizado). "
+            "Aplique OCR ao arquivo antes de enviá-lo."
+        )
+    
+    def to_dict(self) -> dict:
+        return {
+            'code': 'no_text_layer',
+            'needs_ocr': True,
+            'message': str(self),
+            'total_pages': self.scan.total_pages,
+            'image_only_pages': [i + 1 for i in self.scan.image_only_pages]
+        }
+
 
 class TextExtractor:
     """Extrai e limpa texto de diferentes formatos de documento"""
@@ -16,17 +130,25 @@ class TextExtractor:
     def __init__(self):
         self.supported_formats = ['pdf', 'docx', 'txt']
     
-    def extract(self, file_path: str) -> str:
+    def extract(self, source: Source, filename: Optional[str] = None) -> str:
         """
         Extrai texto do arquivo baseado na extensão
+        
+        Args:
+            source: Caminho do arquivo, bytes/bytearray/memoryview ou stream binário
+            filename: Nome original (obrigatório quando source não é um caminho)
         """
-        path = Path(file_path)
-        extension = path.suffix.lower().replace('.', '')
+        is_path = isinstance(source, (str, Path))
+        name = str(source) if is_path else filename
+        if not name:
+            raise ValueError("Informe o nome do arquivo para extrair de um buffer")
+        
+        extension = Path(name).suffix.lower().replace('.', '')
         
         if extension not in self.supported_formats:
             raise ValueError(f"Formato não suportado: {extension}")
         
-        logger.info("text_extraction_started", file=file_path, format=extension)
+        logger.info("text_extraction_started", file=name, format=extension, in_memory=not is_path)
         
         extractors = {
             'pdf': self._extract_pdf,
@@ -34,26 +156,63 @@ class TextExtractor:
             'txt': self._extract_txt
         }
         
-        raw_text = extractors[extension](file_path)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            if extension == 'txt':
+                raw_text = self._extract_txt(source)
+            else:
+                with BufferReader(source) as stream:
+                    raw_text = extractors[extension](stream)
+        else:
+            raw_text = extractors[extension](source)
         cleaned_text = self._clean_text(raw_text)
         
         logger.info(
             "text_extraction_completed",
-            file=file_path,
+            file=name,
             raw_length=len(raw_text),
             cleaned_length=len(cleaned_text)
         )
         
         return cleaned_text
     
-    def _extract_pdf(self, file_path: str) -> str:
+    def extract_from_bytes(self, data: Union[bytes, bytearray, memoryview], filename: str) -> str:
+        """Extrai texto de um buffer em memória, sem arquivo temporário"""
+        return self.extract(data, filename)
+    
+    @staticmethod
+    def _rewind(source) -> None:
+        """Volta streams ao início entre leituras (caminhos são ignorados)"""
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    
+    def _extract_pdf(self, source: Source) -> str:
         """Extrai texto de PDF usando pdfplumber (melhor para layouts complexos)"""
+        pages = None
+        try:
+            self._rewind(source)
+            scan = self.scan_pdf_text_layer(source)
+        except Exception as e:
+            logger.warning("pdf_text_layer_scan_failed", error=str(e))
+        else:
+            if scan.needs_ocr:
+                logger.info("pdf_without_text_layer", pages=scan.total_pages)
+                raise NoTextLayerError(scan)
+            if scan.image_only_pages:
+                logger.info(
+                    "pdf_image_only_pages_skipped",
+                    skipped=len(scan.image_only_pages),
+                    total=scan.total_pages
+                )
+            pages = scan.text_pages
+        
         try:
             import pdfplumber
             
             text_parts = []
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
+            self._rewind(source)
+            with pdfplumber.open(source) as pdf:
+                selected = pdf.pages if pages is None else [pdf.pages[i] for i in pages]
+                for page in selected:
                     page_text = page.extract_text()
                     if page_text:
                         text_parts.append(page_text)
@@ -62,27 +221,77 @@ class TextExtractor:
         
         except Exception as e:
             logger.warning("pdfplumber_failed", error=str(e), fallback="PyPDF2")
-            return self._extract_pdf_fallback(file_path)
+            return self._extract_pdf_fallback(source, pages)
     
-    def _extract_pdf_fallback(self, file_path: str) -> str:
+    def _extract_pdf_fallback(self, source: Source, pages: Optional[List[int]] = None) -> str:
         """Fallback usando PyPDF2"""
         from PyPDF2 import PdfReader
         
-        reader = PdfReader(file_path)
+        self._rewind(source)
+        reader = PdfReader(source)
         text_parts = []
         
-        for page in reader.pages:
+        selected = reader.pages if pages is None else [reader.pages[i] for i in pages]
+        for page in selected:
             text = page.extract_text()
             if text:
                 text_parts.append(text)
         
         return '\n\n'.join(text_parts)
     
-    def _extract_docx(self, file_path: str) -> str:
-        """Extrai texto de DOCX preservando estrutura"""
+    def scan_pdf_text_layer(self, source: Source) -> PdfTextLayerScan:
+        """
+        Verifica, página a página, se há camada de texto sem análise de layout.
+        
+        Uma página tem texto quando declara fontes (direto ou em Form XObjects)
+        e seu content stream usa operadores de exibição de texto.
+        """
+        from PyPDF2 import PdfReader
+        
+        reader = PdfReader(source)
+        scan = PdfTextLayerScan(total_pages=len(reader.pages))
+        
+        for index, page in enumerate(reader.pages):
+            if self._pdf_object_has_text(page, page.get_contents()):
+                scan.text_pages.append(index)
+            else:
+                scan.image_only_pages.append(index)
+        
+        return scan
+    
+    def _pdf_object_has_text(self, obj, contents, depth: int = 0) -> bool:
+        """Procura fontes + operadores de texto em uma página ou Form XObject"""
+        resources = obj.get('/Resources')
+        resources = resources.get_object() if resources is not None else {}
+        
+        if contents is not None and resources.get('/Font'):
+            if PDF_TEXT_SHOW_OPS.search(contents.get_data()):
+                return True
+        
+        # Texto pode estar dentro de Form XObjects desenhados pela página
+        if depth < 3:
+            xobjects = resources.get('/XObject')
+            for ref in (xobjects.get_object().values() if xobjects else []):
+                xobj = ref.get_object()
+                if xobj.get('/Subtype') == '/Form' and self._pdf_object_has_text(xobj, xobj, depth + 1):
+                    return True
+        
+        return False
+    
+    def _extract_docx(self, source: Source) -> str:
+        """Extrai texto de DOCX lendo word/document.xml em streaming"""
+        try:
+            return '\n\n'.join(block.text for block in self.iter_docx_blocks(source))
+        except (KeyError, zipfile.BadZipFile, ElementTree.ParseError) as e:
+            logger.warning("docx_stream_failed", error=str(e), fallback="python-docx")
+            return self._extract_docx_fallback(source)
+    
+    def _extract_docx_fallback(self, source: Source) -> str:
+        """Fallback usando o modelo de objetos do python-docx"""
         from docx import Document
         
-        doc = Document(file_path)
+        self._rewind(source)
+        doc = Document(source)
         text_parts = []
         
         for paragraph in doc.paragraphs:
@@ -98,17 +307,170 @@ class TextExtractor:
         
         return '\n\n'.join(text_parts)
     
-    def _extract_txt(self, file_path: str) -> str:
+    def iter_docx_blocks(self, source: Source) -> Iterator[DocxBlock]:
+        """
+        Percorre word/document.xml com iterparse, emitindo parágrafos,
+        títulos e linhas de tabela na ordem do documento.
+        
+        O texto de caixas de texto (w:txbxContent) entra no parágrafo que as
+        contém, em linha própria; o mc:Fallback é ignorado, pois repete o
+        conteúdo do mc:Choice.
+        
+        Os elementos já processados são descartados durante a leitura,
+        então o consumo de memória não cresce com o tamanho do documento.
+        """
+        self._rewind(source)
+        with zipfile.ZipFile(source) as archive:
+            heading_styles = self._read_docx_heading_styles(archive)
+            
+            with archive.open('word/document.xml') as xml_file:
+                body = None
+                paragraphs: list = []    # Pilha de parágrafos abertos (_DocxParagraph)
+                cells: list = []         # Pilha de células (uma lista de textos por tabela aberta)
+                rows: list = []          # Pilha de linhas (uma lista de células por tabela aberta)
+                fallback_depth = 0       # > 0 dentro de mc:Fallback
+                
+                def in_paragraph() -> bool:
+                    """Se o parágrafo aberto é mais interno que a célula aberta"""
+                    return bool(paragraphs) and paragraphs[-1].cell_depth == len(cells)
+                
+                for event, elem in ElementTree.iterparse(xml_file, events=('start', 'end')):
+                    tag = elem.tag
+                    
+                    if tag == MC_NS + 'Fallback':
+                        fallback_depth += 1 if event == 'start' else -1
+                        continue
+                    if fallback_depth:
+                        continue
+                    
+                    if event == 'start':
+                        if tag == W_NS + 'body':
+                            body = elem
+                        elif tag == W_NS + 'p':
+                            paragraphs.append(_DocxParagraph(cell_depth=len(cells)))
+                        elif tag == W_NS + 'tr':
+                            rows.append([])
+                        elif tag == W_NS + 'tc':
+                            cells.append([])
+                        continue
+                    
+                    if tag == W_NS + 't':
+                        if paragraphs:
+                            paragraphs[-1].add_run(elem.text or '')
+                    elif tag == W_NS + 'tab':
+                        if paragraphs:
+                            paragraphs[-1].add_run('\t')
+                    elif tag in (W_NS + 'br', W_NS + 'cr'):
+                        if paragraphs:
+                            paragraphs[-1].add_run('\n')
+                    elif tag == W_NS + 'pStyle':
+                        if paragraphs:
+                            paragraphs[-1].level = heading_styles.get(elem.get(W_NS + 'val'), paragraphs[-1].level)
+                    elif tag == W_NS + 'outlineLvl':
+                        if paragraphs:
+                            paragraphs[-1].level = self._outline_to_heading(elem.get(W_NS + 'val'), paragraphs[-1].level)
+                    elif tag == W_NS + 'p':
+                        paragraph = paragraphs.pop()
+                        text = ''.join(paragraph.runs)
+                        if in_paragraph():
+                            # Caixa de texto: o texto segue no parágrafo externo, em linha própria
+                            if text.strip():
+                                paragraphs[-1].add_block(text)
+                        elif cells:
+                            cells[-1].append(text)
+                        elif text.strip():
+                            yield DocxBlock('heading' if paragraph.level else 'paragraph', text, paragraph.level)
+                        elem.clear()
+                    elif tag == W_NS + 'tc':
+                        cell_text = '\n'.join(p for p in cells.pop() if p.strip())
+                        if cell_text.strip():
+                            rows[-1].append(cell_text)
+                        elem.clear()
+                    elif tag == W_NS + 'tr':
+                        row_text = ' | '.join(rows.pop())
+                        if in_paragraph():
+                            # Tabela dentro de caixa de texto
+                            if row_text:
+                                paragraphs[-1].add_block(row_text)
+                        elif cells:
+                            # Tabela aninhada: a linha vira conteúdo da célula externa
+                            cells[-1].append(row_text)
+                        elif row_text:
+                            yield DocxBlock('table_row', row_text)
+                        elem.clear()
+                    
+                    # Libera blocos de nível superior já emitidos
+                    if body is not None and not cells and not paragraphs and tag in (W_NS + 'p', W_NS + 'tbl', W_NS + 'sdt'):
+                        body.clear()
+    
+    def _read_docx_heading_styles(self, archive: zipfile.ZipFile) -> dict:
+        """Mapeia styleId -> nível de título a partir de word/styles.xml"""
+        try:
+            styles_xml = archive.read('word/styles.xml')
+        except KeyError:
+            return {}
+        
+        heading_styles = {}
+        root = ElementTree.fromstring(styles_xml)
+        for style in root.iter(W_NS + 'style'):
+            if style.get(W_NS + 'type') != 'paragraph':
+                continue
+            style_id = style.get(W_NS + 'styleId')
+            name_elem = style.find(W_NS + 'name')
+            name = (name_elem.get(W_NS + 'val') if name_elem is not None else '') or ''
+            
+            level = 0
+            match = re.match(r'^(?:heading|t[íi]tulo)\s*(\d)$', name.strip(), re.IGNORECASE)
+            if match:
+                level = int(match.group(1))
+            else:
+                outline = style.find(f'{W_NS}pPr/{W_NS}outlineLvl')
+                if outline is not None:
+                    level = self._outline_to_heading(outline.get(W_NS + 'val'), 0)
+            
+            if style_id and level:
+                heading_styles[style_id] = level
+        
+        return heading_styles
+    
+    @staticmethod
+    def _outline_to_heading(value: Optional[str], default: int) -> int:
+        """Converte w:outlineLvl (0-8, 9 = corpo de texto) em nível de título"""
+        try:
+            outline = int(value)
+        except (TypeError, ValueError):
+            return default
+        return outline + 1 if 0 <= outline < 9 else 0
+    
+    def _extract_txt(self, source: Source) -> str:
         """Extrai texto de TXT com detecção de encoding"""
-        # Detecta encoding
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            detected = chardet.detect(raw_data)
-            encoding = detected.get('encoding', 'utf-8')
+        if isinstance(source, (str, Path)):
+            with open(source, 'rb') as f:
+                data = f.read()
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            data = source
+        else:
+            self._rewind(source)
+            data = source.read()
         
-        # Lê com encoding detectado
-        with open(file_path, 'r', encoding=encoding, errors='ignore') as f:
-            return f.read()
+        view = memoryview(data).cast('B')
+        try:
+            # Detecta encoding em blocos, parando assim que houver confiança
+            detector = UniversalDetector()
+            for offset in range(0, min(len(view), ENCODING_SAMPLE_BYTES * 16), ENCODING_SAMPLE_BYTES):
+                detector.feed(view[offset:offset + ENCODING_SAMPLE_BYTES].tobytes())
+                if detector.done:
+                    break
+            detector.close()
+            encoding = detector.result.get('encoding') or 'utf-8'
+            
+            # Decodifica direto do buffer, sem reabrir o arquivo
+            try:
+                return str(view, encoding, 'ignore')
+            except LookupError:
+                return str(view, 'utf-8', 'ignore')
+        finally:
+            view.release()
     
     def _clean_text(self, text: str) -> str:
         """
@@ -156,16 +518,18 @@ class ContentValidator:
     def __init__(self, min_words: int = 500):
         self.min_words = min_words
     
-    def validate(self, text: str) -> dict:
+    def validate(self, text: Union[str, DocumentAnalysis]) -> dict:
         """
         Valida o conteúdo e retorna análise
+        
+        Aceita o texto ou sua DocumentAnalysis (tokens já delimitados)
         """
-        words = text.split()
-        word_count = len(words)
+        analysis = text if isinstance(text, DocumentAnalysis) else analyze_document(text)
+        word_count = analysis.word_count
         
         # Detecção simples de idioma (verifica palavras comuns em português)
         pt_words = {'de', 'da', 'do', 'que', 'e', 'em', 'um', 'uma', 'para', 'com', 'não', 'os', 'as'}
-        text_words_lower = set(w.lower() for w in words[:200])  # Amostra inicial
+        text_words_lower = set(w.lower() for w in analysis.tokens(0, 200))  # Amostra inicial
         pt_matches = len(pt_words.intersection(text_words_lower))
         language = 'pt-BR' if pt_matches >= 5 else 'unknown'
         
@@ -1,29 +1,81 @@
 """
 Segmentador de tópicos usando TF-IDF e K-Means
 """
-import re
-from typing import List, Tuple, Dict
-from dataclasses import dataclass
+from typing import List, Tuple, Union
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.cluster import KMeans
 import structlog
 
+from app.services.ai.document_analysis import DocumentAnalysis, analyze_document
+
 logger = structlog.get_logger()
 
 
-@dataclass
 class TopicSegment:
-    """Representa um segmento de texto com tópico identificado"""
-    topic: str
-    content: str
-    keywords: List[str]
-    relevance_score: float
+    """
+    Representa um segmento de texto com tópico identificado
+    
+    O texto não é copiado: o segmento guarda só os intervalos (início, fim)
+    dos seus trechos no documento original, e o conteúdo é montado sob
+    demanda (ex.: ao construir o prompt).
+    """
+    __slots__ = ('topic', 'keywords', 'relevance_score', 'word_count', 'document', 'spans')
+    
+    # Separador entre trechos ao materializar o conteúdo
+    SEPARATOR = '\n\n'
+    
+    def __init__(
+        self,
+        topic: str,
+        keywords: List[str],
+        relevance_score: float,
+        document: str,
+        spans: np.ndarray,
+        word_count: int = 0
+    ):
+        self.topic = topic
+        self.keywords = keywords
+        self.relevance_score = relevance_score
+        self.document = document
+        self.spans = spans  # array (n, 2) de offsets no documento
+        self.word_count = word_count
+    
+    @property
+    def content(self) -> str:
+        """Texto completo do segmento (cria uma cópia a cada acesso)"""
+        return self.SEPARATOR.join(self.document[start:end] for start, end in self.spans.tolist())
+    
+    def excerpt(self, max_chars: int) -> str:
+        """Equivale a content[:max_chars], copiando só os trechos necessários"""
+        parts = []
+        remaining = max_chars
+        for start, end in self.spans.tolist():
+            if remaining <= 0:
+                break
+            if parts:
+                parts.append(self.SEPARATOR[:remaining])
+                remaining -= len(self.SEPARATOR)
+                if remaining <= 0:
+                    break
+            parts.append(self.document[start:min(end, start + remaining)])
+            remaining -= end - start
+        return ''.join(parts)
+    
+    def __repr__(self) -> str:
+        return (
+            f"TopicSegment(topic={self.topic!r}, spans={len(self.spans)}, "
+            f"word_count={self.word_count}, relevance_score={self.relevance_score:.3f})"
+        )
 
 
 class TopicSegmenter:
     """
     Segmenta texto em tópicos usando TF-IDF e clustering K-Means
+    
+    Uma instância é compartilhada entre as tarefas em threads (upload,
+    lote, geração): o vetorizador e o K-Means são criados a cada chamada
+    de segment(), nunca guardados na instância.
     """
     
     # Stopwords em português
@@ -44,66 +96,64 @@ class TopicSegmenter:
     def __init__(self, n_topics: int = 5, min_segment_words: int = 100):
         self.n_topics = n_topics
         self.min_segment_words = min_segment_words
-        
-        self.vectorizer = TfidfVectorizer(
+        self._stop_words = list(self.PORTUGUESE_STOPWORDS)
+    
+    def _new_vectorizer(self) -> TfidfVectorizer:
+        return TfidfVectorizer(
             max_features=1000,
             ngram_range=(1, 3),
-            stop_words=list(self.PORTUGUESE_STOPWORDS),
+            stop_words=self._stop_words,
             min_df=1,
             max_df=0.95
         )
-        
-        self.kmeans = None
     
-    def segment(self, text: str) -> List[TopicSegment]:
+    def segment(self, text: Union[str, DocumentAnalysis]) -> List[TopicSegment]:
         """
         Segmenta o texto em tópicos
         
         Args:
-            text: Texto completo para segmentar
-            
+            text: Texto completo para segmentar, ou sua DocumentAnalysis
+        
         Returns:
             Lista de TopicSegment com tópicos identificados
         """
+        analysis = text if isinstance(text, DocumentAnalysis) else analyze_document(text)
+        
         # Divide texto em parágrafos/chunks
-        chunks = self._split_into_chunks(text)
+        chunk_spans, chunk_word_counts = self._split_into_chunks(analysis)
         
-        if len(chunks) < 2:
+        if len(chunk_spans) < 2:
             # Texto muito curto, retorna como único segmento
-            return [TopicSegment(
-                topic="Conteúdo Principal",
-                content=text,
-                keywords=self._extract_keywords_simple(text),
-                relevance_score=1.0
-            )]
+            return [self._single_segment(analysis)]
         
         # Ajusta número de clusters baseado na quantidade de chunks
-        n_clusters = min(self.n_topics, len(chunks))
+        n_clusters = min(self.n_topics, len(chunk_spans))
         
         logger.info(
             "topic_segmentation_started",
-            chunks=len(chunks),
+            chunks=len(chunk_spans),
             target_topics=n_clusters
         )
         
-        # Vetorização TF-IDF
+        # Vetorização TF-IDF (cada chunk é fatiado do documento só durante a leitura)
+        text = analysis.text
+        vectorizer = self._new_vectorizer()
         try:
-            tfidf_matrix = self.vectorizer.fit_transform(chunks)
+            tfidf_matrix = vectorizer.fit_transform(text[start:end] for start, end in chunk_spans.tolist())
         except ValueError as e:
             logger.warning("tfidf_failed", error=str(e))
-            return [TopicSegment(
-                topic="Conteúdo Principal",
-                content=text,
-                keywords=self._extract_keywords_simple(text),
-                relevance_score=1.0
-            )]
+            return [self._single_segment(analysis)]
         
         # Clustering K-Means
-        self.kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-        cluster_labels = self.kmeans.fit_predict(tfidf_matrix)
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        cluster_labels = kmeans.fit_predict(tfidf_matrix)
         
         # Agrupa chunks por cluster
-        segments = self._build_segments(chunks, cluster_labels, tfidf_matrix)
+        segments = self._build_segments(
+            text, chunk_spans, chunk_word_counts, cluster_labels, tfidf_matrix,
+            feature_names=vectorizer.get_feature_names_out(),
+            centroids=kmeans.cluster_centers_
+        )
         
         logger.info(
             "topic_segmentation_completed",
@@ -112,60 +162,68 @@ class TopicSegmenter:
         
         return segments
     
-    def _split_into_chunks(self, text: str) -> List[str]:
-        """Divide texto em chunks significativos"""
-        # Divide por parágrafos duplos primeiro
-        paragraphs = re.split(r'\n\s*\n', text)
+    def _single_segment(self, analysis: DocumentAnalysis) -> TopicSegment:
+        """Documento inteiro como um único segmento"""
+        return TopicSegment(
+            topic="Conteúdo Principal",
+            keywords=self._extract_keywords_simple(analysis.words),
+            relevance_score=1.0,
+            document=analysis.text,
+            spans=np.array([[0, len(analysis.text)]], dtype=np.int64),
+            word_count=analysis.word_count
+        )
+    
+    def _split_into_chunks(self, analysis: DocumentAnalysis) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Agrupa parágrafos consecutivos em chunks significativos
         
-        chunks = []
-        current_chunk = []
+        Returns:
+            (intervalos (início, fim) dos chunks no documento, palavras de cada chunk)
+        """
+        paragraph_spans = analysis.paragraph_spans
+        chunk_spans = []
+        chunk_word_counts = []
+        first = 0
         current_word_count = 0
         
-        for para in paragraphs:
-            para = para.strip()
-            if not para:
-                continue
-            
-            para_words = len(para.split())
-            
-            if current_word_count + para_words < self.min_segment_words:
-                current_chunk.append(para)
+        for index, para_words in enumerate(analysis.paragraph_word_counts.tolist()):
+            if index == first or current_word_count + para_words < self.min_segment_words:
                 current_word_count += para_words
             else:
-                if current_chunk:
-                    chunks.append('\n'.join(current_chunk))
-                current_chunk = [para]
+                chunk_spans.append((paragraph_spans[first, 0], paragraph_spans[index - 1, 1]))
+                chunk_word_counts.append(current_word_count)
+                first = index
                 current_word_count = para_words
         
         # Adiciona último chunk
-        if current_chunk:
-            chunks.append('\n'.join(current_chunk))
+        if len(paragraph_spans):
+            chunk_spans.append((paragraph_spans[first, 0], paragraph_spans[-1, 1]))
+            chunk_word_counts.append(current_word_count)
         
-        return chunks
+        return (
+            np.array(chunk_spans, dtype=np.int64).reshape(-1, 2),
+            np.array(chunk_word_counts, dtype=np.int64)
+        )
     
     def _build_segments(
         self, 
-        chunks: List[str], 
+        document: str,
+        chunk_spans: np.ndarray,
+        chunk_word_counts: np.ndarray,
         labels: np.ndarray,
-        tfidf_matrix
+        tfidf_matrix,
+        feature_names: np.ndarray,
+        centroids: np.ndarray
     ) -> List[TopicSegment]:
-        """Constrói segmentos a partir dos clusters"""
+        """Constrói segmentos a partir dos clusters, referenciando os chunks por offset"""
         segments = []
-        feature_names = self.vectorizer.get_feature_names_out()
-        
-        # Agrupa chunks por cluster
-        cluster_chunks: Dict[int, List[str]] = {}
-        for chunk, label in zip(chunks, labels):
-            if label not in cluster_chunks:
-                cluster_chunks[label] = []
-            cluster_chunks[label].append(chunk)
         
         # Cria segmentos
-        for cluster_id, cluster_texts in sorted(cluster_chunks.items()):
-            combined_text = '\n\n'.join(cluster_texts)
+        for cluster_id in np.unique(labels):
+            cluster_mask = labels == cluster_id
             
             # Extrai keywords do centróide do cluster
-            centroid = self.kmeans.cluster_centers_[cluster_id]
+            centroid = centroids[cluster_id]
             top_indices = centroid.argsort()[-10:][::-1]
             keywords = [feature_names[i] for i in top_indices if centroid[i] > 0]
             
@@ -173,7 +231,6 @@ class TopicSegmenter:
             topic_name = self._generate_topic_name(keywords)
             
             # Calcula score de relevância (distância média ao centróide)
-            cluster_mask = labels == cluster_id
             cluster_vectors = tfidf_matrix[cluster_mask]
             if cluster_vectors.shape[0] > 0:
                 distances = np.linalg.norm(
@@ -185,9 +242,11 @@ class TopicSegmenter:
             
             segments.append(TopicSegment(
                 topic=topic_name,
-                content=combined_text,
                 keywords=keywords[:5],
-                relevance_score=float(relevance_score)
+                relevance_score=float(relevance_score),
+                document=document,
+                spans=chunk_spans[cluster_mask],
+                word_count=int(chunk_word_counts[cluster_mask].sum())
             ))
         
         # Ordena por relevância
@@ -211,12 +270,10 @@ class TopicSegmenter:
         
         return " - ".join(topic_parts[:2])
     
-    def _extract_keywords_simple(self, text: str) -> List[str]:
-        """Extração simples de keywords para textos curtos"""
-        words = re.findall(r'\b[a-záàâãéèêíïóôõöúçñ]{4,}\b', text.lower())
-        
-        # Remove stopwords
-        words = [w for w in words if w not in self.PORTUGUESE_STOPWORDS]
+    def _extract_keywords_simple(self, words: List[str]) -> List[str]:
+        """Extração simples de keywords para textos curtos, a partir das palavras já extraídas"""
+        # Mantém palavras de 4+ letras e remove stopwords
+        words = [w for w in words if len(w) >= 4 and w not in self.PORTUGUESE_STOPWORDS]
         
         # Conta frequência
         word_freq = {}
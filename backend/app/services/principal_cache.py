@@ -0,0 +1,173 @@
+"""
+Cache do usuário autenticado (principal) pelo id do subject do token
+
+get_current_user roda em toda requisição autenticada, inclusive nos
+pollings do frontend. Em vez de um SELECT em users a cada chamada, guarda
+id, email e is_active por um TTL curto:
+
+- camada local (por processo), LRU com expiração;
+- camada compartilhada opcional no Redis, para vários workers.
+
+Mudanças de email ou is_active feitas pelo ORM invalidam a entrada ao
+confirmar a transação. Alterações em massa (UPDATE direto em users) devem
+chamar principal_cache.invalidate(user_id). Em outros workers, a cópia
+local expira em no máximo um TTL.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import structlog
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.config import settings
+from app.models import User
+
+logger = structlog.get_logger()
+
+# Chave em Session.info com os usuários alterados na transação
+PENDING_INVALIDATIONS_KEY = "principal_cache_invalidate"
+# Campos guardados no principal: mudá-los invalida o cache
+PRINCIPAL_FIELDS = ("email", "is_active")
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Usuário autenticado, sem sessão de banco associada"""
+    id: int
+    email: str
+    is_active: bool
+    
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, is_active=bool(user.is_active))
+
+
+class PrincipalCache:
+    """Cache local com TTL, opcionalmente apoiado no Redis"""
+    
+    def __init__(self, ttl_seconds: int, max_entries: int = 10000, redis_url: Optional[str] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        if redis_url:
+            import redis
+            # Timeouts curtos: com o Redis fora do ar a autenticação cai para o banco
+            self._redis = redis.Redis.from_url(redis_url, socket_timeout=0.2, socket_connect_timeout=0.2)
+    
+    @property
+    def shared(self) -> bool:
+        """Se há camada compartilhada (consultas a ela bloqueiam; use fora do event loop)"""
+        return self._redis is not None
+    
+    @staticmethod
+    def _redis_key(subject: str) -> str:
+        return f"principal:{subject}"
+    
+    def get(self, user_id: int) -> Optional[Principal]:
+        """Principal da camada local, se ainda válido"""
+        if self.ttl_seconds <= 0:
+            return None
+        subject = str(user_id)
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+    
+    def _store_local(self, subject: str, principal: Principal) -> None:
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_shared(self, user_id: int) -> Optional[Principal]:
+        """Principal da camada compartilhada (copiado para a local)"""
+        if self._redis is None or self.ttl_seconds <= 0:
+            return None
+        subject = str(user_id)
+        try:
+            raw = self._redis.get(self._redis_key(subject))
+        except Exception as e:
+            logger.warning("principal_cache_shared_error", error=str(e))
+            return None
+        if raw is None:
+            return None
+        principal = Principal(**json.loads(raw))
+        self._store_local(subject, principal)
+        return principal
+    
+    def set(self, principal: Principal) -> None:
+        """Guarda o principal na camada local e, se houver, na compartilhada"""
+        if self.ttl_seconds <= 0:
+            return
+        subject = str(principal.id)
+        self._store_local(subject, principal)
+        if self._redis is not None:
+            try:
+                self._redis.setex(self._redis_key(subject), self.ttl_seconds, json.dumps(asdict(principal)))
+            except Exception as e:
+                logger.warning("principal_cache_shared_error", error=str(e))
+    
+    def invalidate(self, user_id: int) -> None:
+        """Remove o usuário das duas camadas"""
+        subject = str(user_id)
+        with self._lock:
+            self._entries.pop(subject, None)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._redis_key(subject))
+            except Exception as e:
+                logger.warning("principal_cache_shared_error", error=str(e))
+    
+    def clear(self) -> None:
+        """Esvazia a camada local"""
+        with self._lock:
+            self._entries.clear()
+
+
+# Instância singleton do cache
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries,
+    redis_url=settings.redis_url if settings.principal_cache_shared else None
+)
+
+
+def _mark_for_invalidation(target: User) -> None:
+    object_session(target).info.setdefault(PENDING_INVALIDATIONS_KEY, set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        _mark_for_invalidation(target)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    _mark_for_invalidation(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    for user_id in session.info.pop(PENDING_INVALIDATIONS_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
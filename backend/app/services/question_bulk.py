@@ -0,0 +1,128 @@
+"""
+Operações em lote sobre as questões de um usuário
+
+Cada operação é um único UPDATE (ou DELETE) restrito às questões das
+sessões do usuário. O histórico vai para question_edits em um só
+INSERT ... SELECT, que lê os valores anteriores no próprio banco, sem
+carregar as questões na aplicação.
+"""
+from datetime import datetime
+from typing import Any, Iterable, List
+
+from sqlalchemy import and_, case, delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from app.models import GenerationSession, Question, QuestionEdit, DifficultyLevel
+
+
+class QuestionsNotFoundError(ValueError):
+    """Questões inexistentes ou de outro usuário (nada é alterado)"""
+    
+    def __init__(self, question_ids: Iterable[int]):
+        self.question_ids = sorted(question_ids)
+        super().__init__(f"Questões não encontradas: {', '.join(map(str, self.question_ids))}")
+
+
+def _as_text(field: str) -> ColumnElement:
+    """Valor atual do campo como texto, no mesmo formato de new_value"""
+    if field == "is_approved":
+        return case((Question.is_approved.is_(True), "true"), (Question.is_approved.is_(False), "false"))
+    if field == "difficulty":
+        return case(*[(Question.difficulty == level, level.value) for level in DifficultyLevel])
+    return getattr(Question, field)
+
+
+def _value_text(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, DifficultyLevel):
+        return value.value
+    return str(value)
+
+
+def owned_questions(user_id: int, question_ids: Iterable[int]) -> ColumnElement:
+    """Condição: questão entre os ids e em uma sessão do usuário"""
+    return and_(
+        Question.id.in_(list(question_ids)),
+        Question.session_id.in_(select(GenerationSession.id).where(GenerationSession.user_id == user_id))
+    )
+
+
+async def bulk_update_questions(
+    db: AsyncSession,
+    user_id: int,
+    question_ids: Iterable[int],
+    field: str,
+    value: Any
+) -> List[int]:
+    """
+    Define o mesmo valor de um campo em várias questões
+    
+    Grava em question_edits só as questões cujo valor muda. Não faz commit.
+    
+    Args:
+        field: "is_approved", "difficulty" ou "topic"
+    
+    Returns:
+        Ids atualizados, em ordem
+    
+    Raises:
+        QuestionsNotFoundError: algum id não é do usuário (a transação deve ser desfeita)
+    """
+    ids = set(question_ids)
+    owned = owned_questions(user_id, ids)
+    column = getattr(Question, field)
+    now = datetime.utcnow()
+    
+    await db.execute(
+        insert(QuestionEdit).from_select(
+            ["question_id", "field_changed", "old_value", "new_value", "edited_at"],
+            select(
+                Question.id, literal(field), _as_text(field), literal(_value_text(value)), literal(now)
+            ).where(owned, column.is_distinct_from(value))
+        )
+    )
+    updated = (await db.scalars(
+        update(Question)
+        .where(owned)
+        .values({field: value, "is_edited": True, "updated_at": now})
+        .returning(Question.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    
+    missing = ids - set(updated)
+    if missing:
+        raise QuestionsNotFoundError(missing)
+    return sorted(updated)
+
+
+async def bulk_delete_questions(db: AsyncSession, user_id: int, question_ids: Iterable[int]) -> List[int]:
+    """
+    Remove várias questões e o histórico de edições delas. Não faz commit.
+    
+    Returns:
+        Ids removidos, em ordem
+    
+    Raises:
+        QuestionsNotFoundError: algum id não é do usuário (a transação deve ser desfeita)
+    """
+    ids = set(question_ids)
+    owned = owned_questions(user_id, ids)
+    
+    await db.execute(
+        delete(QuestionEdit)
+        .where(QuestionEdit.question_id.in_(select(Question.id).where(owned)))
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.scalars(
+        delete(Question)
+        .where(owned)
+        .returning(Question.id)
+        .execution_options(synchronize_session=False)
+    )).all()
+    
+    missing = ids - set(deleted)
+    if missing:
+        raise QuestionsNotFoundError(missing)
+    return sorted(deleted)
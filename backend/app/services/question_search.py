@@ -0,0 +1,101 @@
+"""
+Busca textual no banco de questões de um usuário
+
+Monta a consulta conforme o banco: tsvector + websearch_to_tsquery no
+PostgreSQL (ranqueada por ts_rank_cd) e FTS5 no SQLite (ranqueada por
+bm25). Os objetos de índice ficam em app.models.search.
+"""
+import re
+from typing import Optional
+
+from sqlalchemy import Float, column, func, literal_column, select, table
+from sqlalchemy.sql import Select
+
+from app.models import GenerationSession, Question, DifficultyLevel, QuestionType
+from app.models.search import FTS_TABLE, SEARCH_VECTOR_COLUMN
+
+SEARCH_CONFIG = "portuguese"
+
+# Pesos do bm25 por coluna do FTS5 (content, topic, option_a..d, justification)
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 2.0, 2.0, 2.0, 1.0)
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class SearchQueryError(ValueError):
+    """Termo de busca vazio ou banco sem suporte a busca textual"""
+    pass
+
+
+def fts5_match_expression(text: str) -> str:
+    """
+    Converte o texto do usuário em uma expressão MATCH do FTS5
+    
+    Cada palavra vira uma frase entre aspas (todas obrigatórias), então
+    operadores e aspas digitados não quebram a sintaxe.
+    """
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        raise SearchQueryError("Informe ao menos uma palavra para buscar")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def _postgres_query(text: str) -> Select:
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    vector = literal_column(f"questions.{SEARCH_VECTOR_COLUMN}")
+    rank = func.ts_rank_cd(vector, ts_query)
+    return (
+        select(Question, GenerationSession.source_filename, rank.label("rank"))
+        .where(vector.op("@@")(ts_query))
+        .order_by(rank.desc(), Question.id)
+    )
+
+
+def _sqlite_query(text: str) -> Select:
+    fts = table(FTS_TABLE, column("rowid"))
+    # bm25 é menor para resultados melhores; o sinal é invertido para expor "maior = melhor"
+    bm25 = func.bm25(literal_column(FTS_TABLE), *FTS_WEIGHTS, type_=Float)
+    return (
+        select(Question, GenerationSession.source_filename, (-bm25).label("rank"))
+        .join_from(Question, fts, fts.c.rowid == Question.id)
+        .where(literal_column(FTS_TABLE).op("MATCH")(fts5_match_expression(text)))
+        .order_by(bm25, Question.id)
+    )
+
+
+def build_search_query(
+    dialect_name: str,
+    user_id: int,
+    text: str,
+    difficulty: Optional[DifficultyLevel] = None,
+    question_type: Optional[QuestionType] = None,
+    limit: int = 20
+) -> Select:
+    """
+    Consulta de busca nas questões das sessões do usuário, da mais relevante para a menos
+    
+    Returns:
+        Select de (Question, nome do arquivo da sessão, relevância)
+    
+    Raises:
+        SearchQueryError: texto sem palavras ou banco sem busca textual
+    """
+    if not text or not text.strip():
+        raise SearchQueryError("Informe ao menos uma palavra para buscar")
+    
+    if dialect_name == "postgresql":
+        query = _postgres_query(text)
+    elif dialect_name == "sqlite":
+        query = _sqlite_query(text)
+    else:
+        raise SearchQueryError(f"Busca textual não suportada no banco {dialect_name}")
+    
+    query = query.join(GenerationSession, GenerationSession.id == Question.session_id).where(
+        GenerationSession.user_id == user_id
+    )
+    if difficulty is not None:
+        query = query.where(Question.difficulty == difficulty)
+    if question_type is not None:
+        query = query.where(Question.question_type == question_type)
+    
+    return query.limit(limit)
@@ -0,0 +1,297 @@
+"""
+Armazenamento de uploads retomáveis (enviados em partes)
+
+Cada upload vive em dois arquivos no diretório de upload:
+- {upload_id}.{extensão}: os bytes recebidos até agora, gravados direto no lugar final
+- {upload_id}.json: metadados (dono, nome do arquivo, tamanho declarado)
+
+O offset recebido é sempre o tamanho desse arquivo em disco, então uma conexão
+que cai no meio de uma parte deixa o upload retomável a partir do último
+byte gravado. Na finalização, a extração lê esse mesmo arquivo, sem cópia.
+
+Partes do mesmo upload são serializadas por um lock por upload (conferência
+do offset, gravação e hash); a E/S de disco roda no pool de threads.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import threading
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+# Tamanho dos blocos de leitura ao re-hashear um upload parcial do disco
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class UploadNotFoundError(LookupError):
+    """Upload inexistente, expirado ou de outro usuário"""
+
+
+class UploadOffsetMismatch(ValueError):
+    """Parte enviada não começa no offset já recebido"""
+    
+    def __init__(self, expected: int):
+        self.expected = expected
+        super().__init__(f"Offset esperado: {expected}")
+
+
+class UploadSizeExceeded(ValueError):
+    """Conteúdo maior que o limite permitido"""
+
+
+class UploadIncomplete(ValueError):
+    """Finalização pedida antes de todos os bytes chegarem"""
+
+
+class UploadLengthMismatch(ValueError):
+    """Corpo da parte com tamanho diferente do intervalo do Content-Range"""
+    
+    def __init__(self, expected: int):
+        self.expected = expected
+        super().__init__(f"A parte deve ter exatamente {expected} bytes")
+
+
+async def consume_stream(
+    chunks: AsyncIterator[bytes],
+    max_bytes: int,
+    digest,
+    write: Callable[[bytes], object]
+) -> int:
+    """
+    Consome um stream de bytes atualizando o hash incrementalmente
+    
+    Aborta com UploadSizeExceeded assim que `max_bytes` é ultrapassado,
+    sem ler o restante do corpo.
+    
+    Returns:
+        Quantidade de bytes consumidos
+    """
+    received = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadSizeExceeded(f"Conteúdo excede {max_bytes} bytes")
+        write(chunk)
+        digest.update(chunk)
+    return received
+
+
+@dataclass
+class ResumableUpload:
+    """Metadados de um upload retomável"""
+    upload_id: str
+    user_id: int
+    filename: str
+    size: int
+    created_at: float
+    checksum: Optional[str] = None  # sha256 hex declarado pelo cliente (opcional)
+    
+    @property
+    def extension(self) -> str:
+        return self.filename.rsplit('.', 1)[-1].lower() if '.' in self.filename else 'bin'
+
+
+class ResumableUploadStore:
+    """Gerencia uploads retomáveis em disco, com hash SHA-256 incremental"""
+    
+    def __init__(self, base_dir: str, ttl_seconds: int):
+        self.base_dir = Path(base_dir)
+        self.ttl_seconds = ttl_seconds
+        # upload_id -> (offset já hasheado, objeto sha256); reconstruído do disco se ausente
+        self._digests: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+        # upload_id -> lock que serializa partes e finalização do mesmo upload (por processo)
+        self._upload_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+    
+    def _upload_lock(self, upload_id: str) -> asyncio.Lock:
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, asyncio.Lock())
+    
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.base_dir / f"{upload_id}.json"
+    
+    def part_path(self, upload: ResumableUpload) -> Path:
+        return self.base_dir / f"{upload.upload_id}.{upload.extension}"
+    
+    def create(
+        self,
+        user_id: int,
+        filename: str,
+        size: int,
+        checksum: Optional[str] = None
+    ) -> ResumableUpload:
+        """Registra um novo upload e cria o arquivo de destino vazio"""
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.purge_expired()
+        
+        upload = ResumableUpload(
+            upload_id=uuid.uuid4().hex,
+            user_id=user_id,
+            filename=filename,
+            size=size,
+            created_at=time.time(),
+            checksum=checksum.lower() if checksum else None
+        )
+        self.part_path(upload).touch()
+        self._meta_path(upload.upload_id).write_text(json.dumps(asdict(upload)))
+        
+        with self._lock:
+            self._digests[upload.upload_id] = (0, hashlib.sha256())
+        
+        return upload
+    
+    def get(self, upload_id: str, user_id: int) -> ResumableUpload:
+        """Carrega metadados, garantindo que o upload pertence ao usuário"""
+        if not upload_id.isalnum():
+            raise UploadNotFoundError(upload_id)
+        try:
+            upload = ResumableUpload(**json.loads(self._meta_path(upload_id).read_text()))
+        except (FileNotFoundError, ValueError, TypeError):
+            raise UploadNotFoundError(upload_id)
+        if upload.user_id != user_id:
+            raise UploadNotFoundError(upload_id)
+        return upload
+    
+    def offset(self, upload: ResumableUpload) -> int:
+        """Bytes já recebidos (tamanho do arquivo parcial em disco)"""
+        try:
+            return self.part_path(upload).stat().st_size
+        except FileNotFoundError:
+            raise UploadNotFoundError(upload.upload_id)
+    
+    def _digest_at(self, upload: ResumableUpload, offset: int):
+        """Retorna o sha256 dos primeiros `offset` bytes, re-hasheando do disco se preciso"""
+        with self._lock:
+            state = self._digests.get(upload.upload_id)
+        if state is not None and state[0] == offset:
+            return state[1]
+        
+        digest = hashlib.sha256()
+        with open(self.part_path(upload), "rb") as f:
+            remaining = offset
+            while remaining:
+                block = f.read(min(HASH_BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+        return digest
+    
+    def _open_at(self, upload: ResumableUpload, offset: int) -> BinaryIO:
+        # Mantém o upload vivo para a limpeza por TTL
+        os.utime(self._meta_path(upload.upload_id))
+        f = open(self.part_path(upload), "r+b")
+        f.seek(offset)
+        return f
+    
+    @staticmethod
+    def _write_chunk(f: BinaryIO, digest, chunk: bytes) -> None:
+        f.write(chunk)
+        digest.update(chunk)
+    
+    @staticmethod
+    def _truncate(f: BinaryIO, offset: int) -> None:
+        f.seek(offset)
+        f.truncate()
+    
+    async def append(
+        self,
+        upload: ResumableUpload,
+        start: int,
+        length: int,
+        chunks: AsyncIterator[bytes]
+    ) -> int:
+        """
+        Grava uma parte de `length` bytes a partir de `start`, que deve ser o offset atual
+        
+        Uma parte com tamanho diferente de `length` é desfeita por inteiro.
+        Se a conexão cair no meio, o que já foi gravado é mantido.
+        
+        Returns:
+            Novo offset
+        """
+        async with self._upload_lock(upload.upload_id):
+            current = self.offset(upload)
+            if start != current:
+                raise UploadOffsetMismatch(current)
+            if length > upload.size - current:
+                raise UploadSizeExceeded(f"Parte excede o tamanho declarado de {upload.size} bytes")
+            
+            digest = await run_in_threadpool(self._digest_at, upload, current)
+            before = digest.copy()
+            f = await run_in_threadpool(self._open_at, upload, current)
+            received = 0
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    received += len(chunk)
+                    if received > length:
+                        break
+                    await run_in_threadpool(self._write_chunk, f, digest, chunk)
+                
+                if received != length:
+                    await run_in_threadpool(self._truncate, f, current)
+                    digest = before
+                    raise UploadLengthMismatch(length)
+            finally:
+                await run_in_threadpool(f.close)
+                with self._lock:
+                    self._digests[upload.upload_id] = (self.offset(upload), digest)
+        
+        return current + length
+    
+    async def finalize(self, upload: ResumableUpload) -> Tuple[str, str]:
+        """
+        Confere se o upload está completo
+        
+        Returns:
+            (caminho do arquivo montado, sha256 hex do conteúdo)
+        """
+        async with self._upload_lock(upload.upload_id):
+            received = self.offset(upload)
+            if received != upload.size:
+                raise UploadIncomplete(f"Recebidos {received} de {upload.size} bytes")
+            
+            digest = await run_in_threadpool(self._digest_at, upload, received)
+        return str(self.part_path(upload)), digest.hexdigest()
+    
+    def discard(self, upload_id: str) -> None:
+        """Remove arquivos e estado de um upload"""
+        with self._lock:
+            self._digests.pop(upload_id, None)
+            self._upload_locks.pop(upload_id, None)
+        for path in self.base_dir.glob(f"{upload_id}.*"):
+            os.remove(path)
+    
+    def purge_expired(self) -> None:
+        """Remove uploads abandonados há mais que o TTL"""
+        if not self.base_dir.exists():
+            return
+        cutoff = time.time() - self.ttl_seconds
+        for meta in self.base_dir.glob("*.json"):
+            try:
+                if meta.stat().st_mtime < cutoff:
+                    self.discard(meta.stem)
+                    logger.info("resumable_upload_expired", upload_id=meta.stem)
+            except FileNotFoundError:
+                continue
+
+
+# Instância singleton do armazenamento
+resumable_store = ResumableUploadStore(
+    os.path.join(settings.upload_dir, "resumable"),
+    ttl_seconds=settings.resumable_upload_ttl_hours * 3600
+)
@@ -0,0 +1,71 @@
+"""
+Benchmark do DifficultyClassifier: classify() por questão vs classify_many()
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_difficulty_classifier [--sizes 20 500 10000]
+"""
+import argparse
+import random
+import time
+
+from app.services.ai.difficulty_classifier import DifficultyClassifier
+
+STEMS = [
+    "O que é {term}?",
+    "Explique a diferença entre {term} e {other}, fornecendo exemplos de implementação.",
+    "Considerando o paradigma de {term}, portanto, qual afirmação sobre {other} é correta?",
+    "Descreva o algoritmo de {term} e compare sua complexidade com {other}, enquanto analisa a) tempo b) espaço.",
+    "Não obstante as vantagens de {term}, todavia a metodologia de {other} apresenta limitações. Justifique.",
+]
+
+TERMS = [
+    "polimorfismo", "encapsulamento", "herança", "recursividade", "abstração",
+    "busca binária", "ordenação por intercalação", "tabelas hash", "grafos ponderados",
+    "programação dinâmica", "heurística gulosa", "arquitetura em camadas",
+]
+
+
+def build_questions(n: int, seed: int = 42) -> list:
+    """Gera questões sintéticas com vocabulário variado"""
+    rng = random.Random(seed)
+    questions = []
+    for i in range(n):
+        stem = rng.choice(STEMS)
+        term, other = rng.sample(TERMS, 2)
+        justification = f"A resposta decorre da definição de {term} apresentada no texto {i}."
+        questions.append(stem.format(term=term, other=other) + " " + justification)
+    return questions
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 500, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    classifier = DifficultyClassifier()
+    
+    print(f"{'questões':>9s} {'classify':>12s} {'classify_many':>14s} {'speedup':>8s}")
+    for size in args.sizes:
+        questions = build_questions(size)
+        
+        # Garante que os dois caminhos produzem o mesmo resultado
+        assert classifier.classify_many(questions) == [classifier.classify(q) for q in questions]
+        
+        single = best_of(lambda: [classifier.classify(q) for q in questions], args.repeat)
+        batch = best_of(lambda: classifier.classify_many(questions), args.repeat)
+        
+        print(f"{size:9d} {single * 1000:10.1f}ms {batch * 1000:12.1f}ms {single / batch:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
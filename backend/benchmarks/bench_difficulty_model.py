@@ -0,0 +1,47 @@
+"""
+Benchmark da inferência do modelo treinado de dificuldade
+
+Treina com questões sintéticas, salva/carrega o .npz e mede o custo por questão
+de classify_many() com e sem o modelo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_difficulty_model [--sizes 20 500 10000]
+"""
+import argparse
+import os
+import tempfile
+
+from app.services.ai.difficulty_classifier import DifficultyClassifier
+from app.services.ai.difficulty_model import DifficultyModel, train_from_texts
+from benchmarks.bench_difficulty_classifier import best_of, build_questions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 500, 10000])
+    parser.add_argument("--train", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    heuristic = DifficultyClassifier(use_model=False)
+    training = build_questions(args.train, seed=7)
+    labels = [a.level for a in heuristic.classify_many(training)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "modelo.npz")
+        train_from_texts(training, labels).save(path)
+        size_kb = os.path.getsize(path) / 1024
+        learned = DifficultyClassifier(model=DifficultyModel.load(path))
+    
+    print(f"modelo: {size_kb:.0f} KB")
+    print(f"{'questões':>9s} {'heurística':>14s} {'modelo':>14s} {'modelo/questão':>15s}")
+    for size in args.sizes:
+        questions = build_questions(size)
+        base = best_of(lambda: heuristic.classify_many(questions), args.repeat)
+        model = best_of(lambda: learned.classify_many(questions), args.repeat)
+        per_question_us = model / size * 1e6
+        print(f"{size:9d} {base * 1000:12.1f}ms {model * 1000:12.1f}ms {per_question_us:13.1f}us")
+
+
+if __name__ == "__main__":
+    main()
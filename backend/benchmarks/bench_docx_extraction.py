@@ -0,0 +1,85 @@
+"""
+Benchmark da extração de DOCX: streaming de word/document.xml vs python-docx
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_docx_extraction [--paragraphs 5000] [--rows 500]
+
+Cada caminho roda em um processo separado, para que o pico de RSS
+(ru_maxrss) de um não contamine o outro.
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+
+def build_document(path: str, paragraphs: int, rows: int) -> None:
+    """Gera um DOCX sintético com títulos, parágrafos e uma tabela grande"""
+    from docx import Document
+    
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 50 == 0:
+            doc.add_heading(f"Capítulo {i // 50 + 1}", level=1)
+        doc.add_paragraph(
+            f"Parágrafo {i}: a programação orientada a objetos organiza o software "
+            f"em classes, instâncias, herança, encapsulamento e polimorfismo."
+        )
+    
+    table = doc.add_table(rows=rows, cols=3)
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            cell.text = f"linha {r} coluna {c}"
+    
+    doc.save(path)
+
+
+def _run(method: str, path: str, queue) -> None:
+    from app.services.ai.text_extractor import TextExtractor
+    
+    extractor = TextExtractor()
+    extract = getattr(extractor, method)
+    
+    start = time.perf_counter()
+    text = extract(path)
+    elapsed = time.perf_counter() - start
+    
+    # ru_maxrss é em KiB no Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    queue.put((elapsed, peak_rss_mb, len(text)))
+
+
+def measure(method: str, path: str) -> tuple:
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(method, path, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=500)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.docx")
+        build_document(path, args.paragraphs, args.rows)
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"Documento: {args.paragraphs} parágrafos, {args.rows} linhas de tabela, {size_mb:.1f} MB")
+        
+        for label, method in [
+            ("python-docx", "_extract_docx_fallback"),
+            ("iterparse", "_extract_docx"),
+        ]:
+            elapsed, peak_rss_mb, chars = measure(method, path)
+            print(f"{label:12s} {elapsed * 1000:9.1f} ms  pico RSS {peak_rss_mb:7.1f} MB  {chars} caracteres")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark da contagem de sílabas: regras sem cache vs cache LRU vs léxico mapeado
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_syllables [--tokens 200000] [--vocabulary 5000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.services.ai.syllables import (
+    SyllableLexicon,
+    build_lexicon,
+    count_syllables,
+    count_syllables_by_rules,
+)
+
+SYLLABLES = [
+    "ta", "de", "ção", "men", "to", "lo", "gi", "co", "ra", "pre", "sen", "cia",
+    "qua", "gui", "ei", "au", "ri", "a", "bi", "li", "da", "de", "tra", "ns",
+    "poe", "sí", "mo", "ne", "to", "ú", "pa", "ís", "lei", "ão", "in", "ter",
+]
+
+
+def build_corpus(tokens: int, vocabulary: int, seed: int = 42) -> tuple:
+    """Gera vocabulário sintético e um fluxo de tokens com distribuição de Zipf"""
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < vocabulary:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 6))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    return words, rng.choices(words, weights=weights, k=tokens)
+
+
+def per_word_ns(fn, stream, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in stream:
+            fn(word)
+        best = min(best, time.perf_counter() - start)
+    return best / len(stream) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=200000)
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    words, stream = build_corpus(args.tokens, args.vocabulary)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "silabas.tsv")
+        build_lexicon(path, words)
+        lexicon = SyllableLexicon(path)
+        
+        # O léxico foi gerado pelas próprias regras: as respostas devem coincidir
+        assert all(lexicon.get(w) == count_syllables_by_rules(w) for w in words)
+        
+        count_syllables.cache_clear()
+        results = [
+            ("regras (sem cache)", per_word_ns(count_syllables_by_rules, stream, args.repeat)),
+            ("léxico mmap (sem cache)", per_word_ns(lexicon.get, stream, args.repeat)),
+            ("cache LRU", per_word_ns(count_syllables, stream, args.repeat)),
+        ]
+        lexicon.close()
+    
+    info = count_syllables.cache_info()
+    print(f"{args.tokens} tokens, {len(words)} palavras distintas, tamanho do cache {info.maxsize}")
+    baseline = results[0][1]
+    for name, ns in results:
+        print(f"{name:26s} {ns:8.0f} ns/palavra {baseline / ns:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
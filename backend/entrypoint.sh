@@ -4,5 +4,8 @@ set -e
 # Ensure PYTHONPATH is set
 export PYTHONPATH=/app:$PYTHONPATH
 
+# Apply pending schema migrations (the API itself only checks the revision)
+python -m app.core.migrations
+
 # Run uvicorn
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
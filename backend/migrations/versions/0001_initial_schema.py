@@ -0,0 +1,96 @@
+"""
+Esquema inicial (tabelas como criadas por Base.metadata.create_all)
+
+Revision ID: 0001_initial_schema
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001_initial_schema"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(255), nullable=False),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("full_name", sa.String(255)),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    
+    op.create_table(
+        "generation_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("source_filename", sa.String(255)),
+        sa.Column("source_file_hash", sa.String(64)),
+        sa.Column("content_preview", sa.Text()),
+        sa.Column("word_count", sa.Integer()),
+        sa.Column("ai_provider", sa.String(50)),
+        sa.Column("parameters", sa.JSON()),
+        sa.Column("status", sa.String(50)),
+        sa.Column("error_message", sa.Text()),
+        sa.Column("processing_time_seconds", sa.Float()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("completed_at", sa.DateTime())
+    )
+    op.create_index("ix_generation_sessions_id", "generation_sessions", ["id"])
+    
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("generation_sessions.id"), nullable=False),
+        sa.Column(
+            "question_type",
+            sa.Enum("MULTIPLA_ESCOLHA", "VERDADEIRO_FALSO", "DISSERTATIVA", name="questiontype"),
+            nullable=False
+        ),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("option_a", sa.Text()),
+        sa.Column("option_b", sa.Text()),
+        sa.Column("option_c", sa.Text()),
+        sa.Column("option_d", sa.Text()),
+        sa.Column("correct_answer", sa.String(10)),
+        sa.Column("justification", sa.Text()),
+        sa.Column("difficulty", sa.Enum("FACIL", "MEDIO", "DIFICIL", name="difficultylevel")),
+        sa.Column("topic", sa.String(255)),
+        sa.Column("quality_score", sa.Float()),
+        sa.Column("factuality_score", sa.Float()),
+        sa.Column("source_excerpt", sa.Text()),
+        sa.Column("is_edited", sa.Boolean()),
+        sa.Column("is_approved", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime())
+    )
+    op.create_index("ix_questions_id", "questions", ["id"])
+    
+    op.create_table(
+        "question_edits",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("question_id", sa.Integer(), sa.ForeignKey("questions.id"), nullable=False),
+        sa.Column("field_changed", sa.String(50)),
+        sa.Column("old_value", sa.Text()),
+        sa.Column("new_value", sa.Text()),
+        sa.Column("edited_at", sa.DateTime())
+    )
+    op.create_index("ix_question_edits_id", "question_edits", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("question_edits")
+    op.drop_table("questions")
+    op.drop_table("generation_sessions")
+    op.drop_table("users")
+    sa.Enum(name="questiontype").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="difficultylevel").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,25 @@
+"""
+Coluna topics em generation_sessions (análise de tópicos em background)
+
+Revision ID: 0002_session_topics
+Revises: 0001_initial_schema
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002_session_topics"
+down_revision = "0001_initial_schema"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("generation_sessions") as batch_op:
+        batch_op.add_column(sa.Column("topics", sa.JSON()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("generation_sessions") as batch_op:
+        batch_op.drop_column("topics")
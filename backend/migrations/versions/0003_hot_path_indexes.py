@@ -0,0 +1,38 @@
+"""
+Índices compostos para as consultas mais frequentes
+
+- generation_sessions (user_id, created_at DESC, id DESC): toda rota
+  autenticada filtra sessões por usuário, e a listagem ordena e pagina por
+  (created_at, id)
+- questions (session_id, id): questões de uma sessão, contagens por sessão
+  e paginação por id
+- question_edits (question_id, edited_at): histórico de uma questão
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_session_topics
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_hot_path_indexes"
+down_revision = "0002_session_topics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_generation_sessions_user_created",
+        "generation_sessions",
+        ["user_id", sa.text("created_at DESC"), sa.text("id DESC")]
+    )
+    op.create_index("ix_questions_session_id_id", "questions", ["session_id", "id"])
+    op.create_index("ix_question_edits_question_edited", "question_edits", ["question_id", "edited_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_question_edits_question_edited", table_name="question_edits")
+    op.drop_index("ix_questions_session_id_id", table_name="questions")
+    op.drop_index("ix_generation_sessions_user_created", table_name="generation_sessions")
@@ -0,0 +1,86 @@
+"""
+Busca textual nas questões
+
+- PostgreSQL: coluna gerada search_vector (tsvector, configuração
+  portuguese; pesos A enunciado, B tópico, C alternativas, D justificativa)
+  com índice GIN
+- SQLite: tabela virtual FTS5 questions_fts com conteúdo externo, mantida
+  por triggers, e reconstruída a partir das questões existentes
+
+Revision ID: 0004_question_search
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+
+revision = "0004_question_search"
+down_revision = "0003_hot_path_indexes"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "content, topic, option_a, option_b, option_c, option_d, justification"
+NEW_VALUES = "new.content, new.topic, new.option_a, new.option_b, new.option_c, new.option_d, new.justification"
+OLD_VALUES = "old.content, old.topic, old.option_a, old.option_b, old.option_c, old.option_d, old.justification"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE questions ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('portuguese'::regconfig, coalesce(content, '')), 'A') ||
+                setweight(to_tsvector('portuguese'::regconfig, coalesce(topic, '')), 'B') ||
+                setweight(to_tsvector('portuguese'::regconfig,
+                    coalesce(option_a, '') || ' ' || coalesce(option_b, '') || ' ' ||
+                    coalesce(option_c, '') || ' ' || coalesce(option_d, '')), 'C') ||
+                setweight(to_tsvector('portuguese'::regconfig, coalesce(justification, '')), 'D')
+            ) STORED
+            """
+        )
+        op.execute("CREATE INDEX IF NOT EXISTS ix_questions_search_vector ON questions USING GIN (search_vector)")
+        return
+    
+    op.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5(
+            {COLUMNS}, content='questions', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN
+            INSERT INTO questions_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN
+            INSERT INTO questions_fts(questions_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+        END
+        """
+    )
+    op.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS questions_fts_au AFTER UPDATE OF {COLUMNS} ON questions BEGIN
+            INSERT INTO questions_fts(questions_fts, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD_VALUES});
+            INSERT INTO questions_fts(rowid, {COLUMNS}) VALUES (new.id, {NEW_VALUES});
+        END
+        """
+    )
+    op.execute("INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_questions_search_vector")
+        op.execute("ALTER TABLE questions DROP COLUMN IF EXISTS search_vector")
+        return
+    
+    for trigger in ("questions_fts_au", "questions_fts_ad", "questions_fts_ai"):
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    op.execute("DROP TABLE IF EXISTS questions_fts")
@@ -3,6 +3,9 @@ Pytest configuration and fixtures for testing.
 """
 import os
 import sys
+import atexit
+import shutil
+import tempfile
 import pytest
 from typing import Generator, AsyncGenerator
 from unittest.mock import MagicMock, AsyncMock, patch
@@ -12,25 +15,33 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db, async_database_url
 from app.core.security import get_password_hash, create_access_token
 from app.models.models import User
+from app.services.principal_cache import principal_cache
 
 
-# Test database setup - using SQLite for tests
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Test database setup - a SQLite file shared by the sync engine (fixtures)
+# and the async engine (routes); an in-memory database cannot be shared.
+_db_dir = tempfile.mkdtemp(prefix="questgen-tests-")
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# NullPool: each TestClient runs its own event loop, so connections are not reused
+async_engine = create_async_engine(async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def override_get_db():
     """Override database dependency for testing."""
@@ -41,6 +52,12 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override async database dependency for testing."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
 @pytest.fixture(scope="function")
 def db_session():
     """Create a fresh database session for each test."""
@@ -55,7 +72,10 @@ def db_session():
 def client(db_session) -> Generator:
     """Create a test client with overridden database."""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     Base.metadata.create_all(bind=engine)
+    # Ids de usuário se repetem entre testes (banco recriado)
+    principal_cache.clear()
     
     with TestClient(app) as test_client:
         yield test_client
@@ -64,6 +84,12 @@ def client(db_session) -> Generator:
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def api_engine():
+    """The sync engine behind the async engine used by the routes (for statement listeners)."""
+    return async_engine.sync_engine
+
+
 @pytest.fixture
 def test_user(db_session) -> User:
     """Create a test user."""
@@ -82,10 +108,17 @@ def test_user(db_session) -> User:
 @pytest.fixture
 def auth_headers(test_user) -> dict:
     """Create authentication headers for test user."""
-    token = create_access_token(data={"sub": test_user.email})
+    token = create_access_token(data={"sub": str(test_user.id), "email": test_user.email})
     return {"Authorization": f"Bearer {token}"}
 
 
+@pytest.fixture
+def cached_auth_headers(client, auth_headers) -> dict:
+    """Authentication headers whose user is already in the principal cache (auth costs no query)."""
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 200
+    return auth_headers
+
+
 @pytest.fixture
 def mock_ai_provider():
     """Mock AI provider for testing question generation."""
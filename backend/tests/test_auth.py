@@ -126,3 +126,106 @@ class TestAuthMe:
             headers={"Authorization": "Bearer invalid_token"}
         )
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestPrincipalCache:
+    """Test the cached resolution of the authenticated user."""
+    
+    def test_polling_costs_no_user_queries(self, client, auth_headers, api_engine):
+        """Test repeated authenticated requests resolve the user from the cache."""
+        from sqlalchemy import event
+        
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(api_engine, "before_cursor_execute", listener)
+        try:
+            for _ in range(5):
+                assert client.get("/api/v1/generation/sessions", headers=auth_headers).status_code == status.HTTP_200_OK
+        finally:
+            event.remove(api_engine, "before_cursor_execute", listener)
+        
+        user_queries = [s for s in statements if "FROM users" in s]
+        assert len(user_queries) == 1
+        assert len(statements) == 6
+    
+    def test_deactivation_invalidates_cache(self, client, test_user, auth_headers, db_session):
+        """Test deactivating a user through the ORM takes effect on the next request."""
+        assert client.get("/api/v1/generation/sessions", headers=auth_headers).status_code == status.HTTP_200_OK
+        
+        test_user.is_active = False
+        db_session.commit()
+        
+        assert client.get("/api/v1/generation/sessions", headers=auth_headers).status_code == status.HTTP_403_FORBIDDEN
+    
+    def test_deleted_user_is_rejected(self, client, test_user, auth_headers, db_session):
+        """Test deleting a user drops the cached principal."""
+        assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == status.HTTP_200_OK
+        
+        db_session.delete(test_user)
+        db_session.commit()
+        
+        assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_rollback_keeps_cache(self, client, test_user, auth_headers, db_session):
+        """Test an uncommitted deactivation does not evict or change the cached principal."""
+        from app.services.principal_cache import principal_cache
+        
+        client.get("/api/v1/auth/me", headers=auth_headers)
+        test_user.is_active = False
+        db_session.flush()
+        db_session.rollback()
+        
+        assert principal_cache.get(test_user.id).is_active is True
+    
+    def test_entries_expire(self, monkeypatch):
+        """Test entries are dropped after the TTL and the oldest go first when full."""
+        from app.services import principal_cache as module
+        from app.services.principal_cache import Principal, PrincipalCache
+        
+        now = [1000.0]
+        monkeypatch.setattr(module.time, "monotonic", lambda: now[0])
+        cache = PrincipalCache(ttl_seconds=30, max_entries=2)
+        for user_id in (1, 2, 3):
+            cache.set(Principal(id=user_id, email=f"u{user_id}@example.com", is_active=True))
+        
+        assert cache.get(1) is None
+        assert cache.get(3).email == "u3@example.com"
+        now[0] += 31
+        assert cache.get(3) is None
+    
+    def test_unreachable_shared_tier_falls_back(self):
+        """Test an unreachable Redis only disables the shared tier."""
+        from app.services.principal_cache import Principal, PrincipalCache
+        
+        cache = PrincipalCache(ttl_seconds=30, redis_url="redis://127.0.0.1:1/0")
+        cache.set(Principal(id=7, email="u7@example.com", is_active=True))
+        
+        assert cache.shared
+        assert cache.get_shared(8) is None
+        assert cache.get(7).id == 7
+        cache.invalidate(7)
+        assert cache.get(7) is None
+    
+    def test_non_canonical_subject_hits_cache(self, client, test_user, api_engine):
+        """Test a zero-padded subject is normalised to the same cache key as the plain id."""
+        from sqlalchemy import event
+        from app.core.security import create_access_token
+        
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': f'00{test_user.id}'})}"}
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(api_engine, "before_cursor_execute", listener)
+        try:
+            for _ in range(3):
+                assert client.get("/api/v1/generation/sessions", headers=headers).status_code == status.HTTP_200_OK
+        finally:
+            event.remove(api_engine, "before_cursor_execute", listener)
+        
+        assert len([s for s in statements if "FROM users" in s]) == 1
+    
+    def test_non_numeric_subject_is_rejected(self, client):
+        """Test a subject that is not a user id is a 401, not a server error."""
+        from app.core.security import create_access_token
+        
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': 'abc'})}"}
+        assert client.get("/api/v1/auth/me", headers=headers).status_code == status.HTTP_401_UNAUTHORIZED
@@ -200,3 +200,55 @@ class TestExport:
             status.HTTP_400_BAD_REQUEST,
             status.HTTP_404_NOT_FOUND
         ]
+    
+    def test_export_filters_and_orders_in_sql(self, client, cached_auth_headers, test_user, db_session, api_engine):
+        """Test export selects approved and chosen questions, sorted, with one statement for the questions."""
+        from sqlalchemy import event
+        from app.models.models import GenerationSession, Question, QuestionType, DifficultyLevel
+        
+        session = GenerationSession(user_id=test_user.id, source_filename="test.txt", status="completed")
+        db_session.add(session)
+        db_session.flush()
+        specs = [
+            (DifficultyLevel.DIFICIL, QuestionType.MULTIPLA_ESCOLHA, True),
+            (DifficultyLevel.FACIL, QuestionType.VERDADEIRO_FALSO, True),
+            (DifficultyLevel.MEDIO, QuestionType.DISSERTATIVA, False),
+            (DifficultyLevel.MEDIO, QuestionType.DISSERTATIVA, True),
+            (DifficultyLevel.FACIL, QuestionType.MULTIPLA_ESCOLHA, True),
+        ]
+        questions = []
+        for i, (difficulty, question_type, approved) in enumerate(specs):
+            question = Question(
+                session_id=session.id, question_type=question_type, difficulty=difficulty,
+                content=f"Questão {i}", correct_answer="A", is_approved=approved
+            )
+            db_session.add(question)
+            questions.append(question)
+        db_session.commit()
+        ids = [q.id for q in questions]
+        
+        def export(**options):
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(api_engine, "before_cursor_execute", listener)
+            try:
+                response = client.post(
+                    f"/api/v1/export/session/{session.id}",
+                    json={"format": "csv", **options},
+                    headers=cached_auth_headers
+                )
+            finally:
+                event.remove(api_engine, "before_cursor_execute", listener)
+            assert response.status_code == status.HTTP_200_OK
+            rows = response.text.strip().splitlines()[1:]
+            return [int(row.split(",")[0]) for row in rows], statements
+        
+        exported, statements = export(order_by="difficulty")
+        assert exported == [ids[1], ids[4], ids[3], ids[0]]
+        assert len(statements) == 2  # sessão + questões (usuário em cache)
+        
+        exported, _ = export(order_by="type")
+        assert exported == [ids[3], ids[0], ids[4], ids[1]]
+        
+        exported, _ = export(order_by="id", questions_ids=[ids[0], ids[2], ids[4]])
+        assert exported == [ids[0], ids[4]]
@@ -93,6 +93,84 @@ class TestQuestionGeneration:
         )
         
         assert response.status_code in [status.HTTP_400_BAD_REQUEST, status.HTTP_422_UNPROCESSABLE_ENTITY]
+    
+    
+    def test_generate_with_mock_provider_persists_batch(self, client, auth_headers, test_user, db_session):
+        """Test the columnar batch flows from the provider through classification into the database."""
+        from app.models.models import GenerationSession, Question
+        
+        session = GenerationSession(
+            user_id=test_user.id,
+            source_filename="test.txt",
+            content_preview="Python é uma linguagem de programação de alto nível. " * 20,
+            word_count=180,
+            status="pending"
+        )
+        db_session.add(session)
+        db_session.commit()
+        
+        response = client.post(
+            f"/api/v1/generation/{session.id}/generate",
+            json={
+                "num_questions": 4,
+                "question_types": ["multipla_escolha", "verdadeiro_falso"],
+                "ai_provider": "mock"
+            },
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert data["questions_generated"] == 4
+        assert [q["type"] for q in data["questions"]] == ["multipla_escolha", "verdadeiro_falso"] * 2
+        assert all(q["options"]["A"] for q in data["questions"] if q["type"] == "multipla_escolha")
+        
+        stored = db_session.query(Question).filter(Question.session_id == session.id).all()
+        assert len(stored) == 4
+        assert all(q.quality_score is not None for q in stored)
+    
+    
+    def test_save_questions_single_insert_returning(self, db_session, test_user):
+        """Test generated questions are stored with one INSERT ... RETURNING and no per-row refresh."""
+        from sqlalchemy import event
+        from app.api.routes.generation import save_questions_to_db
+        from app.models.models import GenerationSession
+        from app.services.ai.base import GeneratedQuestion, QuestionBatch, QuestionType, DifficultyLevel
+        
+        session = GenerationSession(user_id=test_user.id, source_filename="test.txt", status="processing")
+        db_session.add(session)
+        db_session.commit()
+        
+        batch = QuestionBatch.from_questions([
+            GeneratedQuestion(
+                question_type=QuestionType.MULTIPLA_ESCOLHA,
+                content=f"Questão {i}?",
+                options={"A": "a", "B": "b", "C": "c", "D": "d"},
+                correct_answer="A",
+                difficulty=DifficultyLevel.DIFICIL
+            )
+            for i in range(25)
+        ])
+        
+        session_id = session.id
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            rows = save_questions_to_db(db_session, session, batch)
+            contents = [row.content for row in rows]
+            ids = [row.id for row in rows]
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        db_session.commit()
+        
+        assert len(statements) == 1
+        assert all(row.session_id == session_id for row in rows)
+        assert statements[0].lstrip().upper().startswith("INSERT") and "RETURNING" in statements[0].upper()
+        assert contents == [f"Questão {i}?" for i in range(25)]
+        assert ids == sorted(ids)
+        assert rows[0].difficulty.value == "dificil" and rows[0].is_edited is False
 
 
 class TestQuestionManagement:
@@ -204,6 +282,119 @@ class TestQuestionManagement:
         )
         
         assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+    
+    def _bulk_questions(self, db_session, user_id, count=4):
+        from app.models.models import GenerationSession, Question, QuestionType, DifficultyLevel
+        
+        session = GenerationSession(user_id=user_id, source_filename="test.txt", status="completed")
+        db_session.add(session)
+        db_session.flush()
+        questions = [
+            Question(session_id=session.id, question_type=QuestionType.DISSERTATIVA, content=f"Questão {j}",
+                     difficulty=DifficultyLevel.MEDIO, is_approved=j % 2 == 0)
+            for j in range(count)
+        ]
+        db_session.add_all(questions)
+        db_session.commit()
+        return [q.id for q in questions]
+    
+    def test_bulk_operations_update_and_record_history(self, client, auth_headers, test_user, db_session):
+        """Test approve, set_difficulty and set_topic update every question and log only real changes."""
+        from app.models.models import Question, QuestionEdit
+        
+        ids = self._bulk_questions(db_session, test_user.id)
+        
+        response = client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids, "action": "approve"}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == {"action": "approve", "question_ids": sorted(ids)}
+        
+        client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids[:2], "action": "set_difficulty", "difficulty": "dificil"}, headers=auth_headers)
+        client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids[:1], "action": "set_topic", "topic": "Genética"}, headers=auth_headers)
+        
+        db_session.expire_all()
+        questions = {q.id: q for q in db_session.query(Question).filter(Question.id.in_(ids))}
+        assert all(q.is_approved and q.is_edited for q in questions.values())
+        assert [questions[i].difficulty.value for i in ids] == ["dificil", "dificil", "medio", "medio"]
+        assert questions[ids[0]].topic == "Genética"
+        
+        edits = {(e.question_id, e.field_changed, e.old_value, e.new_value) for e in db_session.query(QuestionEdit)}
+        assert edits == {
+            (ids[1], "is_approved", "false", "true"),
+            (ids[3], "is_approved", "false", "true"),
+            (ids[0], "difficulty", "medio", "dificil"),
+            (ids[1], "difficulty", "medio", "dificil"),
+            (ids[0], "topic", None, "Genética"),
+        }
+    
+    def test_bulk_reject_and_delete(self, client, auth_headers, test_user, db_session):
+        """Test rejecting flips is_approved and deleting removes questions along with their history."""
+        from app.models.models import Question, QuestionEdit
+        
+        ids = self._bulk_questions(db_session, test_user.id)
+        client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids, "action": "reject"}, headers=auth_headers)
+        db_session.expire_all()
+        assert not any(q.is_approved for q in db_session.query(Question).filter(Question.id.in_(ids)))
+        
+        assert sorted(e.question_id for e in db_session.query(QuestionEdit)) == [ids[0], ids[2]]
+        
+        response = client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids[1:], "action": "delete"}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert [q.id for q in db_session.query(Question).filter(Question.id.in_(ids))] == ids[:1]
+        assert [e.question_id for e in db_session.query(QuestionEdit)] == [ids[0]]
+    
+    def test_bulk_operation_is_all_or_nothing(self, client, auth_headers, test_user, db_session):
+        """Test a batch containing another user's or a missing question changes nothing."""
+        from app.models.models import Question, QuestionEdit, User
+        
+        ids = self._bulk_questions(db_session, test_user.id)
+        other = User(email="other@example.com", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        foreign_ids = self._bulk_questions(db_session, other.id, count=1)
+        
+        for action in ("approve", "delete"):
+            response = client.post(
+                "/api/v1/generation/questions/bulk",
+                json={"question_ids": ids + foreign_ids + [999999], "action": action},
+                headers=auth_headers
+            )
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+            assert str(foreign_ids[0]) in response.json()["detail"]
+        
+        db_session.expire_all()
+        assert db_session.query(Question).count() == 5
+        assert [q.is_approved for q in db_session.query(Question).filter(Question.id.in_(ids)).order_by(Question.id)] == [True, False, True, False]
+        assert db_session.query(QuestionEdit).count() == 0
+    
+    def test_bulk_operation_validation(self, client, auth_headers):
+        """Test set_difficulty and set_topic require their value and the id list cannot be empty."""
+        for body in (
+            {"question_ids": [1], "action": "set_difficulty"},
+            {"question_ids": [1], "action": "set_topic"},
+            {"question_ids": [], "action": "approve"},
+            {"question_ids": [1], "action": "archive"},
+        ):
+            response = client.post("/api/v1/generation/questions/bulk", json=body, headers=auth_headers)
+            assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_bulk_operation_runs_fixed_statements(self, client, cached_auth_headers, test_user, db_session, api_engine):
+        """Test a batch costs one history INSERT and one UPDATE regardless of its size."""
+        from sqlalchemy import event
+        
+        ids = self._bulk_questions(db_session, test_user.id, count=40)
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(api_engine, "before_cursor_execute", listener)
+        try:
+            response = client.post("/api/v1/generation/questions/bulk", json={"question_ids": ids, "action": "approve"}, headers=cached_auth_headers)
+        finally:
+            event.remove(api_engine, "before_cursor_execute", listener)
+        
+        assert response.status_code == status.HTTP_200_OK
+        # INSERT ... SELECT do histórico + UPDATE (usuário em cache)
+        assert len(statements) == 2
+        assert statements[0].lstrip().startswith("INSERT INTO question_edits") and "SELECT" in statements[0]
+        assert statements[1].lstrip().startswith("UPDATE questions")
 
 
 class TestSessionManagement:
@@ -258,3 +449,162 @@ class TestSessionManagement:
         data = response.json()
         assert data["id"] == session.id
         assert data["source_filename"] == "test.txt"
+    
+    def test_list_sessions_constant_query_count(self, client, cached_auth_headers, test_user, db_session, api_engine):
+        """Test session listing counts questions in SQL with a constant number of statements."""
+        from sqlalchemy import event
+        from app.models.models import GenerationSession, Question, QuestionType
+        
+        for i in range(6):
+            session = GenerationSession(user_id=test_user.id, source_filename=f"test{i}.txt", status="completed")
+            db_session.add(session)
+            db_session.flush()
+            for j in range(i):
+                db_session.add(Question(
+                    session_id=session.id,
+                    question_type=QuestionType.DISSERTATIVA,
+                    content=f"Questão {j}"
+                ))
+        db_session.commit()
+        
+        engine = api_engine
+        
+        def list_with_limit(limit):
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(engine, "before_cursor_execute", listener)
+            try:
+                response = client.get(f"/api/v1/generation/sessions?limit={limit}", headers=cached_auth_headers)
+            finally:
+                event.remove(engine, "before_cursor_execute", listener)
+            assert response.status_code == status.HTTP_200_OK
+            return response.json()["data"], statements
+        
+        few, few_statements = list_with_limit(2)
+        many, many_statements = list_with_limit(6)
+        
+        assert len(few) == 2 and len(many) == 6
+        assert len(few_statements) == len(many_statements) == 1  # só a listagem (usuário em cache)
+        assert not any("FROM questions" in s and "count" not in s.lower() for s in many_statements)
+        assert sorted(s["question_count"] for s in many) == [0, 1, 2, 3, 4, 5]
+    
+    def test_list_sessions_keyset_pagination(self, client, auth_headers, test_user, db_session):
+        """Test session pages follow (created_at, id) with an opaque cursor, ties included."""
+        from datetime import datetime
+        from app.models.models import GenerationSession
+        
+        same_time = datetime(2024, 1, 1, 12, 0, 0)
+        for i in range(5):
+            db_session.add(GenerationSession(
+                user_id=test_user.id,
+                source_filename=f"test{i}.txt",
+                status="completed",
+                created_at=same_time if i < 3 else datetime(2024, 1, 2, i)
+            ))
+        db_session.commit()
+        
+        seen = []
+        cursor = None
+        while True:
+            url = "/api/v1/generation/sessions?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            response = client.get(url, headers=auth_headers)
+            assert response.status_code == status.HTTP_200_OK
+            body = response.json()
+            assert len(body["data"]) <= 2
+            seen.extend(s["source_filename"] for s in body["data"])
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        
+        assert seen == ["test4.txt", "test3.txt", "test2.txt", "test1.txt", "test0.txt"]
+    
+    def test_pagination_rejects_bad_cursor_and_limit(self, client, auth_headers):
+        """Test malformed cursors and oversized pages are rejected."""
+        response = client.get("/api/v1/generation/sessions?cursor=not-a-cursor", headers=auth_headers)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        response = client.get("/api/v1/generation/sessions?limit=100000", headers=auth_headers)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_pagination_rejects_mistyped_cursor(self, client, auth_headers, test_user, db_session):
+        """Test well-formed cursors whose values have the wrong types are rejected with 400."""
+        from app.api.pagination import encode_cursor
+        from app.models.models import GenerationSession
+        
+        session = GenerationSession(user_id=test_user.id, source_filename="test.txt", status="completed")
+        db_session.add(session)
+        db_session.commit()
+        
+        for values in [("x", "y"), (1, 2), ({"t": "2024-01-01T00:00:00"}, True), ({"t": 5}, 1)]:
+            response = client.get(f"/api/v1/generation/sessions?cursor={encode_cursor(*values)}", headers=auth_headers)
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+            assert response.json()["detail"] == "Cursor de paginação inválido"
+        
+        for values in [("abc",), ([1],), (True,), (1.5,)]:
+            response = client.get(
+                f"/api/v1/generation/{session.id}/questions?cursor={encode_cursor(*values)}",
+                headers=auth_headers
+            )
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_session_questions_keyset_pagination(self, client, auth_headers, test_user, db_session):
+        """Test question pages seek by id in both the list endpoint and the session detail."""
+        from app.models.models import GenerationSession, Question, QuestionType
+        
+        session = GenerationSession(user_id=test_user.id, source_filename="test.txt", status="completed")
+        db_session.add(session)
+        db_session.flush()
+        for j in range(5):
+            db_session.add(Question(session_id=session.id, question_type=QuestionType.DISSERTATIVA, content=f"Questão {j}"))
+        db_session.commit()
+        
+        first = client.get(f"/api/v1/generation/{session.id}/questions?limit=3", headers=auth_headers)
+        assert [q["content"] for q in first.json()] == ["Questão 0", "Questão 1", "Questão 2"]
+        cursor = first.headers["X-Next-Cursor"]
+        
+        last = client.get(f"/api/v1/generation/{session.id}/questions?limit=3&cursor={cursor}", headers=auth_headers)
+        assert [q["content"] for q in last.json()] == ["Questão 3", "Questão 4"]
+        assert "X-Next-Cursor" not in last.headers
+        
+        detail = client.get(f"/api/v1/generation/sessions/{session.id}?questions_limit=3", headers=auth_headers).json()["data"]
+        assert len(detail["questions"]) == 3
+        assert detail["questions_next_cursor"] == cursor
+    
+    def test_endpoints_run_fixed_query_counts(self, client, cached_auth_headers, test_user, db_session, api_engine):
+        """Test session detail, question listing and regeneration issue a fixed number of statements."""
+        from sqlalchemy import event
+        from app.models.models import GenerationSession, Question, QuestionType
+        
+        session = GenerationSession(
+            user_id=test_user.id,
+            source_filename="test.txt",
+            content_preview="Python é uma linguagem de programação de alto nível. " * 20,
+            ai_provider="mock",
+            status="completed"
+        )
+        db_session.add(session)
+        db_session.flush()
+        for j in range(12):
+            db_session.add(Question(session_id=session.id, question_type=QuestionType.DISSERTATIVA, content=f"Questão {j}"))
+        db_session.commit()
+        question_id = db_session.query(Question.id).filter(Question.session_id == session.id).first()[0]
+        
+        def run(method, url):
+            statements = []
+            listener = lambda conn, cursor, statement, *args: statements.append(statement)
+            event.listen(api_engine, "before_cursor_execute", listener)
+            try:
+                response = client.request(method, url, headers=cached_auth_headers)
+            finally:
+                event.remove(api_engine, "before_cursor_execute", listener)
+            assert response.status_code == status.HTTP_200_OK, response.text
+            return statements
+        
+        # sessão + página de questões (usuário em cache)
+        assert len(run("GET", f"/api/v1/generation/sessions/{session.id}")) == 2
+        assert len(run("GET", f"/api/v1/generation/{session.id}/questions")) == 2
+        
+        # questão com a sessão no mesmo JOIN + UPDATE
+        statements = run("POST", f"/api/v1/generation/questions/{question_id}/regenerate")
+        assert len(statements) == 2
+        assert "JOIN generation_sessions" in statements[0] and "generation_sessions.ai_provider" in statements[0]
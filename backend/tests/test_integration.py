@@ -203,3 +203,21 @@ class TestConcurrency:
         # At least some should succeed
         success_count = sum(1 for r in results if r.status_code == status.HTTP_200_OK)
         assert success_count > 0 or all(r.status_code == status.HTTP_400_BAD_REQUEST for r in results)
+    
+    def test_routes_use_async_sessions(self):
+        """Test no API route depends on the blocking sync session."""
+        from fastapi.routing import APIRoute
+        from app.main import app
+        from app.core.database import get_db, get_async_db
+        
+        def calls(dependant):
+            for sub in dependant.dependencies:
+                yield sub.call
+                yield from calls(sub)
+        
+        routes = [r for r in app.routes if isinstance(r, APIRoute)]
+        dependencies = {route.path: set(calls(route.dependant)) for route in routes}
+        
+        assert not [path for path, deps in dependencies.items() if get_db in deps]
+        assert get_async_db in dependencies["/api/v1/generation/sessions"]
+        assert get_async_db in dependencies["/api/v1/auth/login"]
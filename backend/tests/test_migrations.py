@@ -0,0 +1,202 @@
+"""
+Tests for database migrations and index usage on hot query paths.
+"""
+import os
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.autogenerate import compare_metadata
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+from app.core.database import Base, get_async_db, async_database_url
+from app.core.security import create_access_token
+from app.models.models import GenerationSession, Question, QuestionEdit, QuestionType, User
+from app.models.search import include_name
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def alembic_config(url: str) -> Config:
+    config = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    """A SQLite file database built only by running the migrations."""
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    command.upgrade(alembic_config(url), "head")
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def seeded(migrated_engine):
+    """Several users with many sessions, questions and edits, plus planner statistics."""
+    Session = sessionmaker(bind=migrated_engine)
+    with Session() as db:
+        users = [User(email=f"user{u}@example.com", hashed_password="x") for u in range(20)]
+        db.add_all(users)
+        db.flush()
+        for user in users:
+            for s in range(15):
+                session = GenerationSession(user_id=user.id, source_filename=f"doc{s}.txt", status="completed")
+                db.add(session)
+                db.flush()
+                for q in range(8):
+                    question = Question(session_id=session.id, question_type=QuestionType.DISSERTATIVA, content=f"Q{q}")
+                    db.add(question)
+                    db.flush()
+                    db.add(QuestionEdit(question_id=question.id, field_changed="content", old_value="a", new_value="b"))
+        db.commit()
+        user_id = users[0].id
+        session_id = db.scalar(select(GenerationSession.id).where(GenerationSession.user_id == user_id).limit(1))
+        question_id = db.scalar(select(Question.id).where(Question.session_id == session_id).limit(1))
+    
+    with migrated_engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return user_id, session_id, question_id
+
+
+def full_scans(conn, statement, parameters):
+    """EXPLAIN QUERY PLAN lines that scan a whole table or index instead of seeking."""
+    plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in plan if row[-1].startswith("SCAN") and "subquery" not in row[-1].lower()]
+
+
+class TestMigrations:
+    """Test the migration chain produces the schema the models describe."""
+    
+    def test_head_matches_models(self, migrated_engine):
+        """Test upgrading to head leaves no difference from Base.metadata (indexes included)."""
+        with migrated_engine.connect() as conn:
+            assert compare_metadata(MigrationContext.configure(conn, opts={"include_name": include_name}), Base.metadata) == []
+    
+    def test_downgrade_removes_indexes(self, migrated_engine, tmp_path):
+        """Test the index migration is reversible."""
+        config = alembic_config(str(migrated_engine.url))
+        command.downgrade(config, "0002_session_topics")
+        with migrated_engine.connect() as conn:
+            names = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "ix_questions_session_id_id" not in names
+        assert "ix_generation_sessions_user_created" not in names
+
+
+class TestHotPathIndexes:
+    """Test the statements issued by the hot routes are index seeks, not table scans."""
+    
+    def test_routes_use_indexes(self, migrated_engine, seeded):
+        """Test session and question listing issue no sequential scans over seeded data."""
+        user_id, session_id, _ = seeded
+        api_engine = create_async_engine(async_database_url(str(migrated_engine.url)), poolclass=NullPool)
+        Session = async_sessionmaker(api_engine, expire_on_commit=False)
+        
+        async def override_get_async_db():
+            async with Session() as db:
+                yield db
+        
+        statements = []
+        listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+        headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(user_id)})}"}
+        
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        event.listen(api_engine.sync_engine, "before_cursor_execute", listener)
+        try:
+            with TestClient(app) as client:
+                first = client.get("/api/v1/generation/sessions?limit=5", headers=headers).json()
+                client.get(f"/api/v1/generation/sessions?limit=5&cursor={first['next_cursor']}", headers=headers)
+                client.get(f"/api/v1/generation/sessions/{session_id}?questions_limit=3", headers=headers)
+                client.get(f"/api/v1/generation/{session_id}/questions?limit=3", headers=headers)
+        finally:
+            event.remove(api_engine.sync_engine, "before_cursor_execute", listener)
+            app.dependency_overrides.clear()
+        
+        selects = [(s, p) for s, p in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) >= 4
+        with migrated_engine.connect() as conn:
+            for statement, parameters in selects:
+                assert full_scans(conn, statement, parameters) == [], statement
+    
+    def test_question_edit_history_uses_index(self, migrated_engine, seeded):
+        """Test the edit history of a question is read through the composite index."""
+        _, _, question_id = seeded
+        query = select(QuestionEdit).where(QuestionEdit.question_id == question_id).order_by(QuestionEdit.edited_at)
+        compiled = query.compile(migrated_engine)
+        
+        with migrated_engine.connect() as conn:
+            plan = conn.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {compiled}", tuple(compiled.params.values())
+            ).fetchall()
+        details = " | ".join(row[-1] for row in plan)
+        assert "ix_question_edits_question_edited" in details
+        assert "TEMP B-TREE" not in details
+
+
+class TestMigrateCommand:
+    """Test the standalone migrate command and the startup revision check."""
+    
+    def test_upgrade_empty_database(self, tmp_path):
+        """Test an empty database is migrated to head and then passes the check."""
+        from app.core.migrations import upgrade_database, check_schema_revision, head_revision
+        
+        url = f"sqlite:///{tmp_path / 'empty.db'}"
+        assert upgrade_database(url) == head_revision()
+        
+        engine = create_engine(url)
+        assert check_schema_revision(engine) is True
+        engine.dispose()
+    
+    def test_legacy_create_all_database_is_stamped(self, tmp_path):
+        """Test a database built by create_all, missing the newer indexes, is stamped and upgraded in place."""
+        from app.core.migrations import upgrade_database, head_revision
+        
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        engine = create_engine(url)
+        Base.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO users (email, hashed_password) VALUES ('a@b.c', 'x')"))
+            for name in ("ix_generation_sessions_user_created", "ix_questions_session_id_id", "ix_question_edits_question_edited"):
+                conn.execute(text(f"DROP INDEX {name}"))
+        
+        assert upgrade_database(url) == head_revision()
+        
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT email FROM users")).scalar() == "a@b.c"
+            assert compare_metadata(MigrationContext.configure(conn, opts={"include_name": include_name}), Base.metadata) == []
+        engine.dispose()
+    
+    def test_strict_check_rejects_outdated_schema(self, tmp_path):
+        """Test the startup check reports an unmigrated database, raising in strict mode."""
+        from app.core.migrations import check_schema_revision, SchemaOutdatedError
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'outdated.db'}")
+        assert check_schema_revision(engine) is False
+        with pytest.raises(SchemaOutdatedError):
+            check_schema_revision(engine, strict=True)
+        engine.dispose()
+    
+    def test_startup_does_no_schema_work(self, tmp_path, monkeypatch):
+        """Test application startup only reads the revision and never creates tables."""
+        import app.main as main_module
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+        monkeypatch.setattr(main_module, "engine", engine)
+        
+        with TestClient(app):
+            pass
+        
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == []
+        assert not any("CREATE" in s.upper() for s in statements)
+        engine.dispose()
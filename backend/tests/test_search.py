@@ -0,0 +1,137 @@
+"""
+Tests for full-text search across a user's question bank.
+"""
+import pytest
+from fastapi import status
+from sqlalchemy.dialects import postgresql
+
+
+@pytest.fixture
+def question_bank(db_session, test_user):
+    """Two sessions for the test user and one for another user, with overlapping vocabulary."""
+    from app.models.models import GenerationSession, Question, QuestionType, DifficultyLevel, User
+    
+    biology = GenerationSession(user_id=test_user.id, source_filename="biologia.pdf", status="completed")
+    history = GenerationSession(user_id=test_user.id, source_filename="historia.pdf", status="completed")
+    other_user = User(email="other@example.com", hashed_password="x")
+    db_session.add_all([biology, history, other_user])
+    db_session.flush()
+    foreign = GenerationSession(user_id=other_user.id, source_filename="alheio.pdf", status="completed")
+    db_session.add(foreign)
+    db_session.flush()
+    
+    questions = {
+        "content": Question(
+            session_id=biology.id, question_type=QuestionType.DISSERTATIVA,
+            content="Explique a fotossíntese nas plantas", topic="Botânica",
+            difficulty=DifficultyLevel.DIFICIL
+        ),
+        "justification": Question(
+            session_id=history.id, question_type=QuestionType.MULTIPLA_ESCOLHA,
+            content="Qual é a principal fonte de energia das plantas?",
+            option_a="Luz", option_b="Solo", option_c="Água", option_d="Vento", correct_answer="A",
+            justification="A fotossíntese converte luz em energia", difficulty=DifficultyLevel.FACIL
+        ),
+        "unrelated": Question(
+            session_id=history.id, question_type=QuestionType.VERDADEIRO_FALSO,
+            content="A Revolução Francesa começou em 1789", correct_answer="V"
+        ),
+        "foreign": Question(
+            session_id=foreign.id, question_type=QuestionType.DISSERTATIVA,
+            content="Descreva a fotossíntese"
+        ),
+    }
+    db_session.add_all(questions.values())
+    db_session.commit()
+    return {name: question.id for name, question in questions.items()}
+
+
+class TestQuestionSearch:
+    """Test the question bank search endpoint."""
+    
+    def test_search_ranks_content_above_justification(self, client, auth_headers, question_bank):
+        """Test matches in the statement outrank matches only in the justification."""
+        response = client.get("/api/v1/search/questions?q=fotossíntese", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert [q["id"] for q in data] == [question_bank["content"], question_bank["justification"]]
+        assert data[0]["rank"] > data[1]["rank"]
+        assert data[0]["source_filename"] == "biologia.pdf"
+        assert data[1]["options"]["A"] == "Luz"
+    
+    def test_search_only_returns_own_questions(self, client, auth_headers, question_bank):
+        """Test questions from other users' sessions never match."""
+        data = client.get("/api/v1/search/questions?q=descreva fotossíntese", headers=auth_headers).json()["data"]
+        assert data == []
+    
+    def test_search_ignores_accents_and_case(self, client, auth_headers, question_bank):
+        """Test unaccented, upper-case terms still match accented text."""
+        data = client.get("/api/v1/search/questions?q=FOTOSSINTESE plantas", headers=auth_headers).json()["data"]
+        assert {q["id"] for q in data} == {question_bank["content"], question_bank["justification"]}
+    
+    def test_search_filters(self, client, auth_headers, question_bank):
+        """Test difficulty and question type narrow the results."""
+        by_difficulty = client.get(
+            "/api/v1/search/questions?q=fotossíntese&difficulty=facil", headers=auth_headers
+        ).json()["data"]
+        assert [q["id"] for q in by_difficulty] == [question_bank["justification"]]
+        
+        by_type = client.get(
+            "/api/v1/search/questions?q=fotossíntese&question_type=dissertativa", headers=auth_headers
+        ).json()["data"]
+        assert [q["id"] for q in by_type] == [question_bank["content"]]
+    
+    def test_search_follows_question_edits(self, client, auth_headers, question_bank):
+        """Test edited and deleted questions are reflected by the index."""
+        question_id = question_bank["unrelated"]
+        client.put(
+            f"/api/v1/generation/questions/{question_id}",
+            json={"content": "A Revolução Industrial começou na Inglaterra"},
+            headers=auth_headers
+        )
+        
+        assert client.get("/api/v1/search/questions?q=francesa", headers=auth_headers).json()["data"] == []
+        data = client.get("/api/v1/search/questions?q=industrial", headers=auth_headers).json()["data"]
+        assert [q["id"] for q in data] == [question_id]
+        
+        client.delete(f"/api/v1/generation/questions/{question_id}", headers=auth_headers)
+        assert client.get("/api/v1/search/questions?q=industrial", headers=auth_headers).json()["data"] == []
+    
+    def test_search_rejects_empty_query(self, client, auth_headers):
+        """Test a query without words is rejected instead of matching everything."""
+        assert client.get("/api/v1/search/questions?q=", headers=auth_headers).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get("/api/v1/search/questions?q=%22%2A", headers=auth_headers).status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_search_requires_auth(self, client):
+        """Test the endpoint is not reachable without a token."""
+        assert client.get("/api/v1/search/questions?q=teste").status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSearchQuery:
+    """Test the search statement built for each database."""
+    
+    def test_postgres_query_uses_tsvector_index(self):
+        """Test the PostgreSQL statement matches the indexed tsvector and ranks with ts_rank_cd."""
+        from app.services.question_search import build_search_query
+        
+        sql = str(build_search_query("postgresql", 1, "célula animal").compile(dialect=postgresql.dialect()))
+        
+        assert "questions.search_vector @@ websearch_to_tsquery" in sql
+        assert "ts_rank_cd(questions.search_vector" in sql
+        assert "generation_sessions.user_id" in sql
+    
+    def test_fts5_expression_quotes_user_input(self):
+        """Test operators and quotes typed by the user become plain quoted terms."""
+        from app.services.question_search import fts5_match_expression, SearchQueryError
+        
+        assert fts5_match_expression('célula "OR" NEAR(x') == '"célula" "or" "near" "x"'
+        with pytest.raises(SearchQueryError):
+            fts5_match_expression('"*')
+    
+    def test_unsupported_dialect(self):
+        """Test databases without full-text support are reported instead of falling back to LIKE."""
+        from app.services.question_search import build_search_query, SearchQueryError
+        
+        with pytest.raises(SearchQueryError):
+            build_search_query("mysql", 1, "teste")
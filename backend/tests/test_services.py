@@ -1,10 +1,15 @@
 """
 Tests for AI services - text extraction, topic segmentation, and difficulty classification.
 """
+import re
 import pytest
 from app.services.ai.text_extractor import TextExtractor
 from app.services.ai.topic_segmenter import TopicSegmenter
-from app.services.ai.difficulty_classifier import DifficultyClassifier
+from app.services.ai.difficulty_classifier import ContextProfile, DifficultyClassifier
+from app.services.ai.document_analysis import analyze_document
+from app.services.ai.difficulty_model import DifficultyModel, train_from_texts
+from app.services.ai.syllables import SyllableLexicon, count_syllables_by_rules, write_lexicon
+from app.services.ai.term_matcher import TermMatcher, load_vocabulary
 
 
 class TestTextExtractor:
@@ -48,6 +53,97 @@ class TestTextExtractor:
         
         assert not extractor.validate_minimum_words(short_text, 500)
         assert extractor.validate_minimum_words(long_text, 500)
+    
+    def test_docx_streaming_preserves_document_order(self, tmp_path):
+        """Test DOCX streaming extraction emits headings, paragraphs and table rows in order."""
+        from docx import Document
+        
+        path = tmp_path / "sample.docx"
+        doc = Document()
+        doc.add_heading("Introdução", level=1)
+        doc.add_paragraph("Primeiro parágrafo.")
+        table = doc.add_table(rows=1, cols=2)
+        table.cell(0, 0).text = "Classe"
+        table.cell(0, 1).text = "Objeto"
+        doc.add_heading("Conclusão", level=2)
+        doc.save(path)
+        
+        extractor = TextExtractor()
+        blocks = list(extractor.iter_docx_blocks(str(path)))
+        
+        assert [(b.kind, b.text, b.level) for b in blocks] == [
+            ("heading", "Introdução", 1),
+            ("paragraph", "Primeiro parágrafo.", 0),
+            ("table_row", "Classe | Objeto", 0),
+            ("heading", "Conclusão", 2),
+        ]
+        assert extractor.extract(str(path)).startswith("Introdução\n\nPrimeiro parágrafo.")
+    
+    def test_docx_textbox_keeps_enclosing_paragraph(self, tmp_path):
+        """Test textbox paragraphs neither reset the enclosing paragraph nor repeat from mc:Fallback."""
+        from docx import Document
+        from docx.oxml import parse_xml
+        
+        def textbox(text):
+            return (
+                '<w:txbxContent><w:p><w:pPr><w:pStyle w:val="Heading1"/></w:pPr>'
+                f'<w:r><w:t>{text}</w:t></w:r></w:p></w:txbxContent>'
+            )
+        
+        alternate = parse_xml(
+            '<w:r xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+            ' xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+            ' xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"'
+            ' xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+            ' xmlns:wps="http://schemas.microsoft.com/office/word/2010/wordprocessingShape"'
+            ' xmlns:v="urn:schemas-microsoft-com:vml">'
+            '<mc:AlternateContent><mc:Choice Requires="wps"><w:drawing><wp:anchor><a:graphic><a:graphicData>'
+            f'<wps:wsp><wps:txbx>{textbox("Nota da caixa")}</wps:txbx></wps:wsp>'
+            '</a:graphicData></a:graphic></wp:anchor></w:drawing></mc:Choice>'
+            f'<mc:Fallback><w:pict><v:shape><v:textbox>{textbox("Nota da caixa")}</v:textbox></v:shape></w:pict></mc:Fallback>'
+            '</mc:AlternateContent></w:r>'
+        )
+        
+        path = tmp_path / "caixa.docx"
+        doc = Document()
+        paragraph = doc.add_paragraph("Antes da caixa.")
+        paragraph._p.append(alternate)
+        paragraph.add_run("Depois da caixa.")
+        doc.add_paragraph("Seguinte.")
+        doc.save(path)
+        
+        blocks = list(TextExtractor().iter_docx_blocks(str(path)))
+        
+        assert [(b.kind, b.text, b.level) for b in blocks] == [
+            ("paragraph", "Antes da caixa.\nNota da caixa\nDepois da caixa.", 0),
+            ("paragraph", "Seguinte.", 0),
+        ]
+    
+    def test_extract_from_memory_buffers(self, tmp_path):
+        """Test PDF, DOCX and TXT extraction from bytes, memoryview and streams."""
+        import io
+        from docx import Document
+        from reportlab.pdfgen import canvas
+        
+        pdf_buffer = io.BytesIO()
+        pdf = canvas.Canvas(pdf_buffer)
+        pdf.drawString(100, 700, "Texto em memoria")
+        pdf.showPage()
+        pdf.save()
+        
+        docx_buffer = io.BytesIO()
+        doc = Document()
+        doc.add_paragraph("Parágrafo em memória")
+        doc.save(docx_buffer)
+        
+        extractor = TextExtractor()
+        
+        assert extractor.extract(pdf_buffer.getbuffer(), "a.pdf") == "Texto em memoria"
+        assert extractor.extract(io.BytesIO(docx_buffer.getvalue()), "a.docx") == "Parágrafo em memória"
+        assert extractor.extract(memoryview("Olá, mundo".encode("latin-1")), "a.txt") == "Olá, mundo"
+        
+        # Nenhuma view exportada fica pendente após a extração
+        pdf_buffer.write(b"%")
 
 
 class TestTopicSegmenter:
@@ -71,6 +167,65 @@ class TestTopicSegmenter:
         assert isinstance(segments, list)
         assert len(segments) > 0
     
+    def test_segments_share_document_analysis(self, sample_text_content):
+        """Test the cached document analysis matches the per-stage tokenizers it replaces."""
+        text = sample_text_content + "\n\n  Segundo parágrafo! Com duas frases.  \n \n"
+        analysis = analyze_document(text)
+        
+        assert analyze_document(text) is analysis
+        assert analysis.word_count == len(text.split())
+        assert analysis.tokens(0, 5) == text.split()[:5]
+        paragraphs = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+        assert [analysis.paragraph(i) for i in range(len(analysis.paragraph_spans))] == paragraphs
+        assert analysis.paragraph_word_counts.tolist() == [len(p.split()) for p in paragraphs]
+        assert analysis.sentence_count == len([s for s in re.split(r"[.!?]+", text) if s.strip()])
+        
+        segments = TopicSegmenter(min_segment_words=20).segment(analysis)
+        assert sum(seg.word_count for seg in segments) == analysis.word_count
+        assert all(seg.word_count == len(seg.content.split()) for seg in segments)
+    
+    def test_segments_reference_document_offsets(self, sample_text_content):
+        """Test segments keep spans into the source document and build text lazily."""
+        paragraphs = [sample_text_content.strip()] + [
+            f"Parágrafo {i} sobre algoritmos de ordenação e estruturas de dados. " * 4 for i in range(6)
+        ]
+        text = "\n\n".join(paragraphs)
+        segments = TopicSegmenter(n_topics=3, min_segment_words=20).segment(text)
+        
+        assert len(segments) > 1
+        covered = sorted(tuple(span) for seg in segments for span in seg.spans.tolist())
+        assert covered[0][0] == 0 and covered[-1][1] == len(text.rstrip())
+        for seg in segments:
+            assert not hasattr(seg, "__dict__")
+            assert seg.document is text
+            content = seg.content
+            assert all(text[start:end] in content for start, end in seg.spans.tolist())
+            for limit in (0, 10, len(content) - 1, len(content) + 50):
+                assert seg.excerpt(limit) == content[:limit]
+    
+    def test_shared_segmenter_is_thread_safe(self, sample_text_content):
+        """Test concurrent segmentations on one instance give the same results as a serial run."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        subjects = ["algoritmos de ordenação", "fotossíntese nas plantas", "revolução francesa", "redes neurais"]
+        texts = [
+            "\n\n".join(
+                [sample_text_content.strip()]
+                + [f"Parágrafo {i} sobre {subject} e temas relacionados ao capítulo {k}. " * (3 + i) for i in range(4 + k)]
+            )
+            for k, subject in enumerate(subjects)
+        ] * 6
+        
+        def signature(segments):
+            return [(s.topic, s.keywords, round(s.relevance_score, 9), s.spans.tolist()) for s in segments]
+        
+        segmenter = TopicSegmenter(n_topics=3, min_segment_words=20)
+        serial = [signature(segmenter.segment(text)) for text in texts]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            concurrent = list(pool.map(lambda text: signature(segmenter.segment(text)), texts))
+        
+        assert concurrent == serial
+    
     def test_empty_text_handling(self):
         """Test handling of empty text."""
         segmenter = TopicSegmenter()
@@ -144,6 +299,139 @@ class TestDifficultyClassifier:
         
         assert len(difficulties) == len(questions)
         assert all(d in ["easy", "medium", "hard"] for d in difficulties)
+    
+    def test_classify_many_matches_classify(self):
+        """Test vectorized batch classification is identical to per-question classify."""
+        classifier = DifficultyClassifier()
+        
+        questions = [
+            "O que é uma variável?",
+            "",
+            "Explique a diferença entre compilação e interpretação. Portanto, qual é mais rápida?",
+            "Não obstante o polimorfismo, a) herança b) encapsulamento c) abstração. " * 6,
+            "Descreva o algoritmo de Dijkstra enquanto compara sua complexidade com a busca em largura.",
+        ]
+        
+        assert classifier.classify_many(questions) == [classifier.classify(q) for q in questions]
+        assert classifier.classify_many([]) == []
+    
+    def test_context_profile_reused_across_questions(self):
+        """Test the context profile is built once and shifts concept scores consistently."""
+        classifier = DifficultyClassifier()
+        context = "Python é uma linguagem de programação. O algoritmo é um conceito. A herança é usada."
+        questions = [
+            "O que é o conceito principal do texto?",
+            "Não obstante o polimorfismo e a herança, explique a recursividade do algoritmo.",
+        ]
+        
+        profile = classifier.context_profile(context)
+        assert classifier.context_profile(context) is profile
+        assert profile.word_count > 0 and profile.avg_sentence_length > 0
+        assert "de" not in profile.term_frequencies
+        
+        with_context = classifier.classify_many(questions, profile)
+        assert with_context == classifier.classify_many(questions, context)
+        assert with_context == [classifier.classify(q, profile) for q in questions]
+        # Densidade técnica e sentenças acima da linha de base do contexto elevam o score
+        assert with_context[1].concept_score > classifier.classify(questions[1]).concept_score
+    
+    def test_context_profile_cache_holds_only_profiles(self):
+        """Test the profile cache is keyed by content hash, bounded, and keeps no document text."""
+        from app.services.ai.document_analysis import DocumentAnalysis, content_hash
+        
+        classifier = DifficultyClassifier()
+        contexts = [f"Texto {i} sobre algoritmos e estruturas de dados. " * 50 for i in range(40)]
+        profile = classifier.context_profile(contexts[0])
+        assert classifier.context_profile(DocumentAnalysis(contexts[0])) is profile
+        
+        for context in contexts:
+            classifier.context_profile(context)
+        
+        assert len(classifier._profiles) == classifier.CONTEXT_PROFILE_CACHE_SIZE
+        assert list(classifier._profiles) == [content_hash(c) for c in contexts[-classifier.CONTEXT_PROFILE_CACHE_SIZE:]]
+        assert all(type(p) is ContextProfile for p in classifier._profiles.values())
+    
+    def test_trained_model_roundtrip(self, tmp_path):
+        """Test a model trained on reviewed questions survives .npz serialization and drives levels."""
+        texts = [
+            "O que é uma lista?", "Qual é a cor do céu?", "O que é um número?",
+            "Explique o polimorfismo paramétrico e a herança múltipla em arquiteturas complexas.",
+            "Não obstante a recursividade, analise a complexidade assintótica do algoritmo.",
+            "Compare a ontologia e a epistemologia enquanto paradigmas metodológicos.",
+        ]
+        labels = ["facil"] * 3 + ["dificil"] * 3
+        
+        model = train_from_texts(texts, labels, hash_dim=256)
+        path = tmp_path / "modelo.npz"
+        model.save(str(path))
+        loaded = DifficultyModel.load(str(path))
+        
+        assert list(loaded.classes) == ["dificil", "facil"]
+        assert loaded.hash_dim == 256
+        
+        classifier = DifficultyClassifier(model=loaded)
+        analyses = classifier.classify_many(texts)
+        assert [a.level for a in analyses] == labels
+        single = [classifier.classify(t) for t in texts]
+        assert [a.level for a in single] == labels
+        assert [a.score for a in single] == pytest.approx([a.score for a in analyses])
+        assert all(0.0 <= a.score <= 1.0 for a in analyses)
+    
+    def test_trained_model_ignores_context(self):
+        """Test the learned model sees the same context-free features at inference as in training."""
+        texts = [
+            "O que é uma lista?", "Qual é a cor do céu?", "O que é um número?",
+            "Explique o polimorfismo paramétrico e a herança múltipla em arquiteturas complexas.",
+            "Não obstante a recursividade, analise a complexidade assintótica do algoritmo.",
+            "Compare a ontologia e a epistemologia enquanto paradigmas metodológicos.",
+        ]
+        labels = ["facil"] * 3 + ["dificil"] * 3
+        context = "Uma lista guarda itens em ordem. O céu é azul. Um número conta coisas. " * 20
+        
+        classifier = DifficultyClassifier(model=train_from_texts(texts, labels, hash_dim=256))
+        without_context = classifier.classify_many(texts)
+        with_context = classifier.classify_many(texts, classifier.context_profile(context))
+        
+        assert [a.concept_score for a in with_context] == [a.concept_score for a in without_context]
+        assert [a.score for a in with_context] == [a.score for a in without_context]
+        assert classifier.classify(texts[3], context).score == pytest.approx(without_context[3].score)
+    
+    def test_term_matcher_single_pass(self, tmp_path):
+        """Test the term matcher finds multi-word terms on word boundaries from vocabulary files."""
+        vocabulary = tmp_path / "termos.txt"
+        vocabulary.write_text("# comentário\nnão obstante\nherança\nherança múltipla\n\n", encoding="utf-8")
+        
+        matcher = TermMatcher({"connector": ["todavia"], "technical": load_vocabulary(vocabulary)})
+        text = "não  obstante a herança múltipla, todavia a heranças e atodavia não contam"
+        
+        assert list(matcher.finditer(text)) == [
+            ("não obstante", "technical"),
+            ("herança múltipla", "technical"),
+            ("todavia", "connector"),
+        ]
+        
+        classifier = DifficultyClassifier()
+        assert classifier._count_terms("o algoritmo e a herança; portanto, portanto, todavia") == (2, 2)
+    
+    def test_syllable_rules_and_lexicon(self, tmp_path):
+        """Test diphthong/hiatus rules and lookups in a memory-mapped syllable lexicon."""
+        expected = {
+            "poesia": 4, "saída": 3, "rainha": 3, "ainda": 3, "muito": 2, "coração": 3,
+            "quando": 2, "uruguai": 3, "ideia": 3, "saiu": 2, "história": 4, "praia": 2,
+            "ao": 1, "aos": 1, "mau": 1, "constituição": 5, "traição": 3, "feição": 2,
+            "aorta": 3, "fui": 1, "pão": 1,
+        }
+        assert {word: count_syllables_by_rules(word) for word in expected} == expected
+        
+        path = tmp_path / "silabas.tsv"
+        write_lexicon(str(path), {"zebra": 2, "subitem": 3, "ápice": 3, "abacaxi": 4})
+        lexicon = SyllableLexicon(str(path))
+        
+        assert [lexicon.get(w) for w in ["abacaxi", "subitem", "zebra", "ápice"]] == [4, 3, 2, 3]
+        assert lexicon.get("inexistente") is None
+        lexicon.close()
+        
+        assert SyllableLexicon(str(tmp_path / "ausente.tsv")).get("zebra") is None
 
 
 class TestQuestionValidation:
@@ -1,6 +1,7 @@
 """
 Tests for file upload endpoints.
 """
+import os
 import pytest
 from fastapi import status
 from io import BytesIO
@@ -76,7 +77,406 @@ class TestFileUpload:
         
         # Should fail because content is below 500 words
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_upload_small_file_skips_disk(self, client, auth_headers, sample_text_content, monkeypatch):
+        """Test small uploads are extracted in memory, without a temp file."""
+        from app.api.routes import upload
+        
+        def fail_spool(*args, **kwargs):
+            raise AssertionError("upload pequeno não deve ser gravado em disco")
+        
+        monkeypatch.setattr(upload, "spool_to_upload_dir", fail_spool)
+        files = {"file": ("aula.txt", BytesIO(sample_text_content.encode('utf-8')), "text/plain")}
+        response = client.post("/api/v1/upload/file", files=files, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["analysis"]["word_count"] > 50
+    
+    def test_upload_scanned_pdf_needs_ocr(self, client, auth_headers):
+        """Test image-only PDF is rejected with a structured needs-OCR result."""
+        from reportlab.pdfgen import canvas
+        
+        buffer = BytesIO()
+        pdf = canvas.Canvas(buffer)
+        pdf.rect(100, 100, 200, 200, fill=1)  # Página só com desenho, sem texto
+        pdf.showPage()
+        pdf.save()
+        buffer.seek(0)
+        
+        files = {"file": ("scan.pdf", buffer, "application/pdf")}
+        response = client.post("/api/v1/upload/file", files=files, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        detail = response.json()["detail"]
+        assert detail["code"] == "no_text_layer"
+        assert detail["needs_ocr"] is True
+        assert detail["image_only_pages"] == [1]
+    
+    
+    
+    def test_upload_file_in_memory_and_spooled(self, client, auth_headers, sample_text_content, monkeypatch):
+        """Test small uploads are extracted from the read bytes and larger ones go through the upload dir."""
+        import app.api.routes.upload as upload_module
+        from starlette.formparsers import MultiPartParser
+        from app.core.config import settings
+        
+        spooled = []
+        original = upload_module.spool_to_upload_dir
+        monkeypatch.setattr(upload_module, "spool_to_upload_dir", lambda *args: spooled.append(args) or original(*args))
+        content = sample_text_content.encode('utf-8')
+        
+        response = client.post("/api/v1/upload/file", files={"file": ("aula.txt", BytesIO(content), "text/plain")}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert spooled == []
+        
+        monkeypatch.setattr(settings, "in_memory_upload_max_bytes", len(content) - 1)
+        response = client.post("/api/v1/upload/file", files={"file": ("aula.txt", BytesIO(content), "text/plain")}, headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        assert len(spooled) == 1
+        
+        # O parser multipart do Starlette não é alterado globalmente
+        assert MultiPartParser.max_file_size == 1024 * 1024
 
+class TestBatchUpload:
+    """Test multi-file and zip batch upload endpoint."""
+    
+    def test_batch_upload_files_and_zip(self, client, auth_headers, db_session, sample_text_content):
+        """Test batch upload streams per-file progress and creates all sessions."""
+        import json
+        import zipfile
+        from app.models.models import GenerationSession
+        
+        content = sample_text_content.encode('utf-8')
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("aula2.txt", content)
+            zf.writestr("aula3.txt", content)
+            zf.writestr("programa.exe", b"ignored")
+        archive.seek(0)
+        
+        files = [
+            ("files", ("aula1.txt", BytesIO(content), "text/plain")),
+            ("files", ("aulas.zip", archive, "application/zip")),
+        ]
+        response = client.post("/api/v1/upload/batch", files=files, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        events = [json.loads(line) for line in response.text.splitlines() if line]
+        
+        assert events[0] == {"event": "started", "total": 3}
+        file_events = [e for e in events if e["event"] == "file"]
+        assert len(file_events) == 3
+        assert all(e["status"] == "processed" for e in file_events)
+        
+        final = events[-1]
+        assert final["event"] == "completed"
+        assert [s["filename"] for s in final["sessions"]] == ["aula1.txt", "aula2.txt", "aula3.txt"]
+        assert db_session.query(GenerationSession).count() == 3
+    
+    def test_batch_upload_rejects_unsupported_only(self, client, auth_headers):
+        """Test batch upload without any supported file fails."""
+        files = [("files", ("virus.exe", BytesIO(b"x"), "application/x-msdownload"))]
+        response = client.post("/api/v1/upload/batch", files=files, headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def _zip(self, members):
+        import zipfile
+        
+        archive = BytesIO()
+        with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, data in members:
+                zf.writestr(name, data)
+        archive.seek(0)
+        return archive
+    
+    def _count_spools(self, monkeypatch):
+        import app.api.routes.upload as upload_module
+        
+        calls = []
+        original = upload_module.spool_to_upload_dir
+        monkeypatch.setattr(upload_module, "spool_to_upload_dir", lambda *args: calls.append(args) or original(*args))
+        return calls
+    
+    def test_batch_zip_member_count_checked_before_extraction(self, client, auth_headers, monkeypatch):
+        """Test a zip with too many members is rejected before more than the limit reaches the disk."""
+        from app.core.config import settings
+        
+        calls = self._count_spools(monkeypatch)
+        archive = self._zip([(f"aula{i}.txt", b"x") for i in range(settings.upload_batch_max_files + 20)])
+        response = client.post(
+            "/api/v1/upload/batch", files=[("files", ("aulas.zip", archive, "application/zip"))], headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert len(calls) == settings.upload_batch_max_files
+        assert not [p for p in os.listdir(settings.upload_dir) if p.endswith(".txt")]
+    
+    def test_batch_zip_bomb_rejected_by_declared_size(self, client, auth_headers, monkeypatch):
+        """Test members are checked against the per-file and total uncompressed limits before extracting."""
+        from app.core.config import settings
+        
+        calls = self._count_spools(monkeypatch)
+        bomb = self._zip([("bomba.txt", b"\0" * (settings.max_file_size_bytes + 1))])
+        assert len(bomb.getvalue()) < 100 * 1024
+        response = client.post(
+            "/api/v1/upload/batch", files=[("files", ("bomba.zip", bomb, "application/zip"))], headers=auth_headers
+        )
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert calls == []
+        
+        monkeypatch.setattr(settings, "upload_batch_max_total_mb", 1)
+        archive = self._zip([(f"aula{i}.txt", b"\0" * (400 * 1024)) for i in range(5)])
+        response = client.post(
+            "/api/v1/upload/batch", files=[("files", ("aulas.zip", archive, "application/zip"))], headers=auth_headers
+        )
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert len(calls) == 2
+
+
+class TestResumableUpload:
+    """Test resumable chunked upload protocol."""
+    
+    def test_resumable_upload_flow(self, client, auth_headers, sample_text_content):
+        """Test create, chunked PUTs, offset query and finalize."""
+        import hashlib
+        
+        content = sample_text_content.encode('utf-8')
+        half = len(content) // 2
+        
+        response = client.post(
+            "/api/v1/upload/resumable",
+            json={
+                "filename": "aula.txt",
+                "size": len(content),
+                "checksum": hashlib.sha256(content).hexdigest()
+            },
+            headers=auth_headers
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        upload_id = response.json()["data"]["upload_id"]
+        url = f"/api/v1/upload/resumable/{upload_id}"
+        
+        response = client.put(
+            url,
+            content=content[:half],
+            headers={**auth_headers, "Content-Range": f"bytes 0-{half - 1}/{len(content)}"}
+        )
+        assert response.json()["data"]["offset"] == half
+        
+        # Parte repetida/fora de ordem informa o offset correto
+        response = client.put(
+            url,
+            content=content[:half],
+            headers={**auth_headers, "Content-Range": f"bytes 0-{half - 1}/{len(content)}"}
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.headers["Upload-Offset"] == str(half)
+        
+        response = client.get(url, headers=auth_headers)
+        assert response.json()["data"]["offset"] == half
+        
+        response = client.put(
+            url,
+            content=content[half:],
+            headers={**auth_headers, "Content-Range": f"bytes {half}-{len(content) - 1}/{len(content)}"}
+        )
+        assert response.json()["data"]["complete"] is True
+        
+        response = client.post(f"{url}/complete", headers=auth_headers)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert data["file_hash"] == hashlib.sha256(content).hexdigest()
+        assert data["filename"] == "aula.txt"
+        assert data["session_id"] > 0
+        
+        # Upload finalizado não pode ser reutilizado
+        assert client.get(url, headers=auth_headers).status_code == status.HTTP_404_NOT_FOUND
+    
+    def test_resumable_upload_rejects_oversized_declaration(self, client, auth_headers):
+        """Test size is validated before any chunk is sent."""
+        from app.core.config import settings
+        
+        response = client.post(
+            "/api/v1/upload/resumable",
+            json={"filename": "grande.pdf", "size": settings.max_file_size_bytes + 1},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    
+    def test_resumable_upload_rejects_body_not_matching_range(self, client, auth_headers):
+        """Test a part whose body length differs from its Content-Range is refused without writing."""
+        response = client.post(
+            "/api/v1/upload/resumable", json={"filename": "aula.txt", "size": 100}, headers=auth_headers
+        )
+        url = f"/api/v1/upload/resumable/{response.json()['data']['upload_id']}"
+        
+        for body in (b"x" * 10, b"x" * 30):
+            response = client.put(url, content=body, headers={**auth_headers, "Content-Range": "bytes 0-19/100"})
+            assert response.status_code == status.HTTP_400_BAD_REQUEST
+        
+        assert client.get(url, headers=auth_headers).json()["data"]["offset"] == 0
+    
+    def test_store_rolls_back_part_with_wrong_length(self, tmp_path):
+        """Test a streamed part shorter or longer than declared is undone, digest included."""
+        import asyncio
+        import hashlib
+        from app.services.upload_storage import ResumableUploadStore, UploadLengthMismatch
+        
+        store = ResumableUploadStore(str(tmp_path), ttl_seconds=3600)
+        upload = store.create(1, "aula.txt", 12)
+        
+        async def body(*chunks):
+            for chunk in chunks:
+                yield chunk
+        
+        async def run():
+            assert await store.append(upload, 0, 4, body(b"abcd")) == 4
+            for chunks in ((b"ef",), (b"efgh", b"ij")):
+                with pytest.raises(UploadLengthMismatch):
+                    await store.append(upload, 4, 4, body(*chunks))
+                assert store.offset(upload) == 4
+            assert await store.append(upload, 4, 8, body(b"efgh", b"ijkl")) == 12
+            return await store.finalize(upload)
+        
+        path, digest = asyncio.run(run())
+        assert open(path, "rb").read() == b"abcdefghijkl"
+        assert digest == hashlib.sha256(b"abcdefghijkl").hexdigest()
+    
+    def test_store_serializes_concurrent_parts(self, tmp_path):
+        """Test two simultaneous PUTs of the same part (a client retry) cannot both be written."""
+        import asyncio
+        import hashlib
+        from app.services.upload_storage import ResumableUploadStore
+        
+        store = ResumableUploadStore(str(tmp_path), ttl_seconds=3600)
+        content = bytes(range(256)) * 64
+        upload = store.create(1, "aula.txt", len(content))
+        
+        async def body():
+            for i in range(0, len(content), 1024):
+                await asyncio.sleep(0)
+                yield content[i:i + 1024]
+        
+        async def run():
+            results = await asyncio.gather(
+                store.append(upload, 0, len(content), body()),
+                store.append(upload, 0, len(content), body()),
+                return_exceptions=True
+            )
+            return results, await store.finalize(upload)
+        
+        results, (path, digest) = asyncio.run(run())
+        assert sorted(type(r).__name__ for r in results) == ["UploadOffsetMismatch", "int"]
+        assert open(path, "rb").read() == content
+        assert digest == hashlib.sha256(content).hexdigest()
+
+
+class TestTextUpload:
+    """Test pasted text upload endpoint."""
+    
+    def test_upload_text_plain_body(self, client, auth_headers, sample_text_content):
+        """Test text sent as a text/plain body."""
+        import hashlib
+        
+        response = client.post(
+            "/api/v1/upload/text",
+            content=sample_text_content.encode('utf-8'),
+            headers={**auth_headers, "Content-Type": "text/plain; charset=utf-8"}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()["data"]
+        assert data["content_hash"] == hashlib.sha256(sample_text_content.encode()).hexdigest()[:16]
+        assert data["analysis"]["word_count"] > 50
+    
+    def test_upload_text_json_body(self, client, auth_headers, sample_text_content):
+        """Test text sent as JSON has the same hash as text/plain."""
+        import hashlib
+        
+        response = client.post(
+            "/api/v1/upload/text",
+            json={"content": sample_text_content},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["content_hash"] == hashlib.sha256(sample_text_content.encode()).hexdigest()[:16]
+    
+    def test_upload_text_invalid_utf8_hashes_decoded_text(self, client, auth_headers, sample_text_content):
+        """Test invalid UTF-8 bytes are replaced and the hash is taken over the text actually analysed."""
+        import hashlib
+        
+        body = sample_text_content.encode('utf-8') + b"\xff\xfe fim"
+        response = client.post(
+            "/api/v1/upload/text",
+            content=body,
+            headers={**auth_headers, "Content-Type": "text/plain; charset=utf-8"}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        decoded = body.decode('utf-8', errors="replace")
+        assert response.json()["data"]["content_hash"] == hashlib.sha256(decoded.encode()).hexdigest()[:16]
+        assert response.json()["data"]["content_hash"] != hashlib.sha256(body).hexdigest()[:16]
+    
+    def test_upload_text_too_large(self, client, auth_headers, monkeypatch):
+        """Test text bodies above max_file_size_bytes are rejected."""
+        from app.core.config import settings
+        
+        monkeypatch.setattr(settings, "max_file_size_mb", 1)
+        response = client.post(
+            "/api/v1/upload/text",
+            content=b"palavra " * (settings.max_file_size_bytes // 8 + 1),
+            headers={**auth_headers, "Content-Type": "text/plain"}
+        )
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    
+    def test_upload_text_empty(self, client, auth_headers):
+        """Test empty text is rejected."""
+        response = client.post(
+            "/api/v1/upload/text",
+            json={"content": "   "},
+            headers=auth_headers
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+class TestDeferredTopics:
+    """Test background topic analysis after upload."""
+    
+    def test_topics_ready_after_upload(self, client, auth_headers, sample_text_content):
+        """Test upload responds before topic analysis and topics are cached on the session."""
+        response = client.post(
+            "/api/v1/upload/text",
+            json={"content": sample_text_content},
+            headers=auth_headers
+        )
+        data = response.json()["data"]
+        assert data["topics_status"] == "pending"
+        
+        # O TestClient executa as background tasks antes de retornar
+        response = client.get(f"/api/v1/upload/{data['session_id']}/topics", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_200_OK
+        topics = response.json()["data"]["topics"]
+        assert len(topics) > 0
+        assert {"topic", "keywords", "relevance_score", "word_count"} <= set(topics[0])
+    
+    def test_topics_pending(self, client, auth_headers, test_user, db_session):
+        """Test topics endpoint returns 202 while analysis is pending."""
+        from app.models.models import GenerationSession
+        
+        session = GenerationSession(user_id=test_user.id, source_filename="a.txt", status="pending")
+        db_session.add(session)
+        db_session.commit()
+        
+        response = client.get(f"/api/v1/upload/{session.id}/topics", headers=auth_headers)
+        
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json()["status"] == "pending"
 
 class TestSupportedFormats:
     """Test supported file format validation."""
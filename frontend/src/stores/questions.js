@@ -92,8 +92,17 @@ export const useQuestionsStore = defineStore('questions', {
     async fetchQuestions(sessionId) {
       this.loading = true
       try {
-        const response = await api.get(`/generation/${sessionId}/questions`)
-        this.questions = response.data
+        // Segue o cursor de paginação (header X-Next-Cursor) até a última página
+        const questions = []
+        let cursor = null
+        do {
+          const response = await api.get(`/generation/${sessionId}/questions`, {
+            params: cursor ? { cursor } : {}
+          })
+          questions.push(...response.data)
+          cursor = response.headers['x-next-cursor']
+        } while (cursor)
+        this.questions = questions
         return { success: true, questions: this.questions }
       } catch (error) {
         this.error = error.response?.data?.detail || 'Erro ao carregar questões'
@@ -131,6 +140,35 @@ export const useQuestionsStore = defineStore('questions', {
       }
     },
 
+    async bulkUpdateQuestions(questionIds, action, value = {}) {
+      try {
+        const response = await api.post('/generation/questions/bulk', {
+          question_ids: questionIds,
+          action: action,
+          ...value
+        })
+        const ids = new Set(response.data.data.question_ids)
+        
+        // Update local state
+        if (action === 'delete') {
+          this.questions = this.questions.filter(q => !ids.has(q.id))
+        } else {
+          const changes = {
+            approve: { is_approved: true },
+            reject: { is_approved: false },
+            set_difficulty: { difficulty: value.difficulty },
+            set_topic: { topic: value.topic }
+          }[action]
+          this.questions = this.questions.map(q => ids.has(q.id) ? { ...q, ...changes, is_edited: true } : q)
+        }
+        
+        return { success: true, questionIds: [...ids] }
+      } catch (error) {
+        this.error = error.response?.data?.detail || 'Erro ao atualizar questões'
+        return { success: false, error: this.error }
+      }
+    },
+
     async regenerateQuestion(questionId) {
       try {
         const response = await api.post(`/generation/questions/${questionId}/regenerate`)